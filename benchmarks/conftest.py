@@ -0,0 +1,54 @@
+"""
+Fixtures for the admin benchmark suite.
+
+Data is generated once per scale with the generate_load_data command and committed, so every
+benchmark at that scale reads the same rows; each benchmark still runs inside pytest-django's
+rolled-back transaction. Scales are set with BENCHMARK_SCALES (comma separated request counts).
+Sessions, users and permissions are cached as in a deployment with a shared (Redis) cache.
+"""
+import os
+
+import pytest
+from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from main.models import Client, RequestType, ClientRequest
+
+SCALES = [int(scale) for scale in os.environ.get('BENCHMARK_SCALES', '100,1000,10000').split(',')]
+
+
+def wipe():
+    ClientRequest.objects.all().delete()
+    Client.objects.all().delete()
+    RequestType.objects.all().delete()
+
+
+@pytest.fixture(autouse=True)
+def shared_cache_deployment(settings):
+    # Measure the production setup, CACHE_BACKEND=redis: cached_db sessions and cached users and
+    # permissions (the settings only turn these on with redis; locmem stands in for it here)
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = ['main.auth_backends.CachedModelBackend']
+    settings.AUTH_CACHE_SECONDS = 300
+
+
+@pytest.fixture(scope='session', params=SCALES, ids=lambda scale: f'{scale}-requests')
+def scale(request, django_db_setup, django_db_blocker):
+    requests = request.param
+    with django_db_blocker.unblock():
+        wipe()
+        call_command(
+            'generate_load_data',
+            clients=max(requests // 50, 10), request_types=10, requests=requests,
+            seed=1, until='2026-01-01', verbosity=0,
+        )
+    yield requests
+    with django_db_blocker.unblock():
+        wipe()
+
+
+@pytest.fixture
+def admin_client_logged_in(client, db, scale):
+    user = User.objects.create_superuser(username='bench', password='benchpass123')
+    client.force_login(user)
+    return client
@@ -0,0 +1,142 @@
+"""
+Closed-loop HTTP load test for the admin changelist (standard library only).
+
+Logs in once as a staff user, then for each concurrency level keeps N connections busy
+requesting the page for --duration seconds and reports throughput and latency percentiles
+as a Markdown table. See docs/load-testing.md for the full procedure.
+
+Usage:
+    python benchmarks/loadtest.py --username admin --password secret
+    python benchmarks/loadtest.py --url http://localhost:8000 --path /admin/main/client/ \\
+        --concurrency 1,2,4,8,16,32 --duration 20
+"""
+import argparse
+import http.client
+import re
+import statistics
+import threading
+import time
+import urllib.parse
+from http.cookies import SimpleCookie
+
+
+def connect(base):
+    parts = urllib.parse.urlsplit(base)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=60)
+
+
+def login(base, username, password):
+    # Return the Cookie header of a logged-in session, going through the normal login form (with CSRF)
+    connection = connect(base)
+    connection.request('GET', '/login/')
+    response = connection.getresponse()
+    page = response.read().decode()
+    cookies = SimpleCookie()
+    for header in response.headers.get_all('Set-Cookie') or []:
+        cookies.load(header)
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+    if token is None:
+        raise SystemExit(f'No login form at {base}/login/ (HTTP {response.status}); is the host in ALLOWED_HOSTS?')
+    body = urllib.parse.urlencode({'username': username, 'password': password, 'csrfmiddlewaretoken': token.group(1)})
+    connection.request('POST', '/login/', body=body, headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Cookie': f"csrftoken={cookies['csrftoken'].value}",
+        'Referer': base + '/login/',
+    })
+    response = connection.getresponse()
+    response.read()
+    for header in response.headers.get_all('Set-Cookie') or []:
+        cookies.load(header)
+    if 'sessionid' not in cookies:
+        raise SystemExit(f'Login failed (HTTP {response.status}); check the username and password.')
+    return '; '.join(f'{name}={morsel.value}' for name, morsel in cookies.items())
+
+
+def worker(base, path, cookie, deadline, latencies, errors, lock):
+    # One keep-alive connection issuing requests back to back until the deadline
+    connection = connect(base)
+    local_latencies, local_errors = [], 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers={'Cookie': cookie})
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            connection.close()
+            connection = connect(base)
+            # Don't spin on a server that is down or restarting
+            time.sleep(0.1)
+        if ok:
+            local_latencies.append(time.perf_counter() - started)
+        else:
+            local_errors += 1
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def run_level(base, path, cookie, concurrency, duration):
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(base, path, cookie, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'mean': statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the running server.')
+    parser.add_argument('--path', default='/admin/main/clientrequest/', help='Page to request.')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', default='1,2,4,8,16,32', help='Comma-separated concurrency levels.')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per concurrency level.')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds of unmeasured load before the first level.')
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    cookie = login(base, args.username, args.password)
+    levels = [int(level) for level in args.concurrency.split(',')]
+    if args.warmup:
+        run_level(base, args.path, cookie, max(levels), args.warmup)
+
+    print(f'{args.path} on {base}, {args.duration:g}s per level\n')
+    print('| Concurrency | Requests | Errors | Req/s | Mean ms | p50 ms | p95 ms | p99 ms |')
+    print('| ---: | ---: | ---: | ---: | ---: | ---: | ---: | ---: |')
+    for level in levels:
+        result = run_level(base, args.path, cookie, level, args.duration)
+        print(
+            f"| {result['concurrency']} | {result['requests']} | {result['errors']} | {result['rps']:.1f} "
+            f"| {result['mean']:.1f} | {result['p50']:.1f} | {result['p95']:.1f} | {result['p99']:.1f} |",
+            flush=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
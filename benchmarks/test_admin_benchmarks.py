@@ -0,0 +1,113 @@
+"""
+Latency and query-count benchmarks for the custom admin site's hot paths.
+
+Run with:
+    make benchmark              # run and save results under benchmarks/.results
+    make benchmark-compare      # fail if any mean is >20% slower than the last saved run
+
+Timings are compared against stored runs by pytest-benchmark; query counts are recorded in
+each result's extra_info and checked against the budgets below on every run.
+"""
+import itertools
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from main.models import Client, ClientRequest
+
+# Maximum queries per page view, independent of data scale
+QUERY_BUDGETS = {
+    'changelist': 10,
+    'changelist_filtered': 10,
+    'changelist_search': 10,
+    'change_form': 10,
+    'client_change_form': 12,
+    'status_action': 10,
+    'login': 15,
+    'register': 10,
+}
+
+usernames = itertools.count()
+
+
+def run(benchmark, name, func):
+    # Record the query count of one call, enforce its budget, then time repeated calls
+    with CaptureQueriesContext(connection) as context:
+        response = func()
+    assert response.status_code in (200, 302)
+    queries = len(context.captured_queries)
+    benchmark.extra_info['queries'] = queries
+    assert queries <= QUERY_BUDGETS[name], f'{name} ran {queries} queries (budget {QUERY_BUDGETS[name]})'
+    benchmark.pedantic(func, rounds=10, iterations=1, warmup_rounds=1)
+
+
+@pytest.mark.django_db
+def test_client_request_changelist(benchmark, admin_client_logged_in):
+    url = reverse('admin:main_clientrequest_changelist')
+    run(benchmark, 'changelist', lambda: admin_client_logged_in.get(url))
+
+
+@pytest.mark.django_db
+def test_client_request_changelist_filtered(benchmark, admin_client_logged_in):
+    url = reverse('admin:main_clientrequest_changelist')
+    run(benchmark, 'changelist_filtered', lambda: admin_client_logged_in.get(url, {'status__exact': 'Pending'}))
+
+
+@pytest.mark.django_db
+def test_client_request_changelist_search(benchmark, admin_client_logged_in):
+    url = reverse('admin:main_clientrequest_changelist')
+    run(benchmark, 'changelist_search', lambda: admin_client_logged_in.get(url, {'q': 'Load Client 0001'}))
+
+
+@pytest.mark.django_db
+def test_client_request_change_form(benchmark, admin_client_logged_in):
+    client_request = ClientRequest.objects.order_by('-created_at').first()
+    url = reverse('admin:main_clientrequest_change', args=[client_request.pk])
+    run(benchmark, 'change_form', lambda: admin_client_logged_in.get(url))
+
+
+@pytest.mark.django_db
+def test_busiest_client_change_form(benchmark, admin_client_logged_in):
+    from django.db.models import Count
+    busiest = Client.objects.annotate(requests=Count('clientrequest')).order_by('-requests').first()
+    url = reverse('admin:main_client_change', args=[busiest.pk])
+    run(benchmark, 'client_change_form', lambda: admin_client_logged_in.get(url))
+
+
+@pytest.mark.django_db
+def test_bulk_status_action(benchmark, admin_client_logged_in):
+    url = reverse('admin:main_clientrequest_changelist')
+    selected = list(ClientRequest.objects.order_by('-created_at').values_list('pk', flat=True)[:100])
+    # Alternate the target status so that every round changes the rows, rather than timing a no-op
+    actions = itertools.cycle(['mark_as_completed', 'mark_as_in_progress'])
+    run(benchmark, 'status_action', lambda: admin_client_logged_in.post(url, {
+        'action': next(actions), '_selected_action': selected,
+    }))
+
+
+@pytest.mark.django_db
+def test_login(benchmark, client, django_user_model, scale):
+    django_user_model.objects.create_user(username='benchstaff', password='benchpass123', is_staff=True)
+
+    def login():
+        response = client.post(reverse('login'), {'username': 'benchstaff', 'password': 'benchpass123'})
+        client.logout()
+        return response
+
+    run(benchmark, 'login', login)
+
+
+@pytest.mark.django_db
+def test_registration(benchmark, client, scale):
+    def register():
+        username = f'benchuser{next(usernames)}'
+        return client.post(reverse('register'), {
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'benchmarkpass123',
+            'password_confirm': 'benchmarkpass123',
+        })
+
+    run(benchmark, 'register', register)
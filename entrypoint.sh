@@ -5,8 +5,14 @@ echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
 if [ "$DJANGO_ENV" = "production" ]; then
-    echo "Starting Gunicorn server"
-    gunicorn mysite.wsgi:application --bind 0.0.0.0:$PORT
+    # Workers, threads, worker class and recycling are set in gunicorn.conf.py (tunable by env)
+    if [ "$SERVER_INTERFACE" = "asgi" ]; then
+        echo "Starting Gunicorn server (ASGI, uvicorn workers)"
+        gunicorn mysite.asgi:application --config gunicorn.conf.py
+    else
+        echo "Starting Gunicorn server"
+        gunicorn mysite.wsgi:application --config gunicorn.conf.py
+    fi
 else
     echo "Starting Django development server"
     python manage.py runserver 0.0.0.0:$PORT
@@ -0,0 +1,130 @@
+"""
+Gunicorn serving profile, read automatically by `gunicorn` from the working directory
+(entrypoint.sh also passes it explicitly).
+
+Everything is derived from the CPUs this container may actually use and can be overridden
+by environment variable:
+
+    SERVER_INTERFACE       wsgi (default) or asgi; selects the default worker class below
+    GUNICORN_WORKER_CLASS  gthread (WSGI default), sync, or uvicorn_worker.UvicornWorker
+                           (ASGI default; serve mysite.asgi:application with it)
+    WEB_CONCURRENCY        worker processes (default: see default_workers below)
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    GUNICORN_MAX_WORKERS   upper bound on the derived worker count (default 16)
+    GUNICORN_TIMEOUT       seconds a silent worker may run before being restarted (default 30)
+    GUNICORN_MAX_REQUESTS  requests before a worker is recycled (default 1000, jittered)
+    GUNICORN_PRELOAD       load the app once in the master before forking (default True)
+    PORT                   port to bind (default 8000)
+    PROMETHEUS_MULTIPROC_DIR  where workers write their metrics for /metrics to merge
+                           (default prometheus-metrics under worker_tmp_dir)
+
+Each worker thread holds its own database connection (CONN_MAX_AGE keeps it open), so
+workers x threads must stay below the database's connection limit.
+"""
+import multiprocessing
+import os
+import shutil
+
+
+def available_cpus():
+    # CPUs this process may run on, reduced by a cgroup v2 CPU quota (docker --cpus, Render plans)
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def default_workers(worker_class, cpus):
+    # sync: one request per process, so oversubscribe to cover time spent waiting on the database.
+    # gthread: threads cover the waiting, so about one process per core.
+    # async: one event loop per core.
+    if worker_class == 'sync':
+        return cpus * 2 + 1
+    if worker_class == 'gthread':
+        return cpus + 1
+    return cpus
+
+
+cpus = available_cpus()
+asgi = os.getenv('SERVER_INTERFACE', 'wsgi') == 'asgi'
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker' if asgi else 'gthread')
+workers = env_int('WEB_CONCURRENCY', min(default_workers(worker_class, cpus), env_int('GUNICORN_MAX_WORKERS', 16)))
+threads = env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Import Django once in the master so workers fork with it already loaded (faster boots,
+# shared memory pages); connections are never opened before the fork, see post_fork
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers periodically to bound slow memory growth; the jitter stops them all restarting at once
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max(1, max_requests // 10)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Render's proxy reuses connections; keep them open a little longer than gunicorn's 2s default
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat files on tmpfs: on Docker's overlay filesystem the default /tmp can stall and get
+# healthy workers killed as "timed out"
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Prometheus metrics (main/metrics.py): each worker writes its counters to files here and
+# /metrics merges them, whichever worker serves the scrape. Set before the app is loaded,
+# because prometheus_client picks its storage when it is imported.
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(worker_tmp_dir or '/tmp', 'prometheus-metrics'),
+)
+
+# An empty GUNICORN_ACCESS_LOG turns the access log off (e.g. while load testing)
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+# Trust X-Forwarded-* from the platform's proxy only
+forwarded_allow_ips = os.getenv('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+
+def post_fork(server, worker):
+    # Connections must never be shared between processes; drop any the master opened while preloading
+    from django.conf import settings
+
+    if settings.configured:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def on_starting(server):
+    # Files left by a previous run would be merged into this one's counters
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Keep an exited worker's counters, but drop its live gauges from the merged metrics
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid, prometheus_dir)
+
+
+def when_ready(server):
+    server.log.info(
+        'Serving with %s x %s worker(s), %s thread(s) each (%s CPU(s) available)',
+        workers, worker_class, threads, cpus,
+    )
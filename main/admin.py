@@ -1,13 +1,85 @@
 from django.contrib import admin
-from .models import Client, RequestType, ClientRequest
+from .models import Client, RequestType, ClientRequest, ClientRequestStatusChange, Job
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
 from django.contrib.admin import AdminSite
 from .decorators import staff_member_required_403
+from .search import RankedSearchMixin
+from .pagination import KeysetPaginationMixin, LookaheadPaginator, decode_cursor, encode_cursor, keyset_filter
+from .widgets import PrimedAutocompleteSelect, prime_autocomplete_widgets
+from .forms import DataImportForm
+from .importers import IMPORTERS, import_file
+from .exports import StreamingExportMixin, make_export_action
+from .dashboard import get_dashboard
+from .cache import cache_health, reset_cache_stats
+from .perf import perf_stats
+from . import sla
+from .jobs import BackgroundActionMixin, enqueue, job_link, store_upload
+from django.contrib import messages
+from django.template.response import TemplateResponse
+from django.forms.models import BaseInlineFormSet
+from django.http import Http404, HttpResponseRedirect, JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.template.loader import render_to_string
+from django.urls import path, reverse
+from django.conf import settings
+from datetime import datetime, timezone as datetime_timezone
 from django.utils import timezone
+from django.utils.http import urlencode
+from django.utils.html import format_html
 
 # Custom AdminSite subclass to override permission checks and caching behavior
 class CustomAdminSite(AdminSite):
+    index_template = 'admin/main/index.html'  # Model index plus the operations dashboard
+
+    # Add the cached operations dashboard (main/dashboard.py) to the index for staff who can see requests
+    def index(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        if request.user.has_perm('main.view_clientrequest'):
+            extra_context['dashboard'] = get_dashboard()
+        return super().index(request, extra_context)
+
+    def get_urls(self):
+        urls = [
+            path('cache-health/', self.admin_view(self.cache_health_view), name='cache_health'),
+            path('performance/', self.admin_view(self.performance_view), name='performance'),
+        ]
+        return urls + super().get_urls()
+
+    # Cache backend, key prefix/version, a live round-trip probe and this process's hit/miss rates.
+    # Superusers only: it exposes infrastructure details. POST resets the counters.
+    def cache_health_view(self, request):
+        if not request.user.is_superuser:
+            raise PermissionDenied
+        if request.method == 'POST':
+            reset_cache_stats()
+            return HttpResponseRedirect(request.path)
+        context = {
+            **self.each_context(request),
+            'title': 'Cache health',
+            'caches': cache_health(),
+        }
+        request.current_app = self.name
+        return TemplateResponse(request, 'admin/main/cache_health.html', context)
+
+    # Per-view latency percentiles, query counts and repeated query shapes recorded by
+    # PerfMiddleware in this process (main/perf.py). Staff can read it; superusers can reset it.
+    def performance_view(self, request):
+        if request.method == 'POST':
+            if not request.user.is_superuser:
+                raise PermissionDenied
+            perf_stats.reset()
+            return HttpResponseRedirect(request.path)
+        context = {
+            **self.each_context(request),
+            'title': 'Performance',
+            'views': perf_stats.report(),
+            'since': datetime.fromtimestamp(perf_stats.since, tz=datetime_timezone.utc),
+            'slow_ms': settings.PERF_SLOW_MS,
+        }
+        request.current_app = self.name
+        return TemplateResponse(request, 'admin/main/performance.html', context)
+
     # Override admin_view to apply custom access control and caching rules
     def admin_view(self, view, cacheable=False):
         # Wrap the original admin view with a custom decorator that restricts access
@@ -24,22 +96,129 @@ class CustomAdminSite(AdminSite):
 # Instantiate the custom admin site; models will be registered on this instead of default admin site
 custom_admin_site = CustomAdminSite(name='custom_admin')
 
+# Mixin for admins whose foreign keys use search-as-you-type autocomplete widgets.
+# Swaps in PrimedAutocompleteSelect so forms that already hold the related object
+# (see prime_autocomplete_widgets) render it without a per-form label query.
+class PrimedAutocompleteMixin:
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.get_autocomplete_fields(request) and 'widget' not in kwargs:
+            kwargs['widget'] = PrimedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+# Mixin for admins that serve autocomplete lookups for other admins' foreign keys.
+# Lookups are paged without a COUNT(*) and can be narrowed by autocomplete_filter
+# (e.g. only active clients), on top of the admin's normal (indexed) search.
+class AutocompleteLookupMixin:
+    autocomplete_filter = {}  # Lookups applied to every autocomplete query for this model
+
+    def is_autocomplete_request(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match is not None and match.url_name == 'autocomplete'
+
+    def get_paginator(self, request, queryset, per_page, *args, **kwargs):
+        if self.is_autocomplete_request(request):
+            return LookaheadPaginator(queryset, per_page, *args, **kwargs)
+        return super().get_paginator(request, queryset, per_page, *args, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        if self.autocomplete_filter and self.is_autocomplete_request(request):
+            queryset = queryset.filter(**self.autocomplete_filter)
+        return super().get_search_results(request, queryset, search_term)
+
+
+# Query string parameter filtering the Client page's request inline (and its "load more" endpoint) by status
+INLINE_STATUS_VAR = 'requests_status'
+
+
+# Inline formset that only loads a client's most recent requests instead of their whole history.
+# On GET it shows the newest page_size requests (optionally filtered by status); on POST it loads
+# exactly the rows that were submitted, so the window moving between GET and POST cannot
+# mismatch forms and instances.
+class RecentClientRequestFormSet(BaseInlineFormSet):
+    page_size = 20
+    status_filter = None
+
+    def submitted_pks(self):
+        pk_name = self.model._meta.pk.name
+        pks = []
+        for i in range(self.initial_form_count()):
+            value = self.data.get(f'{self.add_prefix(i)}-{pk_name}', '')
+            if str(value).isdigit():
+                pks.append(int(value))
+        return pks
+
+    # Hand each form's autocomplete widgets the related objects its instance already has loaded
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        prime_autocomplete_widgets(form)
+        return form
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            queryset = super().get_queryset()
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self.submitted_pks()).order_by('-created_at', '-pk')
+            else:
+                if self.status_filter:
+                    queryset = queryset.filter(status=self.status_filter)
+                queryset = queryset.order_by('-created_at', '-pk')[:self.page_size]
+            self._queryset = queryset
+        return self._queryset
+
+    def load_more_url(self):
+        # URL of the next (older) page of requests, or None when everything is already shown
+        rows = list(self.get_queryset())
+        if self.is_bound or not self.instance.pk or len(rows) < self.page_size:
+            return None
+        params = {'cursor': encode_cursor('next', [rows[-1].created_at, rows[-1].pk])}
+        if self.status_filter:
+            params[INLINE_STATUS_VAR] = self.status_filter
+        return f"{reverse('custom_admin:main_client_requests', args=[self.instance.pk])}?{urlencode(params)}"
+
+
 # Inline admin for editing ClientRequest directly on the Client admin page
-class ClientRequestInline(admin.TabularInline):
+class ClientRequestInline(PrimedAutocompleteMixin, admin.TabularInline):
     model = ClientRequest
+    formset = RecentClientRequestFormSet  # Only the most recent requests are rendered as forms
+    template = 'admin/main/client/recent_requests_inline.html'  # Adds status filter and "load more"
     extra = 1  # Number of extra blank forms to show
     fields = ('request_type', 'status', 'description', 'created_at')  # Fields shown in inline
     readonly_fields = ('created_at',)  # created_at is read-only
     show_change_link = True  # Show link to edit full ClientRequest object
-       
+    autocomplete_fields = ('request_type',)  # Search-as-you-type instead of a <select> of every type
+    recent_requests = 20  # Requests rendered as forms; older ones are fetched on demand
+
+    class Media:
+        js = ('js/client_requests_inline.js',)
+
+    # Join the related rows up front; the change link label is built from ClientRequest.__str__
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('client', 'request_type')
+
+    # Pass the page size and status filter to the formset class (a fresh class per request)
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_size = self.recent_requests
+        status_filter = request.GET.get(INLINE_STATUS_VAR)
+        formset.status_filter = status_filter if status_filter in dict(ClientRequest.STATUS_CHOICES) else None
+        formset.status_choices = [value for value, _ in ClientRequest.STATUS_CHOICES]
+        formset.status_var = INLINE_STATUS_VAR
+        return formset
+
 
 # Register Client table(model) with custom admin options
-class ClientAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'email', 'contact_number', 'company_url', 'created_at', 'is_active')  # Columns in list view
+class ClientAdmin(AutocompleteLookupMixin, KeysetPaginationMixin, RankedSearchMixin, admin.ModelAdmin):
+    list_display = (
+        'id', 'name', 'email', 'contact_number', 'company_url', 'created_at', 'is_active',
+        'pending_requests', 'in_progress_requests', 'completed_requests', 'last_request_at',
+    )  # Columns in list view; request counts come from the precomputed ClientStats row
+    list_select_related = ('stats',)  # Join the stats row in the changelist query itself
     search_fields = ('name', 'email', 'contact_number', 'company_url')  # Searchable fields
     list_filter = ('is_active', 'created_at')  # Filters on sidebar
     readonly_fields = ('created_at',)  # created_at cannot be edited
     ordering = ('-created_at',)  # Default ordering: newest first
+    autocomplete_filter = {'is_active': True}  # Autocomplete only offers active clients for new requests
     fieldsets = (
         (None, {
             'fields': ('name', 'email', 'contact_number', 'company_url', 'is_active')
@@ -52,17 +231,128 @@ class ClientAdmin(admin.ModelAdmin):
     
     inlines = [ClientRequestInline]  # Include the ClientRequest inline admin on Client detail page
 
+    # Workload columns read from ClientStats (maintained incrementally by main/stats.py),
+    # sortable through the indexed stats columns. Clients without a stats row show 0.
+    def client_stat(self, obj, field_name, default=0):
+        stats = getattr(obj, 'stats', None)  # Reverse one-to-one; absent until the client's stats row exists
+        return getattr(stats, field_name) if stats is not None else default
+
+    def pending_requests(self, obj):
+        return self.client_stat(obj, 'pending')
+    pending_requests.short_description = 'Pending'
+    pending_requests.admin_order_field = 'stats__pending'
+
+    def in_progress_requests(self, obj):
+        return self.client_stat(obj, 'in_progress')
+    in_progress_requests.short_description = 'In progress'
+    in_progress_requests.admin_order_field = 'stats__in_progress'
+
+    def completed_requests(self, obj):
+        return self.client_stat(obj, 'completed')
+    completed_requests.short_description = 'Completed'
+    completed_requests.admin_order_field = 'stats__completed'
+
+    def last_request_at(self, obj):
+        return self.client_stat(obj, 'last_request_at', default=None)
+    last_request_at.short_description = 'Last request'
+    last_request_at.admin_order_field = 'stats__last_request_at'
+    change_list_template = 'admin/main/client/change_list.html'  # Adds the "Import" button
+
+    # Add the bulk import page and the endpoint that serves older requests for the inline, page by page
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='main_client_import'),
+            path(
+                '<path:object_id>/requests/',
+                self.admin_site.admin_view(self.client_requests_view),
+                name='main_client_requests',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    # JSON endpoint returning the next page of a client's requests as rendered table rows.
+    # Pages by (created_at, id) keyset on the per-client index, so cost does not grow with history size.
+    def client_requests_view(self, request, object_id):
+        client = self.get_object(request, object_id)
+        if client is None:
+            raise Http404
+        request_admin = self.admin_site._registry.get(ClientRequest)
+        if request_admin is None or not request_admin.has_view_permission(request):
+            raise PermissionDenied
+        page_size = ClientRequestInline.recent_requests
+
+        queryset = ClientRequest.objects.filter(client=client).select_related('request_type')
+        status_filter = request.GET.get(INLINE_STATUS_VAR)
+        if status_filter in dict(ClientRequest.STATUS_CHOICES):
+            queryset = queryset.filter(status=status_filter)
+        if request.GET.get('cursor'):
+            try:
+                _, created_at, pk = decode_cursor(request.GET['cursor'])
+            except ValueError:
+                return JsonResponse({'error': 'Invalid cursor'}, status=400)
+            queryset = keyset_filter(queryset, 'created_at', True, created_at, pk)
+        rows = list(queryset.order_by('-created_at', '-pk')[:page_size + 1])
+
+        next_url = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            params = {'cursor': encode_cursor('next', [rows[-1].created_at, rows[-1].pk])}
+            if status_filter:
+                params[INLINE_STATUS_VAR] = status_filter
+            next_url = f'{request.path}?{urlencode(params)}'
+        html = render_to_string(
+            'admin/main/client/recent_requests_rows.html',
+            {'rows': rows, 'admin_site': self.admin_site.name},
+            request=request,
+        )
+        return JsonResponse({'html': html, 'next': next_url})
+
+    # Upload page for CSV/JSONL files of clients, request types or requests.
+    # The upload is streamed through main.importers in batches; bad rows are listed, not fatal.
+    # Uploads over JOBS_BACKGROUND_IMPORT_BYTES are queued as a job (main/jobs.py) instead.
+    def import_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        request.current_app = self.admin_site.name
+        form = DataImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            kind = form.cleaned_data['kind']
+            target_admin = self.admin_site._registry.get(IMPORTERS[kind].model)
+            if target_admin is None or not target_admin.has_add_permission(request):
+                raise PermissionDenied
+            upload = form.cleaned_data['file']
+            if upload.size > settings.JOBS_BACKGROUND_IMPORT_BYTES:
+                job = enqueue('import_file', {
+                    'kind': kind, 'file_format': form.file_format, 'dry_run': form.cleaned_data['dry_run'],
+                    'path': store_upload(upload),
+                }, user=request.user, max_attempts=1)
+                self.message_user(request, format_html(
+                    'The file was queued for import as {}; its progress and rejected rows are shown there.', job_link(job),
+                ))
+                return HttpResponseRedirect(request.get_full_path())
+            result = import_file(upload, kind, form.file_format, dry_run=form.cleaned_data['dry_run'])
+            self.message_user(request, result.summary(), messages.WARNING if result.error_count else messages.SUCCESS)
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import data',
+            'opts': self.opts,
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/main/import.html', context)
+
 # Register Client model with custom admin site and ClientAdmin options
 custom_admin_site.register(Client, ClientAdmin)
 
 # Admin customization for RequestType model
-class RequestTypeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'description')
+class RequestTypeAdmin(AutocompleteLookupMixin, RankedSearchMixin, admin.ModelAdmin):
+    list_display = ('id', 'name', 'description', 'sla_hours')
     search_fields = ('name',)
     ordering = ('name',)
     fieldsets = (
         (None, {
-            'fields': ('name',)  # Name is editable in main section
+            'fields': ('name', 'sla_hours')  # Name and SLA target are editable in main section
         }),
         ('Description', {
             'fields': ('description',),  # Description in collapsible section
@@ -70,15 +360,25 @@ class RequestTypeAdmin(admin.ModelAdmin):
         }),
     )
     
+
+    # A new SLA target applies to the type's open requests at once (one UPDATE over the open slice);
+    # closed ones and the breach flags follow on the next 'manage.py compute_sla'
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'sla_hours' in form.changed_data:
+            open_requests = ClientRequest.objects.filter(status__in=ClientRequest.OPEN_STATUSES)
+            sla.refresh_due_at(open_requests, {obj.pk: obj.sla_hours})
+
 # Register RequestType with the custom admin site
 custom_admin_site.register(RequestType, RequestTypeAdmin)
 
 # Factory function to create admin actions to update status of ClientRequest
 def make_status_action(status_value):
     def action(modeladmin, request, queryset):
-        now = timezone.now()
         # Update selected ClientRequest objects with new status and updated timestamp
-        updated_count = queryset.update(status=status_value, updated_at=now)
+        # (one UPDATE; set_status also moves the per-client counters in ClientStats and
+        # records the changes, made by this user, in the status history)
+        updated_count = queryset.set_status(status_value, user=request.user)
         # Show message to user confirming how many were updated
         modeladmin.message_user(request, f'{updated_count} requests marked as {status_value}.')
     # Set the function name and description for display in admin UI
@@ -87,13 +387,86 @@ def make_status_action(status_value):
     return action
 
 
+# SLA state of a request (main/sla.py). Overdue and due soon are due_at ranges over the partial
+# index of open requests; breached reads the sla_breached flag kept by 'manage.py compute_sla'.
+class SLAFilter(admin.SimpleListFilter):
+    title = 'SLA'
+    parameter_name = 'sla'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('overdue', 'Overdue'),
+            ('due_soon', f'Due within {sla.SLA_DUE_SOON_HOURS} hours'),
+            ('breached', 'Breached'),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'overdue':
+            return sla.overdue(queryset)
+        if self.value() == 'due_soon':
+            return sla.due_soon(queryset)
+        if self.value() == 'breached':
+            return queryset.filter(sla_breached=True)
+        return queryset
+
+
+# Read-only timeline of a request's status changes (main/history.py), oldest first, read
+# through the (request, changed_at, id) index with the users joined in
+class StatusHistoryInline(admin.TabularInline):
+    model = ClientRequestStatusChange
+    fields = ('changed_at', 'from_status', 'to_status', 'changed_by')
+    readonly_fields = fields
+    ordering = ('changed_at', 'id')
+    extra = 0
+    can_delete = False
+    verbose_name = 'status change'
+    verbose_name_plural = 'status history'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('changed_by')
+
+    # Whoever can see the request sees its history
+    def has_view_permission(self, request, obj=None):
+        opts = ClientRequest._meta
+        return any(
+            request.user.has_perm(f'{opts.app_label}.{action}_{opts.model_name}') for action in ('view', 'change')
+        )
+
+    # The history is append-only: written by the write paths, never edited here
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # Admin customization for ClientRequest model
-class ClientRequestAdmin(admin.ModelAdmin):
-    list_display = ('id', 'client_name', 'request_type_name', 'status', 'description','created_at', 'updated_at')
-    list_filter = ('status', 'created_at')
+class ClientRequestAdmin(BackgroundActionMixin, StreamingExportMixin, KeysetPaginationMixin, RankedSearchMixin, PrimedAutocompleteMixin, admin.ModelAdmin):
+    list_display = ('id', 'client_name', 'request_type_name', 'status', 'description','created_at', 'updated_at', 'due_at')
+    list_select_related = ('client', 'request_type')  # Fetch related names in the changelist query itself
+    list_filter = ('status', SLAFilter, 'created_at')
     search_fields = ('client__name', 'request_type__name')
-    readonly_fields = ('created_at', 'updated_at')
+    search_document_fields = ('description',)  # Long text: full-text searched under ADMIN_SEARCH_BACKEND='fulltext'
+    readonly_fields = ('created_at', 'updated_at', 'due_at', 'sla_breached')
     ordering = ('-created_at',)
+    autocomplete_fields = ('client', 'request_type')  # Search-as-you-type lookups via the admin autocomplete endpoint
+    change_list_template = 'admin/main/clientrequest/change_list.html'  # Adds the CSV/JSONL export buttons
+    inlines = (StatusHistoryInline,)  # Status timeline on the change page
+    # Export columns (name -> lookup); the names match the import_data columns, so exports re-import as-is
+    export_fields = {
+        'id': 'id',
+        'client': 'client__name',
+        'client_id': 'client_id',
+        'request_type': 'request_type__name',
+        'request_type_id': 'request_type_id',
+        'status': 'status',
+        'description': 'description',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
     fieldsets = (
         (None, {
             'fields': ('client', 'request_type', 'status')
@@ -106,6 +479,9 @@ class ClientRequestAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',),
         }),
+        ('SLA', {
+            'fields': ('due_at', 'sla_breached'),
+        }),
     )
     
     # Define admin actions using the status update factory function
@@ -113,9 +489,22 @@ class ClientRequestAdmin(admin.ModelAdmin):
         make_status_action('Pending'),
         make_status_action('In Progress'),
         make_status_action('Completed'),
+        make_export_action('csv'),
+        make_export_action('jsonl'),
     ]
+    # Status changes over a large "select all" run as a background job, a chunk at a time
+    background_actions = ('mark_as_pending', 'mark_as_in_progress', 'mark_as_completed')
     
-    # Display client name in list view by accessing related object
+    # The status history is display-only, so it is left out of the add form and of submitted forms
+    def get_inlines(self, request, obj):
+        return self.inlines if obj is not None and request.method != 'POST' else ()
+
+    # Change form, history and delete views all load the object through get_queryset,
+    # and ClientRequest.__str__ reads both related names, so join them here as well
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('client', 'request_type')
+
+    # Display client name in list view by accessing related object (joined via list_select_related)
     def client_name(self, obj):
         return obj.client.name
     client_name.short_description = 'Client'
@@ -124,10 +513,51 @@ class ClientRequestAdmin(admin.ModelAdmin):
     def request_type_name(self, obj):
         return obj.request_type.name
     request_type_name.short_description = 'Request Type'
+
+    # Live "requests changed" notice over server-sent events (main/events.py). Only under ASGI:
+    # a sync worker would be held by every open changelist for the length of the stream.
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        if settings.SERVER_INTERFACE == 'asgi':
+            extra_context['events_url'] = reverse('api_client_request_events')
+        return super().changelist_view(request, extra_context)
     
 # Register ClientRequest model with the custom admin site
 custom_admin_site.register(ClientRequest, ClientRequestAdmin)
 
+# Read-only view of the background job queue (main/jobs.py); failed jobs can be queued again
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    list_select_related = ('created_by',)
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'task', 'args', 'status', 'progress', 'attempts', 'max_attempts', 'run_after', 'message', 'result',
+        'error', 'worker', 'created_by', 'created_at', 'started_at', 'heartbeat_at', 'finished_at',
+    )
+    fields = readonly_fields
+    actions = ['retry_jobs']
+
+    def progress(self, obj):
+        if obj.progress_total:
+            return f'{obj.progress_done} / {obj.progress_total} ({obj.progress_done * 100 // obj.progress_total}%)'
+        return obj.progress_done or '-'
+
+    # Jobs are queued by the actions and pages that need them, not created by hand
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected failed jobs', permissions=['change'])
+    def retry_jobs(self, request, queryset):
+        # A retried job starts from its last checkpoint, with a fresh set of attempts
+        retried = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_after=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{retried} jobs queued again.')
+
+# Register Job with the custom admin site
+custom_admin_site.register(Job, JobAdmin)
+
 # Custom User admin: extending Django's default UserAdmin without modifications here
 class UsersAdmin(DefaultUserAdmin):
     # Inherit Django's built-in UserAdmin to get all user admin features.
@@ -0,0 +1,471 @@
+"""
+Versioned, read-only JSON API for integrations that would otherwise scrape the admin.
+
+    GET /api/v1/clients/            GET /api/v1/clients/<id>/
+    GET /api/v1/request-types/      GET /api/v1/request-types/<id>/
+    GET /api/v1/requests/           GET /api/v1/requests/<id>/
+    POST /api/v1/requests/batch/    create/update requests in bulk (main/batch.py)
+    GET /api/v1/requests/changes/   incremental sync: what changed since a cursor (main/changes.py)
+    GET /api/v1/requests/events/    creations and status changes as they happen (main/events.py)
+
+Lists take:
+
+    limit=<n>            page size (default 50, at most 500)
+    cursor=<token>       the "next" value of the previous page (keyset pagination, so every
+                         page costs the same however deep the integration reads)
+    fields=a,b,c         return only these fields
+    plus per-resource filters, e.g. /requests/?status=Pending,In Progress&client=4,9
+                         &created_after=2025-01-01&updated_after=2025-06-01T12:00:00Z
+
+Responses carry an ETag (and Last-Modified where the data has a change time), and requests
+with a matching If-None-Match / If-Modified-Since get an empty 304:
+
+- request lists are validated *before* being queried, from MAX(updated_at) over the table
+  (an index lookup) and the total from the per-client counters (ClientStats), which also
+  moves when requests are deleted. Any request change therefore invalidates every request
+  list, which keeps the check to two cheap queries. Deletions do not move Last-Modified, so
+  clients that need to notice them should send If-None-Match.
+- a single request is validated by its own updated_at
+- clients and request types have no change time, so their ETag is a hash of the body and
+  the 304 saves the transfer rather than the query
+
+Requests refer to their client and request type by id. The views are async and use the
+async ORM, so under ASGI a slow consumer does not hold a worker thread. Access uses the
+normal session login and needs the matching admin view permission.
+"""
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date, quote_etag
+
+from . import changes, events
+from .batch import BATCH_MAX_OPERATIONS, ClientRequestBatch
+from .models import Client, ClientRequest, ClientStats, RequestType
+from .pagination import CURSOR_VAR, decode_cursor_values, encode_cursor, keyset_filter
+from .views import auser
+
+API_VERSION = 'v1'
+API_DEFAULT_LIMIT = 50
+API_MAX_LIMIT = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(data, status=200):
+    body = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
+def api_error(message, status):
+    return json_response({'error': message}, status=status)
+
+
+def parse_ids(value):
+    try:
+        return [int(part) for part in value.split(',')]
+    except ValueError:
+        raise ApiError('Expected a comma-separated list of ids.')
+
+
+def parse_bool(value):
+    if value.lower() not in ('true', 'false', '1', '0'):
+        raise ApiError('Expected true or false.')
+    return value.lower() in ('true', '1')
+
+
+def parse_timestamp(value):
+    # ISO 8601 date or datetime; dates mean midnight and naive values the site's time zone
+    try:
+        moment = parse_datetime(value)
+        if moment is None and parse_date(value) is not None:
+            moment = parse_datetime(f'{value}T00:00:00')
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ApiError('Expected an ISO 8601 date or datetime.')
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def parse_statuses(value):
+    statuses = value.split(',')
+    unknown = set(statuses) - set(dict(ClientRequest.STATUS_CHOICES))
+    if unknown:
+        raise ApiError(f'Unknown status {sorted(unknown)[0]!r}.')
+    return statuses
+
+
+def etag_for(*parts):
+    # Strong validator for a representation; API_VERSION retires old ETags when the format changes
+    return quote_etag(hashlib.md5(':'.join([API_VERSION, *map(str, parts)]).encode()).hexdigest())
+
+
+def with_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Caches may keep the body but must ask again before using it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    # A 304 response when the client's copy is current, else None
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    return with_validators(response, etag, last_modified) if response is not None else None
+
+
+def conditional_json(request, data, validators=None):
+    # JSON response carrying validators already checked by the caller; without any, the ETag
+    # is a hash of the body and is checked here
+    response = json_response(data)
+    if validators is None:
+        validators = (quote_etag(hashlib.md5(response.content).hexdigest()),)
+        unchanged = not_modified(request, *validators)
+        if unchanged is not None:
+            return unchanged
+    return with_validators(response, *validators)
+
+
+async def check_permissions(request, perms):
+    # Returns an error response, or None when the session user is staff with all of perms
+    user = await auser(request)
+    if not user.is_authenticated:
+        return api_error('Authentication required.', 401)
+    if not user.is_staff or not await sync_to_async(user.has_perms)(perms):
+        return api_error('Permission denied.', 403)
+    return None
+
+
+# One API resource: which model fields are exposed, how lists are filtered and ordered.
+# Subclasses mirror the admin's permission and, for lists, an indexed (field, pk) ordering.
+class Resource:
+    model = None
+    permission = None
+    # API field name -> lookup passed to QuerySet.values()
+    fields = {}
+    # Query parameter -> (lookup, parser)
+    filters = {}
+    # Keyset ordering: a field and the primary key, both in the same direction
+    ordering = ('-created_at', '-pk')
+    # Fields always read for a single object, for detail_validators
+    validator_fields = ()
+
+    def queryset(self):
+        return self.model._default_manager.all()
+
+    async def check_access(self, request):
+        # Returns an error response, or None when the session user may read the data
+        if request.method != 'GET':
+            return api_error('Method not allowed.', 405)
+        return await check_permissions(request, [self.permission])
+
+    def selected_fields(self, request):
+        value = request.GET.get('fields')
+        if not value:
+            return list(self.fields)
+        selected = value.split(',')
+        unknown = [name for name in selected if name not in self.fields]
+        if unknown:
+            raise ApiError(f'Unknown field {unknown[0]!r}; choose from {", ".join(self.fields)}.')
+        return selected
+
+    def filter_queryset(self, queryset, request):
+        for param, (lookup, parse) in self.filters.items():
+            value = request.GET.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{lookup: parse(value)})
+                except ApiError as exc:
+                    raise ApiError(f'{param}: {exc}')
+        return queryset
+
+    def parse_limit(self, request):
+        try:
+            limit = int(request.GET.get('limit', API_DEFAULT_LIMIT))
+        except ValueError:
+            raise ApiError('limit must be an integer.')
+        if not 1 <= limit <= API_MAX_LIMIT:
+            raise ApiError(f'limit must be between 1 and {API_MAX_LIMIT}.')
+        return limit
+
+    def apply_cursor(self, queryset, token):
+        field_name = self.ordering[0].lstrip('-')
+        try:
+            direction, values = decode_cursor_values(token)
+            value, pk = values
+            if isinstance(self.model._meta.get_field(field_name), models.DateTimeField):
+                value = parse_datetime(value)
+            if direction != 'next' or value is None or not isinstance(pk, int):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ApiError('Invalid cursor.')
+        return keyset_filter(queryset, field_name, self.ordering[0].startswith('-'), value, pk)
+
+    def prepare_list(self, request):
+        # Everything that depends only on the query string, so bad requests fail before any query
+        fields = self.selected_fields(request)
+        limit = self.parse_limit(request)
+        queryset = self.filter_queryset(self.queryset(), request).order_by(*self.ordering)
+        if request.GET.get(CURSOR_VAR):
+            queryset = self.apply_cursor(queryset, request.GET[CURSOR_VAR])
+        # The keyset columns are always read, to build the next cursor
+        field_name = self.ordering[0].lstrip('-')
+        lookups = {name: self.fields[name] for name in fields}
+        queryset = queryset.values(*dict.fromkeys([*lookups.values(), field_name, 'pk']))
+        return fields, lookups, limit, queryset
+
+    def represent(self, row, lookups):
+        return {name: row[lookup] for name, lookup in lookups.items()}
+
+    def next_url(self, request, row):
+        field_name = self.ordering[0].lstrip('-')
+        params = request.GET.copy()
+        params[CURSOR_VAR] = encode_cursor('next', [row[field_name], row['pk']])
+        return f'{request.path}?{params.urlencode()}'
+
+    async def list_validators(self, request):
+        # (etag, last_modified) checked before the list is queried; None when the body is hashed instead
+        return None
+
+    async def list_view(self, request):
+        denied = await self.check_access(request)
+        if denied:
+            return denied
+        try:
+            fields, lookups, limit, queryset = self.prepare_list(request)
+        except ApiError as exc:
+            return api_error(str(exc), exc.status)
+
+        validators = await self.list_validators(request)
+        if validators:
+            response = not_modified(request, *validators)
+            if response is not None:
+                return response
+
+        # One extra row tells whether there is a next page
+        rows = [row async for row in queryset[:limit + 1]]
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        data = {
+            'results': [self.represent(row, lookups) for row in rows],
+            'next': self.next_url(request, rows[-1]) if has_next else None,
+        }
+        return conditional_json(request, data, validators)
+
+    async def detail_view(self, request, pk):
+        denied = await self.check_access(request)
+        if denied:
+            return denied
+        try:
+            lookups = {name: self.fields[name] for name in self.selected_fields(request)}
+        except ApiError as exc:
+            return api_error(str(exc), exc.status)
+        values = dict.fromkeys([*lookups.values(), *self.validator_fields, 'pk'])
+        try:
+            row = await self.queryset().values(*values).aget(pk=pk)
+        except self.model.DoesNotExist:
+            return api_error('Not found.', 404)
+
+        validators = self.detail_validators(row)
+        if validators is not None:
+            response = not_modified(request, *validators)
+            if response is not None:
+                return response
+        return conditional_json(request, self.represent(row, lookups), validators)
+
+    def detail_validators(self, row):
+        # (etag, last_modified) for one object; None when the body is hashed instead
+        return None
+
+
+class ClientResource(Resource):
+    model = Client
+    permission = 'main.view_client'
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'email': 'email',
+        'contact_number': 'contact_number',
+        'company_url': 'company_url',
+        'is_active': 'is_active',
+        'created_at': 'created_at',
+    }
+    filters = {
+        'is_active': ('is_active', parse_bool),
+        'created_after': ('created_at__gte', parse_timestamp),
+        'created_before': ('created_at__lt', parse_timestamp),
+    }
+
+
+class RequestTypeResource(Resource):
+    model = RequestType
+    permission = 'main.view_requesttype'
+    fields = {'id': 'id', 'name': 'name', 'description': 'description'}
+    ordering = ('name', 'pk')
+
+
+class ClientRequestResource(Resource):
+    model = ClientRequest
+    permission = 'main.view_clientrequest'
+    fields = {
+        'id': 'id',
+        'client': 'client_id',
+        'request_type': 'request_type_id',
+        'status': 'status',
+        'description': 'description',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    filters = {
+        'status': ('status__in', parse_statuses),
+        'client': ('client_id__in', parse_ids),
+        'request_type': ('request_type_id__in', parse_ids),
+        'created_after': ('created_at__gte', parse_timestamp),
+        'created_before': ('created_at__lt', parse_timestamp),
+        'updated_after': ('updated_at__gte', parse_timestamp),
+        'updated_before': ('updated_at__lt', parse_timestamp),
+    }
+
+    async def list_validators(self, request):
+        last = await ClientRequest.objects.aaggregate(last=models.Max('updated_at'))
+        total = await ClientStats.objects.aaggregate(
+            total=models.Sum(models.F('pending') + models.F('in_progress') + models.F('completed'))
+        )
+        last_modified = last['last']
+        return etag_for(last_modified.isoformat() if last_modified else '', total['total'] or 0), last_modified
+
+    validator_fields = ('updated_at',)
+
+    def detail_validators(self, row):
+        return etag_for(row['pk'], row['updated_at'].isoformat()), row['updated_at']
+
+
+clients = ClientResource()
+request_types = RequestTypeResource()
+client_requests = ClientRequestResource()
+
+
+async def client_request_batch(request):
+    # Writes need the same permissions as the admin: add for creates, change for updates.
+    # Session-authenticated, so POSTs carry the CSRF token (X-CSRFToken header) like the admin's.
+    if request.method != 'POST':
+        return api_error('Method not allowed.', 405)
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return api_error('The body must be JSON.', 400)
+    operations = payload.get('operations') if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return api_error('Expected {"operations": [...]} with at least one operation.', 400)
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return api_error(f'At most {BATCH_MAX_OPERATIONS} operations per batch.', 400)
+    partial = payload.get('partial', False)
+    if not isinstance(partial, bool):
+        return api_error('partial must be true or false.', 400)
+
+    kinds = {item.get('op') for item in operations if isinstance(item, dict)}
+    perms = [perm for op, perm in (('create', 'main.add_clientrequest'), ('update', 'main.change_clientrequest')) if op in kinds]
+    denied = await check_permissions(request, perms or ['main.change_clientrequest'])
+    if denied:
+        return denied
+
+    # check_permissions() has loaded request.user
+    batch = ClientRequestBatch(partial=partial, user=request.user)
+    written, results = await sync_to_async(batch.apply)(operations)
+    counts = {status: sum(result.get('status') == status for result in results) for status in ('created', 'updated', 'invalid')}
+    # An all-or-nothing batch that was rejected is a client error; partial batches report per operation
+    rejected = not written and counts['invalid'] > 0
+    return json_response({'written': written, **counts, 'results': results}, status=400 if rejected else 200)
+
+
+async def client_request_changes(request):
+    # Takes cursor (the "next" of the previous call), limit and fields like the request list
+    denied = await client_requests.check_access(request)
+    if denied:
+        return denied
+    try:
+        fields = client_requests.selected_fields(request)
+        limit = client_requests.parse_limit(request)
+        cursor = changes.start_cursor(request.GET.get(CURSOR_VAR))
+    except ApiError as exc:
+        return api_error(str(exc), exc.status)
+    except changes.CursorExpired as exc:
+        return api_error(str(exc), 410)
+    except (TypeError, ValueError):
+        return api_error('Invalid cursor.', 400)
+
+    lookups = {name: client_requests.fields[name] for name in fields}
+    changed, deleted, next_cursor, has_more = await changes.read_feed(cursor, limit, list(lookups.values()))
+    return json_response({
+        'changes': [client_requests.represent(row, lookups) for row in changed],
+        'deleted': [changes.represent_tombstone(row) for row in deleted],
+        'next': next_cursor.encode(),
+        'has_more': has_more,
+    })
+
+
+def sse_message(event):
+    return f'event: {event["type"]}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def event_stream(broker, subscription):
+    # Server-sent events until EVENTS_STREAM_SECONDS have passed; the browser then reconnects
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + events.EVENTS_STREAM_SECONDS
+    try:
+        # Tell EventSource how soon to reconnect after the stream ends
+        yield 'retry: 3000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            event = await subscription.get(min(remaining, events.EVENTS_KEEPALIVE_SECONDS))
+            yield sse_message(event) if event is not None else ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def client_request_events(request):
+    # Event stream for Accept: text/event-stream, otherwise a long poll that waits up to
+    # ?timeout= seconds for the next events
+    denied = await client_requests.check_access(request)
+    if denied:
+        return denied
+    streaming = 'text/event-stream' in request.headers.get('Accept', '')
+    try:
+        timeout = float(request.GET.get('timeout', events.EVENTS_LONG_POLL_SECONDS))
+    except ValueError:
+        return api_error('timeout must be a number of seconds.', 400)
+    if not 0 <= timeout <= events.EVENTS_LONG_POLL_MAX_SECONDS:
+        return api_error(f'timeout must be between 0 and {events.EVENTS_LONG_POLL_MAX_SECONDS}.', 400)
+
+    if streaming and not isinstance(request, ASGIRequest):
+        # Under WSGI Django buffers an async stream whole: the client would get nothing until
+        # EVENTS_STREAM_SECONDS had passed, while the stream held a worker thread
+        return api_error('Event streams need the ASGI server (SERVER_INTERFACE=asgi); use the long poll.', 501)
+
+    broker = events.get_broker()
+    subscription = broker.subscribe()
+    if streaming:
+        response = StreamingHttpResponse(event_stream(broker, subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    try:
+        event = await subscription.get(timeout)
+        received = [event, *subscription.drain()] if event is not None else []
+    finally:
+        broker.unsubscribe(subscription)
+    return json_response({'events': received})
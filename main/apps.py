@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     # Use BigAutoField by default for model primary keys
     default_auto_field = "django.db.models.BigAutoField"
-    name = "main"
\ No newline at end of file
+    name = "main"
+
+    def ready(self):
+        # Connect the receivers that keep ClientStats and the auth cache in step with changes
+        from . import signals  # noqa: F401
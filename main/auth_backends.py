@@ -0,0 +1,89 @@
+"""
+Authentication backend that caches each user's row and permission set.
+
+With the stock ModelBackend every authenticated admin request loads the user, and the first
+permission check loads the user's own and group permissions; the admin checks permissions
+on every page. CachedModelBackend serves both from the cache:
+
+    auth:user:<generation>:<id>    the User instance (as loaded by get_user)
+    auth:perms:<generation>:<id>   the set of "app_label.codename" strings for the user
+
+Invalidation (receivers in main/signals.py):
+- saving or deleting a user, or changing their groups or direct permissions, deletes that
+  user's entries
+- changing a group's permissions (e.g. create_limited_user_group) or deleting a group or
+  permission bumps the generation, which retires every user's entries at once
+
+Entries also expire after AUTH_CACHE_SECONDS. Invalidation only reaches the processes sharing
+the cache, so the settings enable this backend with CACHE_BACKEND=redis only.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+GENERATION_KEY = 'auth:generation'
+
+
+def auth_cache_timeout():
+    return getattr(settings, 'AUTH_CACHE_SECONDS', 300)
+
+
+def generation():
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        # Start from the clock, so a generation key lost to eviction never restarts at a value
+        # whose entries may still be cached; add() makes concurrent first requests agree
+        cache.add(GENERATION_KEY, int(time.time()), None)
+        value = cache.get(GENERATION_KEY, 0)
+    return value
+
+
+def user_key(user_id, gen):
+    return f'auth:user:{gen}:{user_id}'
+
+
+def perms_key(user_id, gen):
+    return f'auth:perms:{gen}:{user_id}'
+
+
+def invalidate_user(user_id):
+    gen = generation()
+    cache.delete_many([user_key(user_id, gen), perms_key(user_id, gen)])
+
+
+def invalidate_all_users():
+    # Retire every cached user and permission set; the old entries simply expire
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Not set yet (or evicted): the next generation() call starts a fresh one
+        pass
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id, generation())
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, auth_cache_timeout())
+        # is_active is re-checked as ModelBackend does, on the cached copy
+        return user if self.user_can_authenticate(user) else None
+
+    def get_all_permissions(self, user_obj, obj=None):
+        # Object permissions and anonymous/inactive users keep the stock behaviour
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return super().get_all_permissions(user_obj, obj)
+        if not hasattr(user_obj, '_perm_cache'):
+            key = perms_key(user_obj.pk, generation())
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, auth_cache_timeout())
+            # ModelBackend keeps the per-request copy here too
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
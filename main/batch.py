@@ -0,0 +1,191 @@
+"""
+Batched create/update of ClientRequests, behind POST /api/v1/requests/batch/.
+
+An upstream system sends up to BATCH_MAX_OPERATIONS operations at a time:
+
+    {"operations": [
+        {"op": "create", "client": 12, "request_type": "Plugin Updates", "description": "..."},
+        {"op": "update", "id": 345, "status": "Completed"}
+     ],
+     "partial": false}
+
+client and request_type take an id or an exact name (as in the file import). However many
+operations there are, a batch costs a fixed number of queries:
+
+- the clients and request types of all operations, one query per model (RelatedLookup,
+  shared with main/importers.py)
+- the rows being updated, one query, locked with SELECT ... FOR UPDATE until the batch is written
+- one bulk_create, and one bulk_update (in chunks of BATCH_UPDATE_SIZE rows) per distinct set
+  of fields the update operations change, so no row is rewritten with values it was not sent,
+  with the ClientStats counters moved and the status history written per batch (main/stats.py,
+  main/history.py), all inside one transaction; the creations and status changes are
+  published once it commits (main/events.py)
+
+Every operation is validated with the model's field validation before anything is written.
+By default a batch is all-or-nothing: one invalid operation and nothing is written. With
+"partial": true the valid operations are written and the invalid ones reported.
+"""
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from . import events, history, sla
+from .importers import ClientRequestImporter
+from .models import ClientRequest
+from .stats import record_created, record_updated
+
+BATCH_MAX_OPERATIONS = 1000
+BATCH_UPDATE_SIZE = 500
+OPERATION_KEYS = {'op', 'id', 'client', 'request_type', 'status', 'description', 'created_at'}
+
+
+def error_dict(exc):
+    return exc.message_dict if hasattr(exc, 'error_dict') else {'__all__': exc.messages}
+
+
+def operation_row(item):
+    # The importer reads related ids from '<field>_id' and names from '<field>'
+    row = {key: value for key, value in item.items() if key not in ('op', 'id')}
+    for field_name in ('client', 'request_type'):
+        if isinstance(row.get(field_name), int):
+            row[f'{field_name}_id'] = row.pop(field_name)
+    return row
+
+
+class ClientRequestBatch(ClientRequestImporter):
+    def __init__(self, partial=False, user=None):
+        super().__init__(batch_size=BATCH_MAX_OPERATIONS)
+        self.partial = partial
+        # Recorded as changed_by in the status history (main/history.py)
+        self.user = user
+
+    def check_operation(self, item):
+        if not isinstance(item, dict) or item.get('op') not in ('create', 'update'):
+            raise ValidationError({'op': ["Expected 'create' or 'update'."]})
+        errors = {key: ['Unknown field.'] for key in sorted(set(item) - OPERATION_KEYS)}
+        if item['op'] == 'create' and 'id' in item:
+            errors['id'] = ['Ids are assigned on create.']
+        if item['op'] == 'update' and not isinstance(item.get('id'), int):
+            errors['id'] = ['An integer id is required.']
+        if errors:
+            raise ValidationError(errors)
+
+    def build_update(self, instance, row):
+        # Apply the given fields to a loaded row and validate it like build() does a new one
+        changed = set()
+        for field_name in self.fields:
+            if field_name in row:
+                setattr(instance, field_name, row[field_name])
+                changed.add(field_name)
+        errors = {}
+        for field_name, lookup in self.lookups.items():
+            if field_name in row or f'{field_name}_id' in row:
+                try:
+                    name, pk = self.related_keys(row, field_name)
+                    setattr(instance, f'{field_name}_id', lookup.resolve(name, pk))
+                    changed.add(field_name)
+                except ValidationError as exc:
+                    errors.update(exc.error_dict if hasattr(exc, 'error_dict') else {field_name: exc.error_list})
+        try:
+            instance.full_clean(exclude=list(self.lookups), validate_unique=False)
+        except ValidationError as exc:
+            errors = exc.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
+        return changed
+
+    def apply(self, operations):
+        # Validate and write a list of operations; returns (written, one result dict per operation)
+        results = [{'index': index} for index in range(len(operations))]
+        checked = []
+        for result, item in zip(results, operations):
+            try:
+                self.check_operation(item)
+            except ValidationError as exc:
+                result.update(status='invalid', errors=error_dict(exc))
+                continue
+            result['op'] = item['op']
+            checked.append((result, item, operation_row(item)))
+
+        self.prime_lookups([row for _, _, row in checked])
+        # The rows to update are locked (in pk order, so concurrent batches cannot deadlock) from
+        # the moment they are read until the batch is written or rejected: a concurrent edit can
+        # neither be overwritten with stale values nor leave the stats and history deltas stale
+        with transaction.atomic():
+            return self.apply_checked(results, checked)
+
+    def apply_checked(self, results, checked):
+        update_ids = [item['id'] for _, item, _ in checked if item['op'] == 'update']
+        existing = {
+            instance.pk: instance
+            for instance in ClientRequest.objects.select_for_update().filter(pk__in=update_ids).order_by('pk')
+        } if update_ids else {}
+
+        creates, updates, seen = [], [], set()
+        for result, item, row in checked:
+            try:
+                if item['op'] == 'create':
+                    creates.append((result, self.build(row)))
+                    continue
+                if item['id'] in seen:
+                    raise ValidationError({'id': ['Updated more than once in this batch.']})
+                seen.add(item['id'])
+                instance = existing.get(item['id'])
+                if instance is None:
+                    raise ValidationError({'id': [f"No client request with id {item['id']}."]})
+                updates.append((result, instance, self.build_update(instance, row)))
+            except ValidationError as exc:
+                result.update(status='invalid', errors=error_dict(exc))
+
+        valid = creates + [(result, instance) for result, instance, _ in updates]
+        if not self.partial and len(valid) < len(results):
+            for result, _ in valid:
+                result['status'] = 'valid'
+            return False, results
+        if not valid:
+            return False, results
+        try:
+            self.write([instance for _, instance in creates], [(instance, fields) for _, instance, fields in updates])
+        except DatabaseError as exc:
+            # Validation should catch bad operations first; if the database still refuses, none are written
+            for result, _ in valid:
+                result.update(status='invalid', errors={'__all__': [f'Batch rejected by the database: {exc}']})
+            return False, results
+        for result, instance in valid:
+            result.update(status='created' if result['op'] == 'create' else 'updated', id=instance.pk)
+        return True, results
+
+    def write(self, creates, updates):
+        # updates: (instance, names of the fields its operation changed) pairs
+        with transaction.atomic():
+            if creates:
+                sla.assign_due_at(creates, self.sla_targets())
+                ClientRequest.objects.bulk_create(creates)
+                record_created(creates)
+                history.record_created(creates, user=self.user)
+                events.publish(events.created_events(creates))
+            if updates:
+                # bulk_update skips save(), so auto_now is stamped here
+                now = timezone.now()
+                for instance, _ in updates:
+                    instance.updated_at = now
+                # Each row is written with only the fields its own operation changed, so an operation
+                # that sets status leaves the description another writer may have changed alone:
+                # one bulk_update per distinct set of fields
+                groups = {}
+                for instance, fields in updates:
+                    groups.setdefault(frozenset(fields), []).append(instance)
+                for fields, instances in groups.items():
+                    # as is the SLA due date, when what it derives from changed
+                    if fields & {'request_type', 'created_at'}:
+                        sla.assign_due_at(instances, self.sla_targets())
+                        fields = fields | {'due_at'}
+                    ClientRequest.objects.bulk_update(
+                        instances, fields=[*sorted(fields), 'updated_at'], batch_size=BATCH_UPDATE_SIZE,
+                    )
+                instances = [instance for instance, _ in updates]
+                record_updated(instances)
+                history.record_updated(instances, user=self.user)
+                events.publish(events.updated_events(instances))
+        for instance, _ in updates:
+            instance._stats_state = instance.stats_state()
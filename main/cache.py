@@ -0,0 +1,212 @@
+"""
+Instrumented cache backends and the data behind the admin cache-health page.
+
+settings.CACHES picks one of these with the CACHE_BACKEND environment variable:
+
+    locmem   InstrumentedLocMemCache     per-process memory (default; no setup)
+    file     InstrumentedFileBasedCache  shared by all workers on one host, under CACHE_DIR
+    redis    InstrumentedRedisCache      any Redis-protocol server at CACHE_URL (Redis, Valkey,
+                                         KeyDB, ... a local container stands in during development)
+    dummy    InstrumentedDummyCache      caches nothing (useful to measure uncached behaviour)
+
+Each backend counts hits and misses of get/get_many/get_or_set. Counters are per process
+(and shared by the threads of that process), so with several workers each one reports its
+own traffic; Redis additionally reports the server-wide keyspace hits and misses. The same
+lookups are counted per alias in the Prometheus metrics (main/metrics.py), which are merged
+across workers.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+_MISSING = object()
+
+
+class CacheStats:
+    # Hit/miss counters for one cache alias, shared by every thread in the process
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.since = time.time()
+
+    def record(self, hits=0, misses=0):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_cache_stats(name):
+    # Cache backends are instantiated per thread, so counters live in a module-level registry
+    with _stats_lock:
+        return _stats.setdefault(name, CacheStats())
+
+
+def cache_alias(location, params):
+    # The CACHES alias configured with this location and options; backends are not told their alias
+    for alias, config in settings.CACHES.items():
+        if config.get('LOCATION', '') == location and config.get('KEY_PREFIX', '') == params.get('KEY_PREFIX', ''):
+            return alias
+    return 'unknown'
+
+
+class InstrumentedCacheMixin:
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self.location = location
+        # Keyed by key prefix as well: the default and sessions aliases share a Redis or file
+        # location and are told apart by their prefixes only
+        self.stats = get_cache_stats(f"{type(self).__name__}:{location}:{params.get('KEY_PREFIX', '')}")
+        self.alias = cache_alias(location, params)
+        self._suspended = 0
+
+    @contextmanager
+    def uncounted(self):
+        # BaseCache implements get_many/get_or_set on top of get(); count only the outer call.
+        # Backend instances are per thread, so a plain attribute is enough.
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    def record(self, hits=0, misses=0):
+        if not self._suspended:
+            self.stats.record(hits=hits, misses=misses)
+            if settings.METRICS_ENABLED:
+                from . import metrics
+
+                metrics.observe_cache(self.alias, hits, misses)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            self.record(misses=1)
+            return default
+        self.record(hits=1)
+        return value
+
+    def get_uncounted(self, key, default=None, version=None):
+        # For health probes, which should not skew the figures they report
+        return super().get(key, default, version)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with self.uncounted():
+            found = super().get_many(keys, version)
+        self.record(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        with self.uncounted():
+            return super().get_or_set(key, default, timeout=timeout, version=version)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
+
+
+class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+    def server_stats(self):
+        # Server-wide counters from INFO (all clients and workers, since the server started)
+        info = self._cache.get_client(write=False).info('stats')
+        return {'keyspace_hits': info.get('keyspace_hits'), 'keyspace_misses': info.get('keyspace_misses')}
+
+
+class InstrumentedDummyCache(InstrumentedCacheMixin, DummyCache):
+    pass
+
+
+def redact_location(location):
+    # Hide credentials in cache URLs (redis://:password@host) before showing them
+    locations = location if isinstance(location, (list, tuple)) else [location]
+    redacted = []
+    for value in locations:
+        parts = urlsplit(str(value))
+        if parts.password:
+            netloc = f'{parts.username or ""}:***@{parts.hostname}' + (f':{parts.port}' if parts.port else '')
+            value = urlunsplit(parts._replace(netloc=netloc))
+        redacted.append(str(value))
+    return ', '.join(redacted)
+
+
+def probe(cache):
+    # Round-trip a throwaway key; returns (ok, milliseconds, error message)
+    key = f'cache-health-probe:{threading.get_ident()}'
+    started = time.perf_counter()
+    get = getattr(cache, 'get_uncounted', cache.get)
+    try:
+        cache.set(key, 'ok', 10)
+        ok = get(key) == 'ok'
+        cache.delete(key)
+    except Exception as exc:  # Any backend/network error is a health result, not a page error
+        return False, None, f'{type(exc).__name__}: {exc}'
+    return ok, (time.perf_counter() - started) * 1000, None if ok else 'Value written was not read back'
+
+
+def cache_health():
+    # One entry per configured cache alias for the admin cache-health page
+    report = []
+    for alias, config in settings.CACHES.items():
+        cache = caches[alias]
+        stats = getattr(cache, 'stats', None)
+        if isinstance(cache, DummyCache):
+            ok, latency_ms, error = None, None, 'Dummy cache: nothing is stored'
+        else:
+            ok, latency_ms, error = probe(cache)
+        entry = {
+            'alias': alias,
+            'backend': config.get('BACKEND', ''),
+            'location': redact_location(config.get('LOCATION', '')),
+            'key_prefix': cache.key_prefix,
+            'version': cache.version,
+            'default_timeout': cache.default_timeout,
+            'ok': ok,
+            'latency_ms': latency_ms,
+            'error': error,
+            'stats': stats,
+            'server_stats': None,
+        }
+        if ok and hasattr(cache, 'server_stats'):
+            try:
+                entry['server_stats'] = cache.server_stats()
+            except Exception as exc:
+                entry['error'] = f'INFO failed: {exc}'
+        report.append(entry)
+    return report
+
+
+def reset_cache_stats():
+    for alias in settings.CACHES:
+        stats = getattr(caches[alias], 'stats', None)
+        if stats is not None:
+            stats.reset()
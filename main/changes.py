@@ -0,0 +1,142 @@
+"""
+Change feed for incremental sync of ClientRequests: GET /api/v1/requests/changes/.
+
+A consumer keeps one opaque cursor and each call returns what happened after it:
+
+    {"changes": [...],   requests created or updated, oldest first, in (updated_at, id) order
+                         (the clientreq_updated_idx index; every write path stamps updated_at,
+                         including the bulk status actions and the batch API)
+     "deleted": [...],   requests deleted, as {"id", "client", "deleted_at"}, from the
+                         ClientRequestTombstone rows written by every delete path
+     "next": "...",      the cursor for the next call
+     "has_more": false}  true when a page was full, so call again straight away
+
+so keeping a copy in sync costs O(changes) instead of re-reading the table. Apply "changes"
+before "deleted". The first call, without a cursor, walks the whole table in pages; deletions
+from before that first call are skipped, since the consumer never saw those rows.
+
+Two things stop the feed from skipping rows:
+
+- rows are only served once they are CHANGE_FEED_LAG_SECONDS old. updated_at is stamped
+  before the writing transaction commits, so a slow transaction can publish a row with a
+  timestamp older than rows already served; the lag gives it time to commit.
+- tombstones are kept for CHANGE_FEED_TOMBSTONE_DAYS ('manage.py prune_tombstones'). A
+  cursor last used before that may have missed deletions, so it gets 410 Gone and the
+  consumer must start again without a cursor.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ClientRequest, ClientRequestTombstone
+from .pagination import decode_cursor_values, encode_cursor, keyset_filter
+
+CHANGE_FEED_TOMBSTONE_FIELDS = ('pk', 'request_id', 'client_id', 'deleted_at')
+
+
+def record_tombstones(queryset):
+    # Tombstones for the rows of a ClientRequest queryset about to be deleted, written with one
+    # INSERT ... SELECT so that deleting many rows never loads them into Python
+    connection = connections[queryset.db]
+    select_sql, params = queryset.order_by().values_list('pk', 'client_id').query.sql_with_params()
+    table = connection.ops.quote_name(ClientRequestTombstone._meta.db_table)
+    deleted_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (deleted_at, request_id, client_id) SELECT %s, deleting.* FROM ({select_sql}) deleting',
+            [deleted_at, *params],
+        )
+
+
+def prune_tombstones(before, batch_size=10000, using='default'):
+    # Delete tombstones older than `before` a batch at a time; returns the number deleted
+    deleted = 0
+    tombstones = ClientRequestTombstone.objects.using(using)
+    while True:
+        batch = list(tombstones.filter(deleted_at__lt=before).order_by('deleted_at', 'pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += tombstones.filter(pk__in=batch).delete()[0]
+
+
+class CursorExpired(Exception):
+    pass
+
+
+# Position in both streams: the last change and tombstone served, and the horizon read up to
+class FeedCursor:
+    def __init__(self, horizon, changed_at=None, change_id=0, deleted_at=None, tombstone_id=0):
+        self.horizon = horizon
+        self.changed_at = changed_at
+        self.change_id = change_id
+        # A new consumer never saw the rows deleted before it started
+        self.deleted_at = deleted_at or horizon
+        self.tombstone_id = tombstone_id
+
+    @classmethod
+    def decode(cls, token):
+        # Raises ValueError for anything malformed
+        _, values = decode_cursor_values(token)
+        if len(values) != 5 or not all(isinstance(pk, int) for pk in values[2::2]):
+            raise ValueError('Invalid cursor')
+        horizon, changed_at, change_id, deleted_at, tombstone_id = values
+        horizon, deleted_at = parse_datetime(horizon), parse_datetime(deleted_at)
+        changed_at = parse_datetime(changed_at) if changed_at is not None else None
+        if horizon is None or deleted_at is None:
+            raise ValueError('Invalid cursor')
+        return cls(horizon, changed_at, change_id, deleted_at, tombstone_id)
+
+    def encode(self):
+        return encode_cursor('next', [self.horizon, self.changed_at, self.change_id, self.deleted_at, self.tombstone_id])
+
+
+def feed_horizon(now=None):
+    # Newest change time the feed serves; later rows may still belong to uncommitted transactions
+    return (now or timezone.now()) - timedelta(seconds=settings.CHANGE_FEED_LAG_SECONDS)
+
+
+def start_cursor(token):
+    # The cursor for a call: decoded from the token, or a new one; raises ValueError or CursorExpired
+    now = timezone.now()
+    if not token:
+        return FeedCursor(feed_horizon(now))
+    cursor = FeedCursor.decode(token)
+    if cursor.horizon < now - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS):
+        raise CursorExpired('Cursor is older than the tombstone retention; sync again without a cursor.')
+    return cursor
+
+
+async def read_feed(cursor, limit, fields):
+    # (changes, tombstones, next cursor, has_more) after cursor, up to limit rows of each;
+    # changes are values() rows with `fields` plus the keyset columns
+    horizon = feed_horizon()
+    changes = ClientRequest.objects.filter(updated_at__lte=horizon).order_by('updated_at', 'pk')
+    if cursor.changed_at is not None:
+        changes = keyset_filter(changes, 'updated_at', False, cursor.changed_at, cursor.change_id)
+    tombstones = keyset_filter(
+        ClientRequestTombstone.objects.filter(deleted_at__lte=horizon).order_by('deleted_at', 'pk'),
+        'deleted_at', False, cursor.deleted_at, cursor.tombstone_id,
+    )
+    # Changes are read first: a row deleted in between then shows up as a tombstone rather than not at all
+    changed = [row async for row in changes.values(*dict.fromkeys([*fields, 'updated_at', 'pk']))[:limit + 1]]
+    deleted = [row async for row in tombstones.values(*CHANGE_FEED_TOMBSTONE_FIELDS)[:limit + 1]]
+    more_deleted = len(deleted) > limit
+    has_more = len(changed) > limit or more_deleted
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    next_cursor = FeedCursor(horizon, cursor.changed_at, cursor.change_id, cursor.deleted_at, cursor.tombstone_id)
+    if changed:
+        next_cursor.changed_at, next_cursor.change_id = changed[-1]['updated_at'], changed[-1]['pk']
+    if deleted:
+        next_cursor.deleted_at, next_cursor.tombstone_id = deleted[-1]['deleted_at'], deleted[-1]['pk']
+    # Until every tombstone up to the new horizon has been served, the retention check keeps the old one
+    if more_deleted:
+        next_cursor.horizon = cursor.horizon
+    return changed, deleted, next_cursor, has_more
+
+
+def represent_tombstone(row):
+    return {'id': row['request_id'], 'client': row['client_id'], 'deleted_at': row['deleted_at']}
@@ -0,0 +1,130 @@
+"""
+Operations dashboard shown on the custom admin index.
+
+Each figure is one grouped aggregate, chosen so the database can answer it from an index:
+
+    status totals        sums over ClientStats (one row per client), not a ClientRequest scan
+    by request type      one GROUP BY request_type over ClientRequest with per-status counts
+    open request ageing  one conditional-count aggregate over the partial open-requests index
+    daily throughput     created per day (created_at index range) and completed per day, from
+                         the status history ((to_status, changed_at) index range, main/history.py)
+                         for the last DASHBOARD_DAYS days
+
+The result is cached for ADMIN_DASHBOARD_CACHE_SECONDS. When it goes stale, the first
+request to notice takes a short lock and recomputes while everyone else keeps being served
+the previous figures, so staff landing on the index after the cache expires do not all
+re-run the aggregates at once.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import history
+from .models import ClientRequest, ClientStats, RequestType
+
+DASHBOARD_CACHE_KEY = 'admin-dashboard'
+DASHBOARD_DAYS = 14
+
+# Ageing buckets for open requests: (label, minimum age, maximum age)
+AGE_BUCKETS = [
+    ('Under 1 day', None, timedelta(days=1)),
+    ('1-7 days', timedelta(days=1), timedelta(days=7)),
+    ('7-30 days', timedelta(days=7), timedelta(days=30)),
+    ('Over 30 days', timedelta(days=30), None),
+]
+
+
+def status_totals():
+    # Summing the per-client counters reads one small row per client
+    totals = ClientStats.objects.aggregate(
+        pending=models.Sum('pending'),
+        in_progress=models.Sum('in_progress'),
+        completed=models.Sum('completed'),
+    )
+    return [
+        ('Pending', totals['pending'] or 0),
+        ('In Progress', totals['in_progress'] or 0),
+        ('Completed', totals['completed'] or 0),
+    ]
+
+
+def request_type_totals():
+    rows = (
+        ClientRequest.objects.values('request_type_id')
+        .annotate(
+            total=models.Count('pk'),
+            open=models.Count('pk', filter=models.Q(status__in=ClientRequest.OPEN_STATUSES)),
+        )
+        .order_by()
+    )
+    rows = {row['request_type_id']: row for row in rows}
+    names = dict(RequestType.objects.filter(pk__in=rows).values_list('pk', 'name'))
+    return sorted(
+        ({'name': names.get(pk, pk), 'total': row['total'], 'open': row['open']} for pk, row in rows.items()),
+        key=lambda row: -row['total'],
+    )
+
+
+def open_request_ageing(now):
+    buckets = {}
+    for i, (_, min_age, max_age) in enumerate(AGE_BUCKETS):
+        condition = models.Q()
+        if min_age is not None:
+            condition &= models.Q(created_at__lte=now - min_age)
+        if max_age is not None:
+            condition &= models.Q(created_at__gt=now - max_age)
+        buckets[f'bucket_{i}'] = models.Count('pk', filter=condition)
+    counts = ClientRequest.objects.filter(status__in=ClientRequest.OPEN_STATUSES).aggregate(**buckets)
+    return [(label, counts[f'bucket_{i}']) for i, (label, _, _) in enumerate(AGE_BUCKETS)]
+
+
+def daily_throughput(now):
+    since = (now - timedelta(days=DASHBOARD_DAYS - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def per_day(queryset, field_name):
+        rows = (
+            queryset.filter(**{f'{field_name}__gte': since})
+            .annotate(day=TruncDate(field_name))
+            .values('day')
+            .annotate(count=models.Count('pk'))
+            .order_by()
+        )
+        return {row['day']: row['count'] for row in rows}
+
+    created = per_day(ClientRequest.objects.all(), 'created_at')
+    # When requests became Completed, which later edits (unlike updated_at) do not move
+    completed = history.changes_per_day('Completed', DASHBOARD_DAYS, now=now)
+    days = [(since + timedelta(days=i)).date() for i in range(DASHBOARD_DAYS)]
+    return [{'day': day, 'created': created.get(day, 0), 'completed': completed.get(day, 0)} for day in days]
+
+
+def compute_dashboard():
+    now = timezone.now()
+    return {
+        'status_totals': status_totals(),
+        'request_types': request_type_totals(),
+        'ageing': open_request_ageing(now),
+        'throughput': daily_throughput(now),
+        'computed_at': now,
+    }
+
+
+def get_dashboard():
+    # Cached dashboard figures, recomputed by a single request at a time once they go stale
+    ttl = getattr(settings, 'ADMIN_DASHBOARD_CACHE_SECONDS', 60)
+    cached = cache.get(DASHBOARD_CACHE_KEY)
+    if cached is not None:
+        fresh_until, dashboard = cached
+        # cache.add is atomic: only one request wins the lock and refreshes
+        if time.time() < fresh_until or not cache.add(f'{DASHBOARD_CACHE_KEY}:lock', True, 30):
+            return dashboard
+    dashboard = compute_dashboard()
+    # Kept past its freshness so stale figures can be served while one request recomputes
+    cache.set(DASHBOARD_CACHE_KEY, (time.time() + ttl, dashboard), ttl * 10)
+    cache.delete(f'{DASHBOARD_CACHE_KEY}:lock')
+    return dashboard
@@ -0,0 +1,202 @@
+"""
+Push notifications of ClientRequest creations and status changes, so staff watching the
+changelist (and integrations) hear about changes instead of reloading the page.
+
+    GET /api/v1/requests/events/     Accept: text/event-stream -> server-sent events
+                                     anything else             -> long poll, {"events": [...]}
+
+Every write path publishes, after its transaction commits:
+
+    ClientRequest.save()                 'created', or 'status_changed' when the status moved
+    ClientRequestQuerySet.set_status()   'status_changed' (the admin's bulk status actions)
+    import and batch API                 'created' and 'status_changed' per batch
+
+An event covers the requests of one client that made the same change:
+
+    {"type": "status_changed", "client": 4, "status": "Completed", "previous_status": "Pending",
+     "count": 2, "ids": [17, 18]}
+
+ids is null when a bulk change touched more than EVENTS_MAX_IDS rows; the change feed
+(main/changes.py) says which. Events are notifications, not a log: a consumer that was
+disconnected, or fell more than EVENTS_QUEUE_SIZE events behind (it then gets an 'overflow'
+event), catches up with the change feed.
+
+Events go through the broker named by the EVENTS_BROKER setting. LocalBroker fans them out
+to the subscribers in this process, which is enough for one server process; with several
+workers or hosts, RedisBroker relays them through Redis pub/sub (EVENTS_REDIS_URL) so every
+process's subscribers see every event. Streams are long-lived requests and are only served
+over ASGI (SERVER_INTERFACE=asgi): under WSGI Django buffers an async stream whole, so the
+view answers 501 there and clients long poll instead.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Events listing more rows than this carry "ids": null
+EVENTS_MAX_IDS = 500
+# Events queued per subscriber before it is told it fell behind
+EVENTS_QUEUE_SIZE = 1000
+# Comment lines sent on idle streams, so proxies keep them open
+EVENTS_KEEPALIVE_SECONDS = 15
+# A stream ends after this long and the browser reconnects, so abandoned streams do not pile up
+EVENTS_STREAM_SECONDS = 300
+# Default and longest wait of a long poll
+EVENTS_LONG_POLL_SECONDS = 25
+EVENTS_LONG_POLL_MAX_SECONDS = 55
+
+OVERFLOW = {'type': 'overflow'}
+
+
+def make_event(event_type, client_id, status, previous_status, count, ids=None):
+    return {
+        'type': event_type,
+        'client': client_id,
+        'status': status,
+        'previous_status': previous_status,
+        'count': count,
+        'ids': ids,
+    }
+
+
+def group_events(event_type, rows):
+    # One event per (client, previous status, status) from (id, client_id, previous_status, status) rows
+    groups = defaultdict(list)
+    for pk, client_id, previous_status, status in rows:
+        groups[(client_id, previous_status, status)].append(pk)
+    return [
+        make_event(event_type, client_id, status, previous_status, len(ids), ids if len(ids) <= EVENTS_MAX_IDS else None)
+        for (client_id, previous_status, status), ids in groups.items()
+    ]
+
+
+def created_events(instances):
+    return group_events('created', [(obj.pk, obj.client_id, None, obj.status) for obj in instances])
+
+
+def updated_events(instances):
+    # Status changes among rows written with bulk_update; each was loaded with its _stats_state
+    return group_events('status_changed', [
+        (obj.pk, obj.client_id, obj._stats_state[1], obj.status)
+        for obj in instances if obj._stats_state[1] != obj.status
+    ])
+
+
+def publish(events, using='default'):
+    # Hand events to the broker once the current transaction commits (at once outside one).
+    # A broker failure is logged rather than failing a write that has already committed.
+    if events:
+        transaction.on_commit(lambda: get_broker().publish(events), using=using, robust=True)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENTS_BROKER)()
+
+
+# One consumer's queue of events, bound to the event loop it was created on
+class Subscription:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+
+    def deliver(self, events):
+        # Thread-safe: events are published from whichever thread committed the write
+        self.loop.call_soon_threadsafe(self.put, events)
+
+    def put(self, events):
+        for event in events:
+            if self.queue.full():
+                # The consumer fell behind: drop the backlog and tell it to resync from the change feed
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                event = OVERFLOW
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        # The next event, or None after timeout seconds
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self):
+        events = []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+
+# In-process fan-out: every subscriber in this process receives every published event
+class LocalBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+
+    def subscribe(self):
+        subscription = Subscription()
+        with self.lock:
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def publish(self, events):
+        self.fan_out(events)
+
+    def fan_out(self, events):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.deliver(events)
+            except RuntimeError:
+                # Its event loop has closed (e.g. a worker shutting down)
+                self.unsubscribe(subscription)
+
+
+# Fan-out across processes and hosts: events are published to a Redis channel, and one
+# listener thread per process relays them to that process's subscribers
+class RedisBroker(LocalBroker):
+    channel = 'mysite:client-request-events'
+
+    def __init__(self):
+        import redis
+
+        super().__init__()
+        self.redis = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+        self.listener = None
+
+    def publish(self, events):
+        self.redis.publish(self.channel, json.dumps(events, cls=DjangoJSONEncoder))
+
+    def subscribe(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='events-listener', daemon=True)
+                self.listener.start()
+        return super().subscribe()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.fan_out(json.loads(message['data']))
+            except Exception:
+                # Subscribers miss what was published meanwhile; they resync from the change feed
+                logger.exception('Lost the Redis events channel; reconnecting')
+                self.fan_out([OVERFLOW])
+                threading.Event().wait(1)
@@ -0,0 +1,158 @@
+"""
+Streaming CSV / JSON Lines export of admin changelists.
+
+Exports are built for tables far larger than memory:
+
+- rows are read with QuerySet.iterator(chunk_size), which uses a server-side cursor on
+  PostgreSQL, so only one chunk of rows is held at a time
+- only the exported columns are selected (values_list), related names come from the same
+  query's joins, and no model instances are created
+- the response is a StreamingHttpResponse, so the first bytes go out straight away and the
+  worker keeps writing instead of building the whole file first. Under ASGI it is given an
+  async iterator (stream_async): Django 4.2 would read a sync one into a list before sending
+
+StreamingExportMixin adds two entry points to a ModelAdmin: "Export selected" actions, and
+an export/<format>/ URL that streams whatever the changelist currently shows (filters,
+search and ordering from the query string), linked from the changelist page.
+"""
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import path
+from django.utils import timezone
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    # File-like object whose write() hands the line back, so csv.writer can feed a generator
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, fields, chunk_size=2000):
+    # Tuples of the export columns; `fields` maps column name -> queryset lookup
+    return queryset.values_list(*fields.values()).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows, columns, lines_per_write=500):
+    # Header row, then the data rows; lines are grouped so the socket is not written per row
+    writer = csv.writer(Echo())
+    buffer = [writer.writerow(columns)]
+    for row in rows:
+        buffer.append(writer.writerow(['' if value is None else value for value in row]))
+        if len(buffer) >= lines_per_write:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_jsonl(rows, columns, lines_per_write=500):
+    buffer = []
+    for row in rows:
+        buffer.append(json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n')
+        if len(buffer) >= lines_per_write:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def stream_async(stream):
+    # Serve a sync stream to the ASGI handler a chunk at a time. Every chunk is produced in the
+    # request's sync thread (thread_sensitive), so the server-side cursor stays on one connection.
+    produce = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await produce(stream, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the cursor too when the client goes away mid-download
+        await sync_to_async(stream.close, thread_sensitive=True)()
+
+
+def streaming_export_response(queryset, fields, file_format, filename_prefix, chunk_size=2000, asynchronous=False):
+    # StreamingHttpResponse downloading `queryset` as <filename_prefix>_<timestamp>.<format>;
+    # asynchronous for requests served over ASGI
+    columns = list(fields)
+    rows = export_rows(queryset, fields, chunk_size)
+    stream = stream_csv(rows, columns) if file_format == 'csv' else stream_jsonl(rows, columns)
+    if asynchronous:
+        stream = stream_async(stream)
+    response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[file_format])
+    timestamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename_prefix}_{timestamp}.{file_format}"'
+    return response
+
+
+def make_export_action(file_format):
+    # Admin action streaming the selected rows, in the same style as make_status_action
+    def action(modeladmin, request, queryset):
+        return modeladmin.export_response(request, queryset, file_format)
+    action.__name__ = f'export_selected_{file_format}'
+    action.short_description = f'Export selected as {file_format.upper()}'
+    action.allowed_permissions = ('view',)
+    return action
+
+
+# ModelAdmin mixin adding streaming exports. export_fields maps column names to lookups, e.g.
+# {'client': 'client__name'}; add make_export_action(...) to `actions` for the selected-rows export.
+class StreamingExportMixin:
+    export_fields = {}
+    export_chunk_size = 2000  # Rows fetched per round trip from the server-side cursor
+
+    def export_url_name(self):
+        return f'{self.opts.app_label}_{self.opts.model_name}_export'
+
+    def is_export_request(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match is not None and match.url_name == self.export_url_name()
+
+    def get_urls(self):
+        urls = [
+            path(
+                'export/<str:file_format>/',
+                self.admin_site.admin_view(self.export_view),
+                name=self.export_url_name(),
+            ),
+        ]
+        return urls + super().get_urls()
+
+    # The export only needs the changelist's filtered, searched and ordered queryset,
+    # so skip the page query and counts the changelist would otherwise run
+    def get_changelist(self, request, **kwargs):
+        changelist_class = super().get_changelist(request, **kwargs)
+        if not self.is_export_request(request):
+            return changelist_class
+
+        class ExportChangeList(changelist_class):
+            def get_results(self, request):
+                pass
+
+        return ExportChangeList
+
+    def export_response(self, request, queryset, file_format):
+        return streaming_export_response(
+            queryset, self.export_fields, file_format, self.opts.model_name, self.export_chunk_size,
+            asynchronous=isinstance(request, ASGIRequest),
+        )
+
+    def export_view(self, request, file_format):
+        if file_format not in EXPORT_FORMATS:
+            raise Http404
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            return HttpResponseBadRequest('Invalid changelist filters')
+        return self.export_response(request, changelist.queryset, file_format)
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
+from .importers import detect_format
 
 
 class UserRegistrationForm (forms.ModelForm):
@@ -78,4 +79,25 @@ class UserRegistrationForm (forms.ModelForm):
             except Group.DoesNotExist:
                 # If group doesn't exist, silently ignore
                 pass
-        return user
\ No newline at end of file
+        return user
+
+class DataImportForm(forms.Form):
+    # Upload form for the admin import view; the file itself is streamed by main.importers
+    KIND_CHOICES = [
+        ('clients', 'Clients'),
+        ('request_types', 'Request types'),
+        ('requests', 'Client requests'),
+    ]
+
+    kind = forms.ChoiceField(choices=KIND_CHOICES, label='File contains')
+    file = forms.FileField(help_text='A .csv file with a header row, or a .jsonl file with one JSON object per line.')
+    dry_run = forms.BooleanField(required=False, label='Validate only (write nothing)')
+
+    def clean_file(self):
+        # Reject unknown extensions up front rather than failing on the first row
+        upload = self.cleaned_data['file']
+        try:
+            self.file_format = detect_format(upload.name)
+        except ValueError as exc:
+            raise ValidationError(str(exc))
+        return upload
@@ -0,0 +1,93 @@
+"""
+Append-only status history of ClientRequests (ClientRequestStatusChange), for cycle times and
+time spent in each status. Every write path records its changes in a fixed number of statements:
+
+    ClientRequest.save()                 one row when a request is created or its status changes
+    ClientRequestQuerySet.set_status()   one INSERT ... SELECT before the bulk UPDATE
+                                         (the admin's "Mark selected requests as ..." actions)
+    bulk_create paths (import, API)      record_created(): one bulk_create per batch
+    bulk_update paths (API)              record_updated(): one bulk_create of the changed rows
+
+The creation row has from_status NULL. History starts with this table: requests that existed
+before it have no rows until their status next changes, and writes behind these paths (raw SQL,
+COPY, queryset.update(), generate_load_data) are not recorded.
+
+Two indexes serve the reads: (request, changed_at, id) for one request's timeline, as in the
+read-only inline on the ClientRequest change page, and (to_status, changed_at) for changes
+into a status over a date range, as in changes_per_day().
+"""
+from datetime import timedelta
+
+from django.db import connections, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ClientRequestStatusChange
+
+
+def user_id(user):
+    # The pk of an authenticated user, else None
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def record_transitions(queryset, status, user=None):
+    # One row per request of a ClientRequest queryset moving to `status`, written with one
+    # INSERT ... SELECT of the current statuses, so it must run before the UPDATE
+    connection = connections[queryset.db]
+    select_sql, params = queryset.order_by().values_list('pk', 'status').query.sql_with_params()
+    table = connection.ops.quote_name(ClientRequestStatusChange._meta.db_table)
+    changed_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (changed_at, to_status, changed_by_id, request_id, from_status) '
+            f'SELECT %s, %s, %s, changing.* FROM ({select_sql}) changing',
+            [changed_at, status, user_id(user), *params],
+        )
+
+
+def record_changes(changes, user=None, using='default'):
+    # changes is an iterable of (request_id, from_status, to_status)
+    now = timezone.now()
+    ClientRequestStatusChange.objects.using(using).bulk_create([
+        ClientRequestStatusChange(
+            request_id=request_id, from_status=from_status, to_status=to_status, changed_at=now, changed_by_id=user_id(user),
+        )
+        for request_id, from_status, to_status in changes
+    ])
+
+
+def record_saved(instance, previous, created, using='default'):
+    # After ClientRequest.save(); previous is the instance's stats_state() when it was loaded
+    if created:
+        record_changes([(instance.pk, None, instance.status)], using=using)
+    elif previous is None or previous[1] != instance.status:
+        # Without the loaded values the status may have changed, and the previous one is unknown
+        record_changes([(instance.pk, previous[1] if previous else None, instance.status)], using=using)
+
+
+def record_created(instances, user=None, using='default'):
+    # Rows inserted with bulk_create (which bypasses save())
+    record_changes([(instance.pk, None, instance.status) for instance in instances], user=user, using=using)
+
+
+def record_updated(instances, user=None, using='default'):
+    # Rows written with bulk_update; each was loaded from the database with its _stats_state
+    record_changes(
+        [(instance.pk, instance._stats_state[1], instance.status) for instance in instances if instance._stats_state[1] != instance.status],
+        user=user, using=using,
+    )
+
+
+def changes_per_day(to_status, days, now=None):
+    # {date: number of requests that moved into to_status that day} for the last `days` days,
+    # one grouped range read of the (to_status, changed_at) index
+    now = now or timezone.now()
+    since = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    rows = (
+        ClientRequestStatusChange.objects.filter(to_status=to_status, changed_at__gte=since)
+        .annotate(day=TruncDate('changed_at'))
+        .values('day')
+        .annotate(count=models.Count('pk'))
+        .order_by()
+    )
+    return {row['day']: row['count'] for row in rows}
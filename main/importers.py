@@ -0,0 +1,377 @@
+"""
+Streaming CSV / JSON Lines import of Clients, RequestTypes and ClientRequests.
+
+Files are read a line at a time and handled in batches, so memory stays flat however large
+the file is. For each batch:
+
+- related names (a request's client and request type) are resolved with one query per
+  model for the names not seen before, then served from an in-memory cache
+- every row is validated with the model's own field validation (without the per-row
+  foreign key existence queries, which the batch lookup already answers)
+- the valid rows are written with one bulk_create inside a transaction
+
+A bad row is reported with its line number and skipped; it never aborts the rest of the file.
+
+Columns (CSV header or JSON keys):
+
+    clients         name, email, contact_number, company_url, is_active, created_at
+    request_types   name, description, sla_hours
+    requests        client (name) or client_id, request_type (name) or request_type_id,
+                    status (default Pending), description, created_at
+"""
+import codecs
+import csv
+import json
+import os
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, models, transaction
+
+from . import events, history, sla
+from .models import Client, RequestType, ClientRequest
+from .stats import record_created
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+BOOLEAN_WORDS = {
+    'true': True, 'yes': True, 'y': True, 't': True, '1': True,
+    'false': False, 'no': False, 'n': False, 'f': False, '0': False,
+}
+
+
+class RowError(Exception):
+    # A line that could not be parsed into a row at all (e.g. broken JSON)
+    pass
+
+
+NOT_UTF8 = 'Not valid UTF-8 text; save the file as UTF-8 and import this row again'
+
+
+def detect_format(filename):
+    # Pick the format from the file extension; .json and .ndjson are treated as JSON Lines
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson', 'json'):
+        return 'jsonl'
+    raise ValueError(f'Cannot tell the format of {filename!r}; use a .csv or .jsonl file')
+
+
+def decode_lines(fileobj, undecodable):
+    # Decode a binary file object a line at a time, so that one line in another encoding only
+    # spoils that line: its number is added to undecodable and it is yielded with replacement
+    # characters, for the caller to report
+    for line_number, line in enumerate(fileobj, 1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError:
+            undecodable.add(line_number)
+            yield line.decode('utf-8', errors='replace')
+
+
+def read_rows(fileobj, file_format):
+    # Yield (line number, row dict) pairs from a binary file object, one line at a time.
+    # Lines that cannot be parsed are yielded as RowError instances instead of dicts.
+    undecodable = set()
+    lines = decode_lines(fileobj, undecodable)
+    if file_format == 'csv':
+        yield from read_csv_rows(lines, undecodable)
+        return
+    for line_number, line in enumerate(lines, 1):
+        if line_number in undecodable:
+            yield line_number, RowError(NOT_UTF8)
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, RowError(f'Invalid JSON: {exc}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('Each line must be a JSON object')
+            continue
+        yield line_number, row
+
+
+def read_csv_rows(lines, undecodable):
+    reader = csv.DictReader(lines)
+    last_line = 0
+    while True:
+        # A quoted value may span several lines; a row's lines are those after the previous row's
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            # DictReader.line_num is only updated for good rows; the underlying reader's counts all
+            last_line = reader.reader.line_num
+            yield last_line, RowError(f'Invalid CSV: {exc}')
+            continue
+        row_lines = range(last_line + 1, reader.line_num + 1)
+        last_line = reader.line_num
+        if not undecodable.isdisjoint(row_lines):
+            yield reader.line_num, RowError(NOT_UTF8)
+            continue
+        # Values from short rows come back as None, surplus values under the None key
+        yield reader.line_num, {key: value for key, value in row.items() if key is not None}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def format_validation_error(error):
+    if hasattr(error, 'error_dict'):
+        return '; '.join(
+            f"{field}: {' '.join(messages)}" if field != '__all__' else ' '.join(messages)
+            for field, messages in error.message_dict.items()
+        )
+    return ' '.join(error.messages)
+
+
+# Outcome of an import: counts plus the first max_errors row errors as (line, message)
+class ImportResult:
+    max_errors = 1000
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, message))
+
+    def summary(self):
+        verb = 'would be imported' if self.dry_run else 'imported'
+        return f'{self.imported} of {self.rows} rows {verb}, {self.error_count} rejected.'
+
+
+# name -> pk cache for one related model, filled a batch at a time.
+# Names are matched exactly; a name shared by several existing rows maps to AMBIGUOUS.
+class RelatedLookup:
+    AMBIGUOUS = object()
+
+    def __init__(self, model, fields=()):
+        self.model = model
+        # Further columns loaded with each row, kept as {pk: {field: value}}
+        self.fields = tuple(fields)
+        self.values = {}
+        self.by_name = {}
+        self.known_ids = set()
+        self.missing_ids = set()
+
+    def prime(self, names, ids):
+        # One query, by name or id, for everything in the batch that is not cached yet
+        new_names = set(names) - set(self.by_name)
+        new_ids = set(ids) - self.known_ids - self.missing_ids
+        if not new_names and not new_ids:
+            return
+        for name in new_names:
+            self.by_name[name] = None
+        rows = self.model.objects.filter(models.Q(name__in=new_names) | models.Q(pk__in=new_ids))
+        for pk, name, *values in rows.values_list('pk', 'name', *self.fields):
+            self.values[pk] = dict(zip(self.fields, values))
+            if name in new_names:
+                self.by_name[name] = pk if self.by_name[name] is None else self.AMBIGUOUS
+            if pk in new_ids:
+                self.known_ids.add(pk)
+        self.missing_ids |= new_ids - self.known_ids
+
+    def resolve(self, name=None, pk=None):
+        # Return the pk for a row's name or id, raising ValidationError when it does not match one row
+        label = self.model._meta.verbose_name
+        if pk is not None:
+            if pk not in self.known_ids:
+                raise ValidationError(f'No {label} with id {pk}.')
+            return pk
+        if not name:
+            raise ValidationError('This field is required.')
+        found = self.by_name.get(name)
+        if found is None:
+            raise ValidationError(f'No {label} named {name!r}.')
+        if found is self.AMBIGUOUS:
+            raise ValidationError(f'Several {label}s are named {name!r}; use the id column instead.')
+        return found
+
+
+def clean_value(value):
+    # Trim strings and treat blanks as "not given" so the model default applies
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+
+class ModelImporter:
+    model = None
+    fields = ()  # Columns copied straight onto the model instance
+    defaults = {}  # Values used when a column is missing or blank
+    related_fields = ()  # Foreign keys resolved by name (or <field>_id) with RelatedLookup
+    related_values = {}  # Further columns of the related rows to load in the same lookup query
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.lookups = {
+            field_name: RelatedLookup(self.model._meta.get_field(field_name).related_model, self.related_values.get(field_name, ()))
+            for field_name in self.related_fields
+        }
+
+    def before_create(self, instances):
+        # Hook run on the validated instances of a batch, before bulk_create
+        pass
+
+    def after_create(self, instances):
+        # Hook run inside the batch transaction, after bulk_create
+        pass
+
+    def run(self, rows, on_batch=None):
+        # rows: iterable of (line number, row dict) as produced by read_rows; on_batch, if given,
+        # is called with the running ImportResult after each batch
+        result = ImportResult(dry_run=self.dry_run)
+        for batch in batched(rows, self.batch_size):
+            self.import_batch(batch, result)
+            if on_batch is not None:
+                on_batch(result)
+        return result
+
+    def related_keys(self, row, field_name):
+        # (name, id) given for a foreign key column; the id column wins when both are present
+        pk = clean_value(row.get(f'{field_name}_id'))
+        if pk is not None:
+            try:
+                pk = int(pk)
+            except (TypeError, ValueError):
+                raise ValidationError({f'{field_name}_id': f'{pk!r} is not a valid id.'})
+        name = clean_value(row.get(field_name))
+        return (str(name) if name is not None else None), pk
+
+    def build(self, row):
+        values = dict(self.defaults)
+        for field_name in self.fields:
+            value = clean_value(row.get(field_name))
+            if isinstance(value, str) and isinstance(self.model._meta.get_field(field_name), models.BooleanField):
+                # Spreadsheets write booleans in many ways; Django's own parsing only takes True/False/1/0/t/f
+                value = BOOLEAN_WORDS.get(value.lower(), value)
+            if value is not None:
+                values[field_name] = value
+        errors = {}
+        for field_name, lookup in self.lookups.items():
+            try:
+                name, pk = self.related_keys(row, field_name)
+                values[f'{field_name}_id'] = lookup.resolve(name, pk)
+            except ValidationError as exc:
+                errors.update(exc.error_dict if hasattr(exc, 'error_dict') else {field_name: exc.error_list})
+        instance = self.model(**values)
+        try:
+            # Foreign keys were checked by the batch lookup, so skip their per-row existence queries
+            instance.full_clean(exclude=list(self.lookups), validate_unique=False)
+        except ValidationError as exc:
+            errors = exc.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
+        return instance
+
+    def prime_lookups(self, rows):
+        for field_name, lookup in self.lookups.items():
+            names, ids = set(), set()
+            for row in rows:
+                try:
+                    name, pk = self.related_keys(row, field_name)
+                except ValidationError:
+                    continue  # Reported when the row is built
+                if pk is not None:
+                    ids.add(pk)
+                elif name is not None:
+                    names.add(name)
+            lookup.prime(names, ids)
+
+    def import_batch(self, batch, result):
+        result.rows += len(batch)
+        parsed = []
+        for line_number, row in batch:
+            if isinstance(row, RowError):
+                result.add_error(line_number, str(row))
+            else:
+                parsed.append((line_number, row))
+        self.prime_lookups([row for _, row in parsed])
+
+        instances, lines = [], []
+        for line_number, row in parsed:
+            try:
+                instances.append(self.build(row))
+                lines.append(line_number)
+            except ValidationError as exc:
+                result.add_error(line_number, format_validation_error(exc))
+        if not instances:
+            return
+        if self.dry_run:
+            result.imported += len(instances)
+            return
+        try:
+            with transaction.atomic():
+                self.before_create(instances)
+                self.model.objects.bulk_create(instances)
+                self.after_create(instances)
+        except DatabaseError as exc:
+            # Validation should catch bad rows first; if the database still refuses the batch, none of it is written
+            for line_number in lines:
+                result.add_error(line_number, f'Batch rejected by the database: {exc}')
+            return
+        result.imported += len(instances)
+
+
+class ClientImporter(ModelImporter):
+    model = Client
+    fields = ('name', 'email', 'contact_number', 'company_url', 'is_active', 'created_at')
+
+
+class RequestTypeImporter(ModelImporter):
+    model = RequestType
+    fields = ('name', 'description', 'sla_hours')
+
+
+class ClientRequestImporter(ModelImporter):
+    model = ClientRequest
+    fields = ('status', 'description', 'created_at')
+    defaults = {'status': 'Pending'}
+    related_fields = ('client', 'request_type')
+    related_values = {'request_type': ('sla_hours',)}
+
+    def sla_targets(self):
+        # {request_type_id: sla_hours} of the types looked up so far
+        return {pk: values['sla_hours'] for pk, values in self.lookups['request_type'].values.items()}
+
+    def before_create(self, instances):
+        # bulk_create skips save(), so the SLA due dates are set here, from the request types
+        # already loaded by the lookup
+        sla.assign_due_at(instances, self.sla_targets())
+
+    def after_create(self, instances):
+        # bulk_create skips save(), so move the per-client counters here (one UPDATE per client),
+        # record the creations in the status history (main/history.py) and publish them (main/events.py)
+        record_created(instances)
+        history.record_created(instances)
+        events.publish(events.created_events(instances))
+
+
+IMPORTERS = {
+    'clients': ClientImporter,
+    'request_types': RequestTypeImporter,
+    'requests': ClientRequestImporter,
+}
+
+
+def import_file(fileobj, kind, file_format, batch_size=1000, dry_run=False, on_batch=None):
+    # Import an open binary file of `kind` rows and return the ImportResult
+    importer = IMPORTERS[kind](batch_size=batch_size, dry_run=dry_run)
+    return importer.run(read_rows(fileobj, file_format), on_batch=on_batch)
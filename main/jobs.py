@@ -0,0 +1,325 @@
+"""
+Database-backed background jobs, so long admin operations do not run inside the HTTP request
+(and into the gunicorn timeout). The queue is the Job table; 'manage.py run_jobs' is the worker.
+
+    enqueue('admin_action', {...}, user=request.user)    queue a job; returns the Job
+
+A worker claims the oldest due job with SELECT ... FOR UPDATE SKIP LOCKED (on the partial
+job_queued_idx index), so any number of workers, on any number of hosts, share the queue
+without taking the same job, and runs it outside that transaction. Tasks report progress with
+progress(), which also saves job.args, where chunked tasks checkpoint their position. While a job
+runs, a Heartbeat thread refreshes its heartbeat every JOBS_STALE_SECONDS / 3, however long a
+single chunk takes. Then:
+
+- a task that raises is retried after JOBS_RETRY_SECONDS, doubling per attempt, until
+  max_attempts (JOBS_MAX_ATTEMPTS); a retry resumes from the last checkpoint
+- a job whose worker stops reporting for JOBS_STALE_SECONDS (killed, host lost) is requeued
+  by the next worker that polls, or failed if it has no attempts left
+
+Every write a worker makes to its job is conditional on still owning it (same worker, same
+attempt, still running). A worker whose job was requeued and handed on gets JobLost from
+progress() and stops, and its final status is not recorded over the new owner's.
+
+Tasks:
+
+    admin_action   a ModelAdmin action applied JOBS_CHUNK_SIZE rows at a time, one transaction
+                   per chunk. BackgroundActionMixin queues the actions it lists when "select all"
+                   covers more than JOBS_BACKGROUND_ROWS rows; the worker rebuilds the selection
+                   from the changelist's filters and runs the action as the user who queued it.
+    import_file    an uploaded CSV/JSONL file run through main.importers; ClientAdmin.import_view
+                   queues uploads over JOBS_BACKGROUND_IMPORT_BYTES. The upload is streamed to
+                   default_storage (store_upload) and the job only keeps its name in args['path'];
+                   the worker streams it back from there, so the web and worker processes must
+                   share that storage (MEDIA_ROOT, or an object store). Each batch commits on its
+                   own, so imports are not retried (max_attempts=1); the file is deleted after.
+
+Job progress and outcomes are listed under Admin -> Jobs.
+"""
+import functools
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.db import connection, models, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .models import Job
+
+logger = logging.getLogger('main.jobs')
+
+# Registered task functions by name: func(job, **job.args) -> outcome message or None
+TASKS = {}
+
+# Rejected rows kept in the result of a background import
+JOBS_IMPORT_ERRORS = 100
+
+# Directory in default_storage holding uploads waiting for their import job
+JOBS_UPLOAD_DIR = 'job-uploads'
+
+
+def task(name):
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(task_name, args=None, user=None, max_attempts=None):
+    if task_name not in TASKS:
+        raise ValueError(f'Unknown task {task_name!r}')
+    return Job.objects.create(
+        task=task_name,
+        args=args or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+# Raised by progress() in a worker whose job has been handed to another worker
+class JobLost(Exception):
+    pass
+
+
+def owned(job):
+    # The job's row, as long as it is still this run's: claimed by this worker for this attempt
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker, attempts=job.attempts)
+
+
+def progress(job, done, total=None, message=None):
+    # Record progress, refresh the heartbeat and save the task's checkpoint (job.args)
+    job.progress_done = done
+    if total is not None:
+        job.progress_total = total
+    if message is not None:
+        job.message = message
+    job.heartbeat_at = timezone.now()
+    updated = owned(job).update(
+        progress_done=job.progress_done, progress_total=job.progress_total, message=job.message,
+        heartbeat_at=job.heartbeat_at, args=job.args,
+    )
+    if not updated:
+        raise JobLost(f'Job {job.pk} is no longer run by {job.worker}.')
+
+
+class Heartbeat(threading.Thread):
+    # Refreshes a running job's heartbeat in the background, so that a chunk slower than
+    # JOBS_STALE_SECONDS does not get the job requeued while it is still being worked on
+    def __init__(self, job):
+        super().__init__(name=f'job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = max(settings.JOBS_STALE_SECONDS / 3, 1)
+        try:
+            while not self.stopped.wait(interval):
+                if not owned(self.job).update(heartbeat_at=timezone.now()):
+                    return
+        finally:
+            # This thread's own database connection
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker):
+    # Take the oldest due job, skipping rows other workers have locked; None when there is none
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.worker = worker
+        job.started_at = job.heartbeat_at = now
+        job.save(update_fields=['status', 'attempts', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def requeue_stale(now=None):
+    # Running jobs whose worker stopped reporting: failed if out of attempts, else queued again.
+    # Returns the number of jobs touched.
+    now = now or timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOBS_STALE_SECONDS))
+    failed = stale.filter(attempts__gte=models.F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, error='The worker stopped reporting progress.',
+    )
+    requeued = stale.update(status=Job.QUEUED, run_after=now, worker='')
+    return failed + requeued
+
+
+def run(job):
+    # Run a claimed job and record its outcome: succeeded, queued for a retry, or failed
+    func = TASKS.get(job.task)
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {job.task!r}')
+        outcome = func(job, **job.args)
+    except JobLost:
+        logger.warning('Job %s (%s) was handed to another worker; %s stopped working on it', job.pk, job.task, job.worker)
+        return job
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s of %s', job.pk, job.task, job.attempts, job.max_attempts)
+        now = timezone.now()
+        fields = {'error': traceback.format_exc(), 'worker': ''}
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_SECONDS * 2 ** (job.attempts - 1)
+            fields.update(status=Job.QUEUED, run_after=now + timedelta(seconds=delay))
+        else:
+            fields.update(status=Job.FAILED, finished_at=now)
+    else:
+        fields = {
+            'status': Job.SUCCEEDED, 'finished_at': timezone.now(), 'message': outcome or job.message,
+            'result': job.result,
+        }
+    finally:
+        heartbeat.stop()
+    fields['args'] = job.args
+    if not owned(job).update(**fields):
+        logger.warning('Job %s (%s) was handed to another worker; its outcome on %s is dropped', job.pk, job.task, job.worker)
+        return job
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return job
+
+
+# Stands in for the messages storage on a job's request, keeping what the task reports
+class JobMessages:
+    def __init__(self):
+        self.messages = []
+
+    def add(self, level, message, extra_tags=''):
+        self.messages.append(str(message))
+
+
+def job_request(job, query_string=''):
+    # A request carrying the user who queued the job, for code written against admin requests
+    request = HttpRequest()
+    request.method = 'GET'
+    request.GET = QueryDict(query_string)
+    request.user = job.created_by or AnonymousUser()
+    request.job = job
+    request._messages = JobMessages()
+    return request
+
+
+@task('admin_action')
+def run_admin_action(job, model, action, changelist='', after=0):
+    # Apply a ModelAdmin action to the changelist selection in pk order, a chunk per transaction
+    from .admin import custom_admin_site
+
+    model_class = apps.get_model(model)
+    modeladmin = custom_admin_site._registry[model_class]
+    request = job_request(job, changelist)
+    # Permissions are checked again, as the user who queued the job
+    actions = modeladmin.get_actions(request)
+    if action not in actions:
+        raise PermissionDenied(f'{action} is not available to {request.user}.')
+    func, _, description = actions[action]
+    queryset = modeladmin.get_changelist_instance(request).get_queryset(request)
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    if job.progress_total is None:
+        progress(job, 0, total=pks.count())
+    done = job.progress_done
+    while True:
+        chunk = list(pks.filter(pk__gt=after)[:settings.JOBS_CHUNK_SIZE])
+        if not chunk:
+            break
+        with transaction.atomic():
+            func(modeladmin, request, model_class._default_manager.filter(pk__in=chunk))
+        after = job.args['after'] = chunk[-1]
+        done += len(chunk)
+        progress(job, done, message=request._messages.messages[-1] if request._messages.messages else None)
+    label = str(description) % {'verbose_name_plural': model_class._meta.verbose_name_plural}
+    return f'{label}: {done} {model_class._meta.verbose_name_plural} processed.'
+
+
+def store_upload(upload):
+    # Save an uploaded file for an import job and return its storage name. Storage copies it in
+    # chunks (or moves the temporary file of a large upload), so it is never read into memory.
+    return default_storage.save(f'{JOBS_UPLOAD_DIR}/{uuid.uuid4().hex}/{os.path.basename(upload.name)}', upload)
+
+
+@task('import_file')
+def run_import(job, kind, file_format, path, dry_run=False):
+    from .importers import import_file
+
+    def report(result):
+        progress(job, result.rows, message=result.summary())
+
+    try:
+        with default_storage.open(path, 'rb') as fileobj:
+            result = import_file(fileobj, kind, file_format, dry_run=dry_run, on_batch=report)
+    finally:
+        # Imports are not retried, so the file is not needed again
+        default_storage.delete(path)
+    job.result = {
+        'summary': result.summary(),
+        'error_count': result.error_count,
+        'errors': result.errors[:JOBS_IMPORT_ERRORS],
+    }
+    return result.summary()
+
+
+def job_link(job):
+    return format_html('<a href="{}">job {}</a>', reverse('custom_admin:main_job_change', args=[job.pk]), job.pk)
+
+
+def in_background(func, name):
+    # Wrap an admin action so that "select all" over more than JOBS_BACKGROUND_ROWS rows is queued
+    # as an admin_action job; smaller selections, and the job itself, run it directly
+    @functools.wraps(func)
+    def action(modeladmin, request, queryset):
+        select_across = request.POST.get('select_across') == '1'
+        if getattr(request, 'job', None) is not None or not select_across or queryset.count() <= settings.JOBS_BACKGROUND_ROWS:
+            return func(modeladmin, request, queryset)
+        job = enqueue('admin_action', {
+            'model': modeladmin.opts.label_lower,
+            'action': name,
+            # The action form posts to the changelist URL, so its filters are in the query string
+            'changelist': request.GET.urlencode(),
+        }, user=request.user)
+        modeladmin.message_user(request, format_html(
+            'The action was queued as {} and runs in the background; its progress is shown there.', job_link(job),
+        ))
+        return None
+    return action
+
+
+class BackgroundActionMixin:
+    # Names of the actions queued as jobs when "select all" covers more than JOBS_BACKGROUND_ROWS rows
+    background_actions = ()
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        for name in self.background_actions:
+            if name in actions:
+                func, action_name, description = actions[name]
+                actions[name] = (in_background(func, name), action_name, description)
+        return actions
@@ -0,0 +1,224 @@
+"""
+Generate large volumes of synthetic Clients, RequestTypes and ClientRequests for load testing.
+
+Data is deterministic for a given --seed and --until date:
+- request volume per client is Zipf-skewed (a few clients own most requests)
+- created_at is spread over --years, weighted towards recent dates (growing volume)
+- status depends on age: old requests are mostly Completed, recent ones mostly open
+- request types get SLA targets in turn, and each request's due_at and sla_breached are set
+  as 'manage.py compute_sla' would set them at --until
+
+Rows are written in batches with bulk_create, or with PostgreSQL COPY when --copy is given,
+and the per-client ClientStats counters are rebuilt afterwards.
+
+Usage:
+    python manage.py generate_load_data --clients 20000 --requests 2000000 --seed 42
+    python manage.py generate_load_data --requests 5000000 --copy
+"""
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from itertools import accumulate, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from main import sla, stats
+from main.models import Client, RequestType, ClientRequest
+
+REQUEST_TYPE_NAMES = [
+    'SEO Tech Check', 'Plugin Updates', 'Content Update', 'Site Migration', 'Performance Audit',
+    'Accessibility Review', 'Security Patch', 'Analytics Setup', 'Email Campaign', 'Hosting Change',
+]
+
+# SLA targets given to the request types in turn; None is a type without a target
+REQUEST_TYPE_SLA_HOURS = [24, 72, None, 168, 48]
+
+
+@contextmanager
+def auto_now_disabled(model, field_name):
+    # bulk_create runs pre_save, which would stamp auto_now fields with the current time;
+    # switch it off so the generated history keeps its own timestamps
+    field = model._meta.get_field(field_name)
+    original = field.auto_now
+    field.auto_now = False
+    try:
+        yield
+    finally:
+        field.auto_now = original
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Generate high-volume synthetic data for load testing, deterministic by seed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10000, help='Number of clients to create.')
+        parser.add_argument('--request-types', type=int, default=25, help='Number of request types to create.')
+        parser.add_argument('--requests', type=int, default=1000000, help='Number of client requests to create.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--years', type=float, default=3, help='How far back created_at is spread.')
+        parser.add_argument('--until', help='Newest created_at as YYYY-MM-DD (default: today, UTC midnight).')
+        parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent for requests per client.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows written per batch/transaction.')
+        parser.add_argument('--copy', action='store_true', help='Write with PostgreSQL COPY instead of bulk_create.')
+
+    def handle(self, *args, **options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy requires PostgreSQL.')
+        if min(options['clients'], options['request_types']) < 1 and options['requests'] > 0:
+            raise CommandError('Client requests need at least one client and one request type.')
+
+        self.rng = random.Random(options['seed'])
+        self.verbosity = options['verbosity']
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy']
+        if options['until']:
+            until_date = datetime.strptime(options['until'], '%Y-%m-%d').date()
+        else:
+            until_date = timezone.now().date()
+        self.until = datetime.combine(until_date, dt_time.min, tzinfo=dt_timezone.utc)
+        self.span = timedelta(days=365 * options['years'])
+
+        started = time.perf_counter()
+        client_ids = self.write(Client, self.client_rows(options['clients']), return_ids=True)
+        request_type_ids = self.write(RequestType, self.request_type_rows(options['request_types']), return_ids=True)
+        sla_targets = dict(RequestType.objects.filter(pk__in=request_type_ids).values_list('pk', 'sla_hours'))
+        self.write(ClientRequest, self.client_request_rows(
+            options['requests'], client_ids, request_type_ids, sla_targets, options['skew'],
+        ))
+        self.rebuild_stats()
+
+        total = options['clients'] + options['request_types'] + options['requests']
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)."
+        ))
+
+    # -----------------------------------------------------------------
+    # Row generators (plain dicts of column values, in creation order)
+    # -----------------------------------------------------------------
+    def random_created_at(self):
+        # Triangular distribution peaking at --until: more recent data than old data
+        age = self.span * (1 - self.rng.triangular(0, 1, 1))
+        return self.until - age
+
+    def client_rows(self, count):
+        for i in range(count):
+            yield {
+                'name': f'Load Client {i:06d}',
+                'email': f'client{i:06d}@load.example.com',
+                'contact_number': f'07{self.rng.randint(100000000, 999999999)}',
+                'company_url': f'https://client{i:06d}.load.example.com',
+                'created_at': self.random_created_at(),
+                'is_active': self.rng.random() < 0.9,
+            }
+
+    def request_type_rows(self, count):
+        for i in range(count):
+            base = REQUEST_TYPE_NAMES[i % len(REQUEST_TYPE_NAMES)]
+            yield {
+                'name': base if i < len(REQUEST_TYPE_NAMES) else f'{base} #{i // len(REQUEST_TYPE_NAMES) + 1}',
+                'description': f'Synthetic request type {i + 1}',
+                'sla_hours': REQUEST_TYPE_SLA_HOURS[i % len(REQUEST_TYPE_SLA_HOURS)],
+            }
+
+    def client_request_rows(self, count, client_ids, request_type_ids, sla_targets, skew):
+        # sla_targets: {request_type_id: sla_hours}, for due_at
+        # Zipf weights: the k-th client gets weight 1/k^skew; shuffled so busy clients are not just the oldest
+        client_order = list(client_ids)
+        self.rng.shuffle(client_order)
+        client_weights = list(accumulate(1 / (rank ** skew) for rank in range(1, len(client_order) + 1)))
+        # Request types are mildly skewed as well
+        type_weights = list(accumulate(1 / rank for rank in range(1, len(request_type_ids) + 1)))
+
+        for i in range(count):
+            created_at = self.random_created_at()
+            age_days = (self.until - created_at).days
+            roll = self.rng.random()
+            if age_days > 30:
+                status = 'Completed' if roll < 0.92 else ('In Progress' if roll < 0.97 else 'Pending')
+            else:
+                status = 'Completed' if roll < 0.4 else ('In Progress' if roll < 0.7 else 'Pending')
+            if status == 'Pending':
+                updated_at = created_at
+            else:
+                updated_at = min(created_at + timedelta(hours=self.rng.expovariate(1 / 48)), self.until)
+            request_type_id = self.rng.choices(request_type_ids, cum_weights=type_weights)[0]
+            # Every column is given: COPY leaves out nothing the database would fill in
+            due_at = sla.due_at(created_at, sla_targets[request_type_id])
+            yield {
+                'client_id': self.rng.choices(client_order, cum_weights=client_weights)[0],
+                'request_type_id': request_type_id,
+                'description': f'Synthetic request {i + 1}',
+                'status': status,
+                'created_at': created_at,
+                'updated_at': updated_at,
+                'due_at': due_at,
+                # Open past due as of --until; there is no status history to show late completions
+                'sla_breached': status in ClientRequest.OPEN_STATUSES and due_at is not None and due_at < self.until,
+            }
+
+    # -----------------------------------------------------------------
+    # Writers
+    # -----------------------------------------------------------------
+    def write(self, model, rows, return_ids=False):
+        # Write rows in batches; with return_ids, return the new primary keys in creation order
+        # (only wanted for clients and request types: there can be millions of client requests)
+        label = model._meta.verbose_name_plural
+        last_id = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        written = 0
+        started = time.perf_counter()
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                if self.use_copy:
+                    self.copy_batch(model, batch)
+                elif model is ClientRequest:
+                    with auto_now_disabled(ClientRequest, 'updated_at'):
+                        model.objects.bulk_create([model(**row) for row in batch])
+                else:
+                    model.objects.bulk_create([model(**row) for row in batch])
+            written += len(batch)
+            if self.verbosity > 1:
+                self.stdout.write(f'  {label}: {written} written')
+        elapsed = time.perf_counter() - started
+        if written:
+            self.stdout.write(f"{label.capitalize()}: {written} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+        if return_ids:
+            return list(model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True))
+        return None
+
+    def rebuild_stats(self):
+        # bulk_create and COPY bypass the incremental ClientStats maintenance; recompute it in batches
+        started = time.perf_counter()
+        clients = 0
+        for client_ids in stats.iter_client_id_batches(self.batch_size):
+            with transaction.atomic():
+                stats.rebuild_client_stats(client_ids)
+            clients += len(client_ids)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Client stats: {clients} rows rebuilt in {elapsed:.1f}s")
+
+    def copy_batch(self, model, batch):
+        # Stream one batch through COPY ... FROM STDIN (psycopg2)
+        columns = list(batch[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow(['' if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+        column_sql = ', '.join(connection.ops.quote_name(column) for column in columns)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} ({column_sql}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
@@ -0,0 +1,62 @@
+"""
+Import Clients, RequestTypes or ClientRequests from a CSV or JSON Lines file.
+
+The file is streamed in batches (see main/importers.py); rows that fail validation are
+reported with their line number and skipped, the rest are written with bulk_create.
+
+Usage:
+    python manage.py import_data clients clients.csv
+    python manage.py import_data requests requests.jsonl --batch-size 2000
+    python manage.py import_data requests requests.csv --dry-run
+    cat clients.jsonl | python manage.py import_data clients - --format jsonl
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.importers import IMPORT_FORMATS, IMPORTERS, detect_format, import_file
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/JSONL file of clients, request types or requests into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='What the file contains.')
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='File format (default: from the extension).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and written per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without writing anything.')
+        parser.add_argument('--max-errors', type=int, default=50, help='Row errors to print (all are counted).')
+
+    def handle(self, *args, **options):
+        file_format = options['format']
+        if not file_format:
+            if options['path'] == '-':
+                raise CommandError('--format is required when reading standard input.')
+            try:
+                file_format = detect_format(options['path'])
+            except ValueError as exc:
+                raise CommandError(exc)
+
+        if options['path'] == '-':
+            result = self.run(sys.stdin.buffer, options, file_format)
+        else:
+            try:
+                fileobj = open(options['path'], 'rb')
+            except OSError as exc:
+                raise CommandError(f"Cannot open {options['path']}: {exc}")
+            with fileobj:
+                result = self.run(fileobj, options, file_format)
+
+        for line_number, message in result.errors[:options['max_errors']]:
+            self.stderr.write(f'Line {line_number}: {message}')
+        if result.error_count > options['max_errors']:
+            self.stderr.write(f'... and {result.error_count - options["max_errors"]} more errors.')
+        style = self.style.SUCCESS if not result.error_count else self.style.WARNING
+        self.stdout.write(style(result.summary()))
+
+    def run(self, fileobj, options, file_format):
+        return import_file(
+            fileobj, options['kind'], file_format,
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+        )
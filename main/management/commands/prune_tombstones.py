@@ -0,0 +1,34 @@
+"""
+Delete change-feed tombstones (ClientRequestTombstone) older than the retention period.
+
+Deleted requests leave a tombstone so change-feed consumers (main/changes.py) learn about the
+deletion. Once every consumer has synced past it, it is only dead weight; cursors older than
+the retention are refused with 410 Gone, so run this daily (e.g. from cron).
+
+Usage:
+    python manage.py prune_tombstones
+    python manage.py prune_tombstones --days 7
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.changes import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete change-feed tombstones older than CHANGE_FEED_TOMBSTONE_DAYS, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_FEED_TOMBSTONE_DAYS,
+            help='Keep tombstones this many days (default CHANGE_FEED_TOMBSTONE_DAYS).',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000, help='Tombstones deleted per query.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        deleted = prune_tombstones(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} tombstones older than {options["days"]} days deleted.'))
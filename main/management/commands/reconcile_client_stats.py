@@ -0,0 +1,55 @@
+"""
+Rebuild the per-client request counters (ClientStats) from ClientRequest.
+
+ClientStats is maintained incrementally; this recomputes it for every client, a batch of
+clients at a time (one grouped aggregate and one upsert per batch), to repair drift after
+raw SQL / COPY loads or to fill it for the first time.
+
+Usage:
+    python manage.py reconcile_client_stats
+    python manage.py reconcile_client_stats --check       ← report drift, write nothing
+    python manage.py reconcile_client_stats --batch-size 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main import stats
+from main.models import ClientStats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-client request counters shown on the Client admin, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Clients recomputed per batch/transaction.')
+        parser.add_argument('--check', action='store_true', help='Only report clients whose counters have drifted.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        clients = drifted = 0
+        fields = [*stats.COUNTER_FIELDS, 'last_request_at']
+        for client_ids in stats.iter_client_id_batches(options['batch_size']):
+            with transaction.atomic():
+                existing = {
+                    row['client_id']: row
+                    for row in ClientStats.objects.filter(client_id__in=client_ids).values('client_id', *fields)
+                }
+                fresh = stats.fresh_stats(client_ids)
+                changed = [
+                    row for row in fresh
+                    if existing.get(row.client_id) != {'client_id': row.client_id, **{f: getattr(row, f) for f in fields}}
+                ]
+                if changed and not options['check']:
+                    stats.save_client_stats(changed)
+            clients += len(client_ids)
+            drifted += len(changed)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {clients} clients checked, {drifted} out of date')
+
+        elapsed = time.perf_counter() - started
+        verb = 'are out of date' if options['check'] else 'were rebuilt'
+        self.stdout.write(self.style.SUCCESS(
+            f'{clients} clients checked in {elapsed:.1f}s; {drifted} stats rows {verb}.'
+        ))
@@ -0,0 +1,59 @@
+"""
+Work through the background job queue (main/jobs.py).
+
+Polls for due jobs every --sleep seconds and runs them one at a time. Run as many workers as
+needed, on any hosts sharing the database: each job is claimed by exactly one of them. On
+SIGTERM or SIGINT the worker finishes the job in hand and exits; a worker that is killed outright
+leaves its job to be picked up again after JOBS_STALE_SECONDS.
+
+Usage:
+    python manage.py run_jobs              # run until stopped
+    python manage.py run_jobs --once       # run the jobs that are due, then exit
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.jobs import claim, requeue_stale, run, worker_name
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due.')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds between polls of an empty queue.')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after this many jobs (0: no limit).')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        previous = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            self.work(worker_name(), options)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            close_old_connections()
+
+    def work(self, worker, options):
+        ran = 0
+        while not self.stopping:
+            # Like a request, each job starts with a usable connection (CONN_MAX_AGE applies)
+            close_old_connections()
+            requeue_stale()
+            job = claim(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            run(job)
+            ran += 1
+            self.stdout.write(f'Job {job.pk} ({job.task}) {job.status}.')
+            if options['max_jobs'] and ran >= options['max_jobs']:
+                break
+
+    def stop(self, signum, frame):
+        self.stopping = True
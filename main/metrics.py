@@ -0,0 +1,141 @@
+"""
+Prometheus metrics, served at /metrics for the load balancer's scraper.
+
+    django_http_requests_total{view, method, status}          requests, by URL name
+    django_http_request_duration_seconds{view}                latency histogram
+    django_db_queries_per_request{view}                       queries per request histogram
+    django_db_query_duration_seconds{alias}                   per-query latency histogram
+    django_db_requests_total{alias, connection}               requests that used the database,
+                                                              on a "reused" or "new" connection
+    django_db_connections_opened_total{alias}                 connections opened
+    django_cache_requests_total{cache, result}                cache lookups, "hit" or "miss"
+    crms_client_requests{status}                              ClientRequests by status
+
+Requests, queries and cache lookups are observed by PerfMiddleware (main/perf.py) and the
+instrumented caches (main/cache.py), so nothing is measured twice. The reuse rate of
+persistent connections (CONN_MAX_AGE) is
+
+    sum(rate(django_db_requests_total{connection="reused"}[5m])) / sum(rate(django_db_requests_total[5m]))
+
+ClientRequest counts are read at scrape time from the ClientStats counters (main/stats.py),
+one aggregate over a table with a row per client rather than a count over every request.
+
+Under gunicorn each worker is a separate process with its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py sets it), every process writes its
+metrics to files there and /metrics merges them, so a scrape sees the whole server whichever
+worker answers; gunicorn.conf.py clears the directory on start and marks exited workers dead.
+/metrics needs "Authorization: Bearer <METRICS_TOKEN>". Without a token it answers 403, except
+with DEBUG on, where private and loopback addresses are served for local development: behind
+the platform's proxy every request arrives from a private address, so the address proves nothing.
+"""
+import hmac
+import ipaddress
+import os
+
+from django.conf import settings
+from django.db import models
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from .models import ClientStats
+from .stats import STATUS_COUNTERS
+
+REQUESTS = Counter('django_http_requests_total', 'HTTP requests by URL name.', ['view', 'method', 'status'])
+REQUEST_DURATION = Histogram(
+    'django_http_request_duration_seconds', 'Time to the response (first byte for streams), by URL name.', ['view'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+QUERIES_PER_REQUEST = Histogram(
+    'django_db_queries_per_request', 'Database queries per request, by URL name.', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+QUERY_DURATION = Histogram(
+    'django_db_query_duration_seconds', 'Database query time, by connection alias.', ['alias'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_REQUESTS = Counter(
+    'django_db_requests_total', 'Requests that used the database, by whether the connection was reused.',
+    ['alias', 'connection'],
+)
+CONNECTIONS_OPENED = Counter('django_db_connections_opened_total', 'Database connections opened.', ['alias'])
+CACHE_REQUESTS = Counter('django_cache_requests_total', 'Cache lookups by result.', ['cache', 'result'])
+
+
+def observe_request(view, method, status, seconds, queries):
+    REQUESTS.labels(view, method, status).inc()
+    REQUEST_DURATION.labels(view).observe(seconds)
+    QUERIES_PER_REQUEST.labels(view).observe(queries)
+
+
+def observe_query(alias, seconds):
+    QUERY_DURATION.labels(alias).observe(seconds)
+
+
+def observe_connection(alias, reused):
+    DB_REQUESTS.labels(alias, 'reused' if reused else 'new').inc()
+
+
+def observe_cache(cache, hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels(cache, 'hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels(cache, 'miss').inc(misses)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    CONNECTIONS_OPENED.labels(connection.alias).inc()
+
+
+# Read at scrape time in the process serving /metrics, so it is never merged across workers
+class ClientRequestCollector:
+    def collect(self):
+        totals = ClientStats.objects.aggregate(**{field: models.Sum(field) for field in STATUS_COUNTERS.values()})
+        family = GaugeMetricFamily('crms_client_requests', 'ClientRequests by status.', labels=['status'])
+        for status, field in STATUS_COUNTERS.items():
+            family.add_metric([status], totals[field] or 0)
+        yield family
+
+
+class RegistryCollector:
+    # Adapts the default registry so it can be combined with other collectors
+    def __init__(self, source):
+        self.source = source
+
+    def collect(self):
+        return self.source.collect()
+
+
+def registry():
+    # Metrics of every worker when running multiprocess, else this process's; plus the request counts
+    scrape = CollectorRegistry()
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        MultiProcessCollector(scrape)
+    else:
+        scrape.register(RegistryCollector(REGISTRY))
+    scrape.register(ClientRequestCollector())
+    return scrape
+
+
+def allowed(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not settings.DEBUG:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return address.is_private or address.is_loopback
+
+
+def metrics_view(request):
+    if not allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_alter_clientrequest_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['-created_at', '-id'], name='client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='client_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='clientreq_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='clientreq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['client', '-created_at'], name='clientreq_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(condition=models.Q(('status__in', ['Pending', 'In Progress'])), fields=['-created_at'], name='clientreq_open_created_idx'),
+        ),
+    ]
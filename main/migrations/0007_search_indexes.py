@@ -0,0 +1,45 @@
+# Trigram and full-text GIN indexes backing main/search.py.
+# PostgreSQL only: on other databases (e.g. SQLite in tests) this migration is a no-op
+# and the admin search falls back to the portable 'basic' backend.
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# (model name, index) pairs; trigram indexes make ICONTAINS ('%term%') lookups indexable
+SEARCH_INDEXES = [
+    ('client', GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='client_name_trgm_idx')),
+    ('client', GinIndex(fields=['email'], opclasses=['gin_trgm_ops'], name='client_email_trgm_idx')),
+    ('client', GinIndex(fields=['contact_number'], opclasses=['gin_trgm_ops'], name='client_contact_trgm_idx')),
+    ('client', GinIndex(fields=['company_url'], opclasses=['gin_trgm_ops'], name='client_url_trgm_idx')),
+    ('requesttype', GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='requesttype_name_trgm_idx')),
+    ('clientrequest', GinIndex(fields=['description'], opclasses=['gin_trgm_ops'], name='clientreq_desc_trgm_idx')),
+    # Expression must match FullTextSearch.vector() exactly for the planner to use it
+    ('clientrequest', GinIndex(SearchVector('description', config='english'), name='clientreq_desc_fts_idx')),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, index in SEARCH_INDEXES:
+        schema_editor.add_index(apps.get_model('main', model_name), index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, index in SEARCH_INDEXES:
+        schema_editor.remove_index(apps.get_model('main', model_name), index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_clientrequest_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+STATUS_COUNTERS = {'Pending': 'pending', 'In Progress': 'in_progress', 'Completed': 'completed'}
+
+
+def populate_client_stats(apps, schema_editor):
+    # Fill ClientStats for existing clients, a batch of clients (paged by pk) at a time.
+    # Mirrors main.stats.fresh_stats, which cannot be imported here (it uses the live models).
+    Client = apps.get_model('main', 'Client')
+    ClientRequest = apps.get_model('main', 'ClientRequest')
+    ClientStats = apps.get_model('main', 'ClientStats')
+    db = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        client_ids = list(Client.objects.using(db).filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:2000])
+        if not client_ids:
+            return
+        rows = (
+            ClientRequest.objects.using(db)
+            .filter(client_id__in=client_ids)
+            .values('client_id')
+            .annotate(
+                last_request_at=models.Max('created_at'),
+                **{
+                    field: models.Count('pk', filter=models.Q(status=status))
+                    for status, field in STATUS_COUNTERS.items()
+                },
+            )
+            .order_by()
+        )
+        by_client = {row.pop('client_id'): row for row in rows}
+        ClientStats.objects.using(db).bulk_create(
+            [ClientStats(client_id=client_id, **by_client.get(client_id, {})) for client_id in client_ids]
+        )
+        last_id = client_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientStats',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='main.client')),
+                ('pending', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('last_request_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'client stats',
+                'indexes': [models.Index(fields=['-pending'], name='clientstats_pending_idx'), models.Index(fields=['-in_progress'], name='clientstats_in_progress_idx'), models.Index(fields=['-completed'], name='clientstats_completed_idx'), models.Index(fields=['-last_request_at'], name='clientstats_last_request_idx')],
+            },
+        ),
+        migrations.RunPython(populate_client_stats, migrations.RunPython.noop),
+    ]
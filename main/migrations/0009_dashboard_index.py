@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_client_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['status', '-updated_at'], name='clientreq_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_dashboard_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='clientreq_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:38
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_api_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientRequestTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.BigIntegerField()),
+                ('client_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx')],
+            },
+        ),
+    ]
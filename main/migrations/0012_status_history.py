@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0011_change_feed_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientRequestStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=20, null=True)),
+                ('to_status', models.CharField(choices=[('Pending', 'Pending'), ('In Progress', 'In Progress'), ('Completed', 'Completed')], max_length=20, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('request', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_history', to='main.clientrequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['request', 'changed_at', 'id'], name='statuschange_request_idx'), models.Index(fields=['to_status', 'changed_at'], name='statuschange_to_status_idx')],
+            },
+        ),
+    ]
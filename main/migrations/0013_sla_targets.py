@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientrequest',
+            name='due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='clientrequest',
+            name='sla_breached',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='requesttype',
+            name='sla_hours',
+            field=models.PositiveIntegerField(blank=True, help_text='Hours a request of this type may stay open; blank for no target.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(condition=models.Q(('status__in', ['Pending', 'In Progress'])), fields=['due_at'], name='clientreq_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientrequest',
+            index=models.Index(condition=models.Q(('sla_breached', True)), fields=['-created_at'], name='clientreq_breached_created_idx'),
+        ),
+    ]
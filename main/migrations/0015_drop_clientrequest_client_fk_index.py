@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_job_queue'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clientrequest',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='main.client'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:44
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_drop_clientrequest_client_fk_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='job',
+            name='payload',
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, router, transaction
 from django.utils import timezone
 
 
@@ -11,6 +14,14 @@ class Client(models.Model):
     created_at = models.DateTimeField(default=timezone.now) # Timestamp when client was created
     is_active = models.BooleanField(default=True) # Flag to indicate if client is active
 
+    class Meta:
+        # Indexes mirror the ClientAdmin changelist: newest first, optionally filtered by is_active.
+        # The trailing id matches the admin's deterministic '-pk' tie-breaker so no extra sort is needed.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='client_created_idx'),
+            models.Index(fields=['is_active', '-created_at', '-id'], name='client_active_created_idx'),
+        ]
+
     def __str__(self):
         # String representation for easy identification in admin or logs
         return f'{self.id} | {self.name} | {self.company_url} | {self.is_active}'
@@ -19,10 +30,85 @@ class Client(models.Model):
 class RequestType(models.Model):
     name = models.CharField(max_length=255) # Name of the request type
     description = models.TextField(blank=True, null=True) # Optional detailed description
+    sla_hours = models.PositiveIntegerField(
+        blank=True, null=True, help_text='Hours a request of this type may stay open; blank for no target.',
+    ) # SLA target (main/sla.py)
 
     def __str__(self):
         return f'{self.id} | {self.name}'
 
+# QuerySet for ClientRequest whose bulk writes keep ClientStats in step (see main/stats.py)
+class ClientRequestQuerySet(models.QuerySet):
+    def status_counts(self):
+        # (client_id, status, count) for the rows in this queryset, from one grouped query.
+        # Filtering by pk keeps search annotations and DISTINCT out of the GROUP BY.
+        rows = (
+            self.model._base_manager.using(self.db)
+            .filter(pk__in=self.order_by().values('pk'))
+            .values_list('client_id', 'status')
+            .annotate(count=models.Count('pk'))
+            .order_by()
+        )
+        return list(rows)
+
+    def status_rows(self, limit):
+        # (id, client_id, status) of up to limit rows, filtered by pk like status_counts()
+        rows = (
+            self.model._base_manager.using(self.db)
+            .filter(pk__in=self.order_by().values('pk'))
+            .values_list('pk', 'client_id', 'status')
+            .order_by()
+        )
+        return list(rows[:limit])
+
+    def set_status(self, status, user=None):
+        # Bulk status change (one UPDATE) that also adjusts the per-client counters, records the
+        # transitions in the status history (main/history.py, made by `user` if given) and
+        # publishes them (main/events.py). Returns the number of rows updated, like update().
+        from . import events, history, stats
+
+        with transaction.atomic(using=self.db):
+            changing = self.exclude(status=status)
+            # Small changes (the usual admin action) are read row by row so events can list ids;
+            # larger ones fall back to the grouped counts
+            rows = changing.status_rows(events.EVENTS_MAX_IDS + 1)
+            if len(rows) <= events.EVENTS_MAX_IDS:
+                counts = Counter((client_id, previous) for _, client_id, previous in rows)
+                removed = [(client_id, previous, count) for (client_id, previous), count in counts.items()]
+                published = events.group_events('status_changed', [
+                    (pk, client_id, previous, status) for pk, client_id, previous in rows
+                ])
+            else:
+                removed = changing.status_counts()
+                published = [
+                    events.make_event('status_changed', client_id, status, previous, count)
+                    for client_id, previous, count in removed
+                ]
+            history.record_transitions(
+                self.model._base_manager.using(self.db).filter(pk__in=changing.order_by().values('pk')), status, user=user,
+            )
+            updated = self.update(status=status, updated_at=timezone.now())
+            deltas = stats.counter_deltas(
+                removed=removed,
+                added=[(client_id, status, count) for client_id, _, count in removed],
+            )
+            stats.apply_deltas(deltas, using=self.db)
+            events.publish(published, using=self.db)
+        return updated
+
+    def delete(self):
+        from . import changes, stats
+
+        with transaction.atomic(using=self.db):
+            removed = self.status_counts()
+            changes.record_tombstones(self)
+            result = super().delete()
+            stats.record_deleted(removed, using=self.db)
+        return result
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 # Define the ClientRequest model representing a request made by a client
 class ClientRequest(models.Model):
     # Status choices for tracking progress of the request
@@ -32,12 +118,225 @@ class ClientRequest(models.Model):
         ('Completed', 'Completed'),
     ]
 
-    client = models.ForeignKey(Client, on_delete=models.CASCADE) # Link to the client who made the request; cascade deletes
+    # Link to the client who made the request; cascade deletes. Not indexed on its own:
+    # clientreq_client_created_idx leads with client and serves every client_id lookup.
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, db_index=False)
     request_type = models.ForeignKey(RequestType, on_delete=models.CASCADE) # Type/category of request
     description = models.TextField(blank=True, null=True) # Optional detailed description of the request
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, null=True) # Current status of the request
     created_at = models.DateTimeField(default=timezone.now) # Timestamp when request was created
     updated_at = models.DateTimeField(auto_now=True) # Timestamp when request was last updated
+    due_at = models.DateTimeField(blank=True, null=True, editable=False) # created_at + the type's SLA target (main/sla.py)
+    sla_breached = models.BooleanField(default=False, editable=False) # Missed its SLA target; kept by 'manage.py compute_sla'
+
+    objects = ClientRequestQuerySet.as_manager()
+
+    # Statuses that still need work (kept in step with the partial index condition below)
+    OPEN_STATUSES = ['Pending', 'In Progress']
+
+    class Meta:
+        # Indexes mirror the ClientRequestAdmin changelist, which orders by '-created_at' (plus '-pk')
+        # and filters on status and created_at ranges, and the per-client inline on the Client page.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='clientreq_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='clientreq_status_created_idx'),
+            models.Index(fields=['client', '-created_at'], name='clientreq_client_created_idx'),
+            # Admin dashboard: requests completed per day (status changes stamp updated_at)
+            models.Index(fields=['status', '-updated_at'], name='clientreq_status_updated_idx'),
+            # JSON API: MAX(updated_at) validates request lists before they are queried, and the
+            # change feed reads forward from an (updated_at, id) cursor
+            models.Index(fields=['updated_at', 'id'], name='clientreq_updated_idx'),
+            # Partial index: open requests are a small, hot slice of the table
+            models.Index(
+                fields=['-created_at'],
+                name='clientreq_open_created_idx',
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+            ),
+            # SLA filters (main/sla.py): open requests by due date, and those that missed their target
+            models.Index(
+                fields=['due_at'],
+                name='clientreq_open_due_idx',
+                condition=models.Q(status__in=['Pending', 'In Progress']),
+            ),
+            models.Index(
+                fields=['-created_at'],
+                name='clientreq_breached_created_idx',
+                condition=models.Q(sla_breached=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.id} | {self.client.name} | {self.request_type.name} | {self.status} | {self.updated_at}'
+
+    # Remember the values loaded from the database, so save() knows which counters to move
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stats_state = instance.stats_state()
+        instance._sla_state = instance.sla_state()
+        return instance
+
+    def stats_state(self):
+        # Values ClientStats depends on; None when a deferred field was not loaded
+        if {'client_id', 'status', 'created_at'} & self.get_deferred_fields():
+            return None
+        return (self.client_id, self.status, self.created_at)
+
+    def sla_state(self):
+        # Values due_at derives from; None when a deferred field was not loaded
+        if {'request_type_id', 'created_at'} & self.get_deferred_fields():
+            return None
+        return (self.request_type_id, self.created_at)
+
+    def save(self, *args, **kwargs):
+        from . import events, history, sla, stats
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # due_at only changes with the request type or created_at, so other edits do not read the
+        # request type (a query when only request_type_id is set)
+        if self._state.adding or getattr(self, '_sla_state', None) != (self.request_type_id, self.created_at):
+            self.due_at = sla.due_at(self.created_at, self.request_type.sla_hours)
+        previous = getattr(self, '_stats_state', None)
+        adding = self._state.adding
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            stats.record_saved(self, previous, created=adding, using=using)
+            history.record_saved(self, previous, created=adding, using=using)
+            if adding:
+                events.publish(events.created_events([self]), using=using)
+            elif previous is None or previous[1] != self.status:
+                # Without the loaded values the status may have changed, so say so
+                previous_status = previous[1] if previous else None
+                events.publish([events.make_event('status_changed', self.client_id, self.status, previous_status, 1, [self.pk])], using=using)
+        self._stats_state = self.stats_state()
+        self._sla_state = self.sla_state()
+
+    def delete(self, *args, **kwargs):
+        from . import changes, stats
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        previous = getattr(self, '_stats_state', None) or self.stats_state()
+        # Loaded with deferred fields: the old values are unknown, so the client is recounted
+        # (client_id is read now, as a deferred field cannot be loaded once the row is gone)
+        client_id = self.client_id if previous is None else None
+        with transaction.atomic(using=using):
+            changes.record_tombstones(ClientRequest.objects.using(using).filter(pk=self.pk))
+            result = super().delete(*args, **kwargs)
+            if previous is None:
+                stats.rebuild_client_stats([client_id], using=using)
+            else:
+                stats.record_deleted([(previous[0], previous[1], 1)], using=using)
+        return result
+
+
+# Append-only history of ClientRequest statuses: a row when a request is created and one per status
+# change, written in bulk by every write path (main/history.py). Rows outlive their request, so
+# ClientRequest keeps no reverse cascade and can still be fast-deleted; deletions are in ClientRequestTombstone.
+class ClientRequestStatusChange(models.Model):
+    request = models.ForeignKey(
+        ClientRequest, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='status_history',
+    ) # The request whose status changed (indexed by statuschange_request_idx)
+    from_status = models.CharField(max_length=20, choices=ClientRequest.STATUS_CHOICES, null=True) # Previous status; NULL for the creation
+    to_status = models.CharField(max_length=20, choices=ClientRequest.STATUS_CHOICES, null=True) # New status
+    changed_at = models.DateTimeField(default=timezone.now) # When the change was written
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='+',
+    ) # Who made it, when known (admin actions, batch API)
+
+    class Meta:
+        indexes = [
+            # A request's timeline, oldest first
+            models.Index(fields=['request', 'changed_at', 'id'], name='statuschange_request_idx'),
+            # Changes into a status over a date range, e.g. completions per day
+            models.Index(fields=['to_status', 'changed_at'], name='statuschange_to_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.request_id} | {self.from_status} -> {self.to_status} | {self.changed_at}'
+
+
+# Denormalised per-client request counters, kept up to date incrementally by main/stats.py
+# so ClientAdmin can show (and sort by) workload without counting ClientRequest per page
+class ClientStats(models.Model):
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    pending = models.IntegerField(default=0) # Requests with status Pending
+    in_progress = models.IntegerField(default=0) # Requests with status In Progress
+    completed = models.IntegerField(default=0) # Requests with status Completed
+    last_request_at = models.DateTimeField(blank=True, null=True) # created_at of the client's newest request
+
+    class Meta:
+        verbose_name_plural = 'client stats'
+        # One index per sortable ClientAdmin column
+        indexes = [
+            models.Index(fields=['-pending'], name='clientstats_pending_idx'),
+            models.Index(fields=['-in_progress'], name='clientstats_in_progress_idx'),
+            models.Index(fields=['-completed'], name='clientstats_completed_idx'),
+            models.Index(fields=['-last_request_at'], name='clientstats_last_request_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.client_id} | {self.pending} pending | {self.in_progress} in progress | {self.completed} completed'
+
+# Deleted ClientRequests, so change-feed consumers (main/changes.py) learn about deletions.
+# Kept for CHANGE_FEED_TOMBSTONE_DAYS, then removed by 'manage.py prune_tombstones'.
+class ClientRequestTombstone(models.Model):
+    request_id = models.BigIntegerField() # id of the deleted ClientRequest (the row itself is gone)
+    client_id = models.BigIntegerField() # Client the request belonged to
+    deleted_at = models.DateTimeField(default=timezone.now) # When the request was deleted
+
+    class Meta:
+        # The change feed reads forward from a (deleted_at, id) cursor
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.request_id} | deleted {self.deleted_at}'
+
+
+# Background job run by 'manage.py run_jobs' (main/jobs.py): long admin actions and imports are
+# queued here instead of running inside the HTTP request
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100) # Registered task name (main/jobs.py)
+    args = models.JSONField(default=dict, blank=True) # Keyword arguments; tasks also checkpoint their position here
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0) # Runs started so far
+    max_attempts = models.PositiveIntegerField(default=3) # Failed runs are retried until this many
+    run_after = models.DateTimeField(default=timezone.now) # Not picked up before this (retry backoff)
+    progress_done = models.PositiveIntegerField(default=0) # Items processed
+    progress_total = models.PositiveIntegerField(blank=True, null=True) # Items to process, when known
+    message = models.TextField(blank=True) # Latest progress or outcome message
+    result = models.JSONField(blank=True, null=True) # Outcome details, e.g. rejected import rows
+    error = models.TextField(blank=True) # Traceback of the last failed run
+    worker = models.CharField(max_length=255, blank=True) # host:pid of the worker running it
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True, related_name='+',
+    ) # Who queued it; the task runs with this user's permissions
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True) # Start of the latest run
+    heartbeat_at = models.DateTimeField(blank=True, null=True) # Last progress report of a running job
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers take the oldest due job from the queued slice
+            models.Index(fields=['run_after', 'id'], name='job_queued_idx', condition=models.Q(status='queued')),
+            # Running jobs whose worker stopped reporting are requeued
+            models.Index(fields=['heartbeat_at'], name='job_running_idx', condition=models.Q(status='running')),
+            # JobAdmin changelist, newest first
+            models.Index(fields=['-created_at', '-id'], name='job_created_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.id} | {self.client.name} | {self.request_type.name} | {self.status} | {self.updated_at}'
\ No newline at end of file
+        return f'{self.id} | {self.task} | {self.status}'
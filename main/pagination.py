@@ -0,0 +1,210 @@
+"""
+Keyset (cursor) pagination and estimated counts for the admin changelists.
+
+Django's admin paginator runs an exact COUNT(*) and pages with OFFSET, both of which get
+slower the deeper you page on a large table. KeysetChangeList instead seeks straight to the
+next page with a WHERE on the changelist ordering, e.g. for '-created_at, -pk':
+
+    created_at <= :ts AND (created_at < :ts OR id < :id) ORDER BY created_at DESC, id DESC LIMIT n
+
+which the (created_at, id) indexes from migration 0006 answer without scanning skipped rows.
+Pages are addressed by an opaque 'cursor' query parameter. When the user sorts by another
+column, or a ranked search is active, the changelist falls back to numbered pages.
+
+EstimatedCountPaginator replaces the exact count of unfiltered changelists with PostgreSQL's
+planner estimate (pg_class.reltuples), or a briefly cached exact count on other databases.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .search import RankedSearchChangeList
+
+# Query string parameter carrying the keyset cursor
+CURSOR_VAR = 'cursor'
+
+
+def encode_cursor(direction, values):
+    # Opaque, URL-safe token: direction ('next' or 'prev') plus the boundary row's ordering values
+    payload = json.dumps([direction] + [value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor_values(token):
+    # Direction and raw (JSON) ordering values of a cursor; raises ValueError for anything malformed
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, *values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if direction not in ('next', 'prev'):
+        raise ValueError('Invalid cursor')
+    return direction, values
+
+
+def decode_cursor(token):
+    # Inverse of encode_cursor for a (timestamp, pk) ordering; raises ValueError for anything malformed
+    direction, values = decode_cursor_values(token)
+    if len(values) != 2:
+        raise ValueError('Invalid cursor')
+    timestamp, pk = values
+    timestamp = parse_datetime(timestamp) if isinstance(timestamp, str) else None
+    if timestamp is None or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return direction, timestamp, pk
+
+
+def keyset_filter(queryset, field_name, descending, value, pk, after=True):
+    # Rows strictly after (or before) the boundary row in (field, pk) order.
+    # The redundant range bound on the field lets the index scan start at the boundary.
+    if descending == after:
+        return queryset.filter(**{f'{field_name}__lte': value}).exclude(**{field_name: value, 'pk__gte': pk})
+    return queryset.filter(**{f'{field_name}__gte': value}).exclude(**{field_name: value, 'pk__lte': pk})
+
+
+def estimated_row_count(model, using='default'):
+    # Planner estimate of a table's row count on PostgreSQL, None when unknown or on other databases
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 (or 0) before the table has been vacuumed/analysed
+    return row[0] if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    # Paginator whose count is estimated for unfiltered querysets on large tables
+    @cached_property
+    def count(self):
+        self.count_is_estimate = False
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return super().count
+        threshold = getattr(settings, 'ADMIN_ESTIMATED_COUNT_THRESHOLD', 10000)
+        estimate = estimated_row_count(queryset.model, queryset.db)
+        if estimate is not None:
+            if estimate < threshold:
+                # Small tables are cheap to count exactly, and estimates there are noisy
+                return super().count
+            self.count_is_estimate = True
+            return estimate
+        # Other databases: count exactly, and share large counts across requests for a short while
+        cache_key = f'admin-count:{queryset.db}:{queryset.model._meta.db_table}'
+        cached_count = cache.get(cache_key)
+        if cached_count is not None:
+            self.count_is_estimate = True
+            return cached_count
+        count = super().count
+        if count >= threshold:
+            cache.set(cache_key, count, getattr(settings, 'ADMIN_COUNT_CACHE_SECONDS', 60))
+        return count
+
+
+# Paginator that never counts: each page fetches one extra row to learn whether another follows.
+# Used for autocomplete lookups, where select2 only needs to know if there is "more".
+class LookaheadPaginator(Paginator):
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        # A lower bound on the count that makes has_next() true exactly when a row was left over
+        self.count = bottom + len(rows)
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(rows[:self.per_page], number, self)
+
+
+# Changelist that pages by keyset whenever the effective ordering is the admin's default
+# '-created_at, -pk' (or any '<field>, pk' pair with matching directions)
+class KeysetChangeList(RankedSearchChangeList):
+    keyset_ordering = ('-created_at', '-pk')
+
+    def get_queryset(self, request, *args, **kwargs):
+        # Keep the cursor out of self.params so filter/sort links start again from the first page
+        self.cursor = self.params.pop(CURSOR_VAR, None)
+        return super().get_queryset(request, *args, **kwargs)
+
+    def keyset_applies(self):
+        # The changelist can repeat the default ordering, so compare without duplicates.
+        # list_editable needs a queryset of results, so it keeps numbered pages.
+        ordering = tuple(dict.fromkeys(self.queryset.query.order_by))
+        return ordering == tuple(self.keyset_ordering) and not self.show_all and not self.list_editable
+
+    def get_results(self, request):
+        self.keyset_pagination = self.keyset_applies()
+        if not self.keyset_pagination:
+            if self.cursor:
+                raise IncorrectLookupParameters('Cursor pagination needs the default ordering')
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        field_order = self.keyset_ordering[0]
+        descending = field_order.startswith('-')
+        field_name = field_order.lstrip('-')
+
+        direction = 'next'
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                direction, value, pk = decode_cursor(self.cursor)
+            except ValueError:
+                raise IncorrectLookupParameters('Invalid cursor')
+            queryset = keyset_filter(queryset, field_name, descending, value, pk, after=(direction == 'next'))
+            if direction == 'prev':
+                queryset = queryset.reverse()
+
+        # Fetch one extra row to learn whether another page exists in this direction
+        rows = list(queryset[:self.list_per_page + 1])
+        has_more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if direction == 'prev':
+            rows.reverse()
+
+        self.has_next_page = has_more if direction == 'next' else True
+        self.has_previous_page = bool(self.cursor) and (has_more if direction == 'prev' else True)
+        # Links for the pagination template; self.params no longer holds the current cursor
+        self.first_page_url = self.get_query_string()
+        self.next_page_url = (
+            self.get_query_string({CURSOR_VAR: encode_cursor('next', [getattr(rows[-1], field_name), rows[-1].pk])})
+            if rows and self.has_next_page else None
+        )
+        self.previous_page_url = (
+            self.get_query_string({CURSOR_VAR: encode_cursor('prev', [getattr(rows[0], field_name), rows[0].pk])})
+            if rows and self.has_previous_page else None
+        )
+
+        self.result_count = paginator.count
+        self.count_is_estimate = getattr(paginator, 'count_is_estimate', False)
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        if self.show_full_result_count:
+            full_paginator = self.model_admin.get_paginator(request, self.root_queryset, self.list_per_page)
+            self.full_result_count = full_paginator.count
+        else:
+            self.full_result_count = None
+        self.show_admin_actions = not self.show_full_result_count or bool(self.full_result_count)
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = self.has_next_page or self.has_previous_page
+        self.paginator = paginator
+
+
+# ModelAdmin mixin enabling keyset pagination and estimated counts on the changelist
+class KeysetPaginationMixin:
+    paginator = EstimatedCountPaginator
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,244 @@
+"""
+Per-request latency and query instrumentation, and the data behind the admin performance page.
+
+PerfMiddleware times every request that reaches a view and, through a database execute
+wrapper, counts its queries and the time spent in them. It then:
+
+- adds the request to this process's per-view statistics (the last PERF_SAMPLES requests
+  of each view), shown as p50/p95/p99 on Admin -> Performance
+- logs one JSON line to the 'main.perf' logger when the request was slow (PERF_SLOW_MS),
+  ran more than PERF_MAX_QUERIES queries, or repeated one query shape PERF_DUPLICATE_QUERIES
+  times or more. The last is the N+1 pattern: a query per row of a list, which differs only
+  in its parameters, so queries are compared by their SQL with literals and IN lists folded.
+
+    {"view": "custom_admin:main_client_changelist", "method": "GET", "status": 200, "wall_ms": 812.4,
+     "queries": 64, "db_ms": 420.7, "slow": true, "duplicates": [{"count": 50, "sql": "SELECT ..."}]}
+
+Statistics are per process, like the cache counters, so with several workers each reports
+its own traffic; the same measurements also feed the Prometheus metrics (main/metrics.py),
+which are merged across workers. Views are keyed by URL name; unresolved URLs (404s) are grouped together.
+Streaming responses are timed until their first byte.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('main.perf')
+
+# Requests kept per view for the percentiles
+PERF_SAMPLES = 1000
+# Duplicate query shapes kept per view for the admin page
+PERF_TOP_DUPLICATES = 5
+
+# The profile of the request being handled in this thread / async task, if any
+current_profile = ContextVar('current_profile', default=None)
+
+IN_LIST = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))+\)')
+VALUES_LIST = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.IGNORECASE)
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def query_signature(sql):
+    # SQL with parameters, literals, IN lists and multi-row VALUES folded, so the queries of
+    # an N+1 loop share one signature
+    sql = VALUES_LIST.sub(r'\1, ...', sql)
+    sql = IN_LIST.sub('(...)', sql)
+    return LITERAL.sub('?', sql)
+
+
+class RequestProfile:
+    def __init__(self, metrics=None, open_aliases=None):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.signatures = Counter()
+        self.metrics = metrics
+        # Aliases whose connection was already open when the request started (None: unknown)
+        self.open_aliases = open_aliases
+        self.aliases = set()
+
+    def record_query(self, sql, elapsed, alias):
+        self.queries += 1
+        self.db_time += elapsed
+        self.signatures[query_signature(sql)] += 1
+        self.aliases.add(alias)
+        if self.metrics is not None:
+            self.metrics.observe_query(alias, elapsed)
+
+    def duplicates(self):
+        # (count, signature) of the query shapes repeated PERF_DUPLICATE_QUERIES times or more
+        threshold = settings.PERF_DUPLICATE_QUERIES
+        return [(count, sql) for sql, count in self.signatures.most_common() if count >= threshold]
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    # Installed once on every connection; only measures while a request is being profiled
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - started, context['connection'].alias)
+
+
+def install(connection):
+    # First in the list: connection.execute_wrapper() removes the last wrapper on exit, and a
+    # connection can open (and install this) inside such a block
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, execute_wrapper)
+
+
+@receiver(connection_created)
+def install_on_new_connection(sender, connection, **kwargs):
+    install(connection)
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of a non-empty sorted list
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+class ViewStats:
+    # Recent samples and totals for one view, shared by every thread in the process
+    def __init__(self):
+        self.samples = deque(maxlen=PERF_SAMPLES)
+        self.requests = 0
+        self.slow = 0
+        self.duplicated = 0
+        self.duplicates = Counter()
+
+    def record(self, wall_ms, queries, db_ms, slow, duplicates):
+        self.samples.append((wall_ms, queries, db_ms))
+        self.requests += 1
+        self.slow += slow
+        self.duplicated += bool(duplicates)
+        for count, sql in duplicates:
+            self.duplicates[sql] = max(self.duplicates[sql], count)
+
+    def summary(self):
+        columns = [sorted(column) for column in zip(*self.samples)]
+        wall, queries, db = columns
+        return {
+            'requests': self.requests,
+            'samples': len(self.samples),
+            'wall_ms': {name: percentile(wall, fraction) for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))},
+            'queries_p95': percentile(queries, 0.95),
+            'queries_max': queries[-1],
+            'db_ms_p95': percentile(db, 0.95),
+            'slow': self.slow,
+            'duplicated': self.duplicated,
+            'duplicates': self.duplicates.most_common(PERF_TOP_DUPLICATES),
+        }
+
+
+class PerfStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.views = defaultdict(ViewStats)
+            self.since = time.time()
+
+    def record(self, view, *args):
+        with self.lock:
+            self.views[view].record(*args)
+
+    def report(self):
+        # One summary per view, slowest p95 first
+        with self.lock:
+            rows = [{'view': view, **stats.summary()} for view, stats in self.views.items()]
+        return sorted(rows, key=lambda row: row['wall_ms']['p95'], reverse=True)
+
+
+perf_stats = PerfStats()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else '<unresolved>'
+
+
+def finish(request, response, profile):
+    wall_ms = (time.perf_counter() - profile.started) * 1000
+    db_ms = profile.db_time * 1000
+    duplicates = profile.duplicates()
+    slow = wall_ms >= settings.PERF_SLOW_MS
+    view = view_name(request)
+    perf_stats.record(view, wall_ms, profile.queries, db_ms, slow, duplicates)
+    if profile.metrics is not None:
+        profile.metrics.observe_request(view, request.method, response.status_code, wall_ms / 1000, profile.queries)
+        if profile.open_aliases is not None:
+            for alias in profile.aliases:
+                profile.metrics.observe_connection(alias, alias in profile.open_aliases)
+    if slow or profile.queries > settings.PERF_MAX_QUERIES or duplicates:
+        logger.warning(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'wall_ms': round(wall_ms, 1),
+            'queries': profile.queries,
+            'db_ms': round(db_ms, 1),
+            'slow': slow,
+            'duplicates': [{'count': count, 'sql': sql[:500]} for count, sql in duplicates],
+        }))
+
+
+# Middleware timing each request and its queries; works under WSGI and ASGI
+class PerfMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Prometheus metrics (main/metrics.py) are fed from the same measurements
+        self.metrics = import_module('main.metrics') if settings.METRICS_ENABLED else None
+
+    def start(self):
+        # Connections opened before this module was loaded never sent connection_created
+        open_aliases = set()
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+            if connection.connection is not None:
+                open_aliases.add(connection.alias)
+        # Async views query from another thread, whose connections are not visible here
+        profile = RequestProfile(self.metrics, None if self.async_mode else open_aliases)
+        return profile, current_profile.set(profile)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        finish(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        profile, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        finish(request, response, profile)
+        return response
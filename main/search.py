@@ -0,0 +1,191 @@
+"""
+Pluggable, ranked search for the custom admin site.
+
+The backend is picked with the ADMIN_SEARCH_BACKEND setting:
+
+    basic     portable ICONTAINS matching ranked by prefix/substring hits (works on SQLite)
+    trigram   ICONTAINS served by pg_trgm GIN indexes, ranked by trigram word similarity
+    fulltext  trigram matching for short fields plus PostgreSQL full-text search on long
+              text fields (e.g. ClientRequest.description), ranked by ts_rank
+
+The PostgreSQL backends fall back to 'basic' on any other database, so the test suite
+can run against SQLite. The GIN indexes they rely on are created by migration 0007.
+"""
+from django.conf import settings
+from django.contrib.admin.utils import lookup_spawns_duplicates
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.db import connection, models
+from django.db.models.functions import Greatest
+from django.utils.text import smart_split, unescape_string_literal
+
+# Annotation holding the relevance score; the changelist sorts on it while a search is active
+RANK_ANNOTATION = 'search_rank'
+
+# Text search configuration used for the full-text vectors (must match migration 0007)
+FULLTEXT_CONFIG = 'english'
+
+
+def split_search_term(search_term):
+    # Split the term into words the same way Django's admin does, keeping quoted phrases together
+    bits = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            bits.append(bit)
+    return bits
+
+
+class BasicSearch:
+    # Every word must match at least one field; fields are matched with ICONTAINS
+    requires_postgresql = False
+
+    def match(self, field_name, bit):
+        return models.Q(**{f'{field_name}__icontains': bit})
+
+    def filter(self, queryset, bits, fields, document_fields):
+        condition = models.Q()
+        for bit in bits:
+            condition &= models.Q.create(
+                [self.match(field_name, bit) for field_name in fields + document_fields],
+                connector=models.Q.OR,
+            )
+        return queryset.filter(condition)
+
+    def rank(self, search_term, fields, document_fields):
+        # Prefix matches outrank substring matches; short fields outrank long text
+        scores = [
+            models.Case(
+                models.When(**{f'{field_name}__istartswith': search_term}, then=models.Value(2.0)),
+                models.When(**{f'{field_name}__icontains': search_term}, then=models.Value(1.0)),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            )
+            for field_name in fields
+        ] + [
+            models.Case(
+                models.When(**{f'{field_name}__icontains': search_term}, then=models.Value(0.5)),
+                default=models.Value(0.0),
+                output_field=models.FloatField(),
+            )
+            for field_name in document_fields
+        ]
+        return sum(scores[1:], scores[0])
+
+    def search(self, queryset, search_term, fields, document_fields=()):
+        bits = split_search_term(search_term)
+        if not bits:
+            return queryset
+        queryset = self.filter(queryset, bits, tuple(fields), tuple(document_fields))
+        return queryset.annotate(**{RANK_ANNOTATION: self.rank(search_term, fields, document_fields)})
+
+
+class TrigramSearch(BasicSearch):
+    # Same ICONTAINS filter (pg_trgm GIN indexes make '%term%' indexable), ranked by similarity
+    requires_postgresql = True
+
+    def rank(self, search_term, fields, document_fields):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        scores = [
+            TrigramWordSimilarity(search_term, field_name)
+            for field_name in tuple(fields) + tuple(document_fields)
+        ]
+        # GREATEST ignores NULLs on PostgreSQL, so empty optional fields do not sink the score
+        return Greatest(*scores) if len(scores) > 1 else scores[0]
+
+
+class FullTextSearch(TrigramSearch):
+    # Long text fields use the GIN-indexed tsvector expression instead of ICONTAINS
+    def vector(self, field_name):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector(field_name, config=FULLTEXT_CONFIG)
+
+    def query(self, text):
+        from django.contrib.postgres.search import SearchQuery
+
+        return SearchQuery(text, config=FULLTEXT_CONFIG, search_type='websearch')
+
+    def filter(self, queryset, bits, fields, document_fields):
+        condition = models.Q()
+        for bit in bits:
+            condition &= models.Q.create(
+                [self.match(field_name, bit) for field_name in fields],
+                connector=models.Q.OR,
+            )
+        # The document fields are matched against the whole term as one web-style query
+        search_term = ' '.join(bits)
+        document_condition = models.Q()
+        for field_name in document_fields:
+            vector_alias = f'_{field_name.replace("__", "_")}_vector'
+            queryset = queryset.alias(**{vector_alias: self.vector(field_name)})
+            document_condition |= models.Q(**{vector_alias: self.query(search_term)})
+        return queryset.filter(condition | document_condition)
+
+    def rank(self, search_term, fields, document_fields):
+        from django.contrib.postgres.search import SearchRank
+
+        scores = []
+        if fields:
+            scores.append(super().rank(search_term, fields, ()))
+        scores += [
+            SearchRank(self.vector(field_name), self.query(search_term))
+            for field_name in document_fields
+        ]
+        return Greatest(*scores) if len(scores) > 1 else scores[0]
+
+
+SEARCH_BACKENDS = {
+    'basic': BasicSearch,
+    'trigram': TrigramSearch,
+    'fulltext': FullTextSearch,
+}
+
+
+def get_search_backend(name=None):
+    # Resolve the configured backend, falling back to 'basic' off PostgreSQL
+    name = name or getattr(settings, 'ADMIN_SEARCH_BACKEND', 'basic')
+    try:
+        backend_class = SEARCH_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'Unknown ADMIN_SEARCH_BACKEND {name!r}; choose from {sorted(SEARCH_BACKENDS)}')
+    if backend_class.requires_postgresql and connection.vendor != 'postgresql':
+        backend_class = BasicSearch
+    return backend_class()
+
+
+# ChangeList that lists the best matches first while a search is active,
+# unless the user has explicitly sorted by a column
+class RankedSearchChangeList(ChangeList):
+    def get_ordering(self, request, queryset):
+        ordering = super().get_ordering(request, queryset)
+        if self.query and ORDER_VAR not in self.params and RANK_ANNOTATION in queryset.query.annotations:
+            rank_order = f'-{RANK_ANNOTATION}'
+            ordering = [rank_order] + [field for field in ordering if field != rank_order]
+        return ordering
+
+
+# ModelAdmin mixin that routes search_fields through the configured search backend.
+# search_document_fields lists long text fields that 'fulltext' matches with tsvectors.
+class RankedSearchMixin:
+    search_document_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return RankedSearchChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not (search_fields or self.search_document_fields) or not search_term.strip():
+            return queryset, False
+        backend = get_search_backend()
+        queryset = backend.search(queryset, search_term, search_fields, self.search_document_fields)
+        if RANK_ANNOTATION in queryset.query.annotations:
+            # Autocomplete lookups use this ordering directly; the changelist moves the rank to the front
+            queryset = queryset.order_by(f'-{RANK_ANNOTATION}', *queryset.query.order_by)
+        # De-duplicate here rather than letting the changelist rebuild the queryset,
+        # which would drop the rank annotation
+        search_paths = tuple(search_fields) + tuple(self.search_document_fields)
+        if any(lookup_spawns_duplicates(self.opts, field_name) for field_name in search_paths):
+            queryset = queryset.distinct()
+        return queryset, False
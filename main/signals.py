@@ -0,0 +1,74 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import changes, stats
+from .auth_backends import invalidate_all_users, invalidate_user
+from .models import Client, ClientRequest, RequestType
+
+# Deleting a RequestType cascades to its ClientRequests through the deletion collector,
+# which bypasses ClientRequestQuerySet.delete(); rebuild the stats of the clients involved.
+# (There are no receivers on ClientRequest itself, so its rows can still be fast-deleted.)
+
+
+@receiver(pre_delete, sender=RequestType)
+def remember_request_type_clients(sender, instance, using, **kwargs):
+    instance._stats_client_ids = list(
+        ClientRequest.objects.using(using).filter(request_type=instance).values_list('client_id', flat=True).distinct()
+    )
+    changes.record_tombstones(ClientRequest.objects.using(using).filter(request_type=instance))
+
+
+@receiver(post_delete, sender=RequestType)
+def rebuild_request_type_clients(sender, instance, using, **kwargs):
+    client_ids = getattr(instance, '_stats_client_ids', [])
+    for start in range(0, len(client_ids), 1000):
+        stats.rebuild_client_stats(client_ids[start:start + 1000], using=using)
+
+
+# Cascades from RequestType and Client leave no trace for the change feed (main/changes.py), so tombstones for the
+# requests of a deleted Client or RequestType are written here, before the rows go.
+
+
+@receiver(pre_delete, sender=Client)
+def record_client_request_tombstones(sender, instance, using, **kwargs):
+    changes.record_tombstones(ClientRequest.objects.using(using).filter(client=instance))
+
+
+# Cached users and permission sets (main/auth_backends.py) are dropped when they change.
+# Per-user changes delete that user's entries; group-wide changes retire all of them.
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Changed from the group/permission side (group.user_set.add(...)): pk_set holds users,
+        # and a clear() leaves it empty, so retire everyone
+        if pk_set:
+            for user_id in pk_set:
+                invalidate_user(user_id)
+        else:
+            invalidate_all_users()
+    else:
+        invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_all_users()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_deleted_group_or_permission(sender, **kwargs):
+    invalidate_all_users()
@@ -0,0 +1,109 @@
+"""
+SLA targets and overdue requests.
+
+A RequestType may have a target, sla_hours: its requests are due that long after they were
+created. ClientRequest.due_at stores created_at + sla_hours (NULL without a target), so
+"overdue" is a plain range condition
+
+    status in OPEN_STATUSES and due_at < now
+
+answered from the partial clientreq_open_due_idx index over open requests, with no per-row
+arithmetic and no join to RequestType. due_at is set as requests are written:
+
+    ClientRequest.save()                 from the request's type
+    bulk_create / bulk_update paths      assign_due_at(), from the types the batch's lookups
+                                         loaded (main/importers.py)
+
+ClientRequest.sla_breached records that a request missed its target: it was still open after
+due_at, or was completed after it (per the status history, main/history.py). It is kept by
+'manage.py compute_sla', run periodically (e.g. every 15 minutes from cron), which walks the
+table in primary-key windows and, per window, with a handful of set-based UPDATEs:
+
+- recomputes due_at where it no longer matches its type's target (after sla_hours changed)
+- sets and clears sla_breached
+
+An sla_hours change saved in the admin is applied to the type's open requests straight away
+(RequestTypeAdmin.save_model); closed requests and the flags follow on the next run.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from .models import ClientRequest, ClientRequestStatusChange, RequestType
+
+# "Due soon" in the admin filter: open requests due within this many hours
+SLA_DUE_SOON_HOURS = 24
+
+
+def due_at(created_at, sla_hours):
+    return created_at + timedelta(hours=sla_hours) if sla_hours is not None and created_at else None
+
+
+def assign_due_at(instances, targets=None, using='default'):
+    # Set due_at on unsaved or bulk-updated instances. targets is {request_type_id: sla_hours};
+    # the types missing from it are read with one query.
+    targets = dict(targets or {})
+    missing = {instance.request_type_id for instance in instances} - set(targets)
+    if missing:
+        targets.update(RequestType.objects.using(using).filter(pk__in=missing).values_list('pk', 'sla_hours'))
+    for instance in instances:
+        instance.due_at = due_at(instance.created_at, targets.get(instance.request_type_id))
+
+
+def overdue(queryset, now=None):
+    return queryset.filter(status__in=ClientRequest.OPEN_STATUSES, due_at__lt=now or timezone.now())
+
+
+def due_soon(queryset, now=None):
+    now = now or timezone.now()
+    return queryset.filter(
+        status__in=ClientRequest.OPEN_STATUSES, due_at__gte=now, due_at__lt=now + timedelta(hours=SLA_DUE_SOON_HOURS),
+    )
+
+
+def breached(now):
+    # Condition for a request that missed its target: open past due_at, or completed after it.
+    # A request created as Completed (from_status NULL) was done when it was created.
+    completed_late = ClientRequestStatusChange.objects.filter(
+        request=models.OuterRef('pk'), from_status__isnull=False, to_status='Completed',
+        changed_at__gt=models.OuterRef('due_at'),
+    )
+    return (
+        models.Q(status__in=ClientRequest.OPEN_STATUSES, due_at__lt=now)
+        | models.Q(status='Completed', due_at__isnull=False) & models.Exists(completed_late)
+    )
+
+
+def refresh_due_at(queryset, targets):
+    # Recompute due_at where it is stale: one UPDATE per request type; returns rows changed
+    changed = 0
+    for type_id, sla_hours in targets.items():
+        rows = queryset.filter(request_type_id=type_id)
+        if sla_hours is None:
+            changed += rows.filter(due_at__isnull=False).update(due_at=None)
+        else:
+            expected = models.F('created_at') + models.Value(timedelta(hours=sla_hours))
+            changed += rows.exclude(due_at=expected).update(due_at=expected)
+    return changed
+
+
+def compute_sla(batch_size=5000, now=None, using='default'):
+    # Bring due_at and sla_breached up to date over the whole table, one primary-key window of
+    # batch_size rows at a time; returns (due dates changed, flags set, flags cleared)
+    now = now or timezone.now()
+    requests = ClientRequest.objects.using(using)
+    targets = dict(RequestType.objects.using(using).values_list('pk', 'sla_hours'))
+    bounds = requests.aggregate(first=models.Min('pk'), last=models.Max('pk'))
+    if bounds['first'] is None:
+        return 0, 0, 0
+    condition = breached(now)
+    due_changed = flagged = cleared = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        window = requests.filter(pk__gte=start, pk__lt=start + batch_size)
+        due_changed += refresh_due_at(window, targets)
+        flagged += window.filter(condition, sla_breached=False).update(sla_breached=True)
+        cleared += (
+            window.filter(sla_breached=True).exclude(pk__in=window.filter(condition).values('pk')).update(sla_breached=False)
+        )
+    return due_changed, flagged, cleared
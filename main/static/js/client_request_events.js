@@ -0,0 +1,38 @@
+// === ClientRequest changelist: say when requests change, so staff need not keep reloading ===
+// Listens to the server-sent event stream (main/events.py) and shows a notice with a reload
+// link. Counts reset when the page reloads; EventSource reconnects on its own.
+document.addEventListener('DOMContentLoaded', () => {
+    const notice = document.getElementById('request-events');
+    if (!notice || !window.EventSource) {
+        return;
+    }
+    const text = notice.querySelector('.request-events-text');
+    let created = 0;
+    let changed = 0;
+
+    const show = (message) => {
+        text.textContent = message;
+        notice.hidden = false;
+    };
+    const showCounts = () => {
+        const parts = [];
+        if (created) {
+            parts.push(`${created} new`);
+        }
+        if (changed) {
+            parts.push(`${changed} changed`);
+        }
+        show(`${parts.join(' and ')} request${created + changed === 1 ? '' : 's'} since this page was loaded.`);
+    };
+
+    const source = new EventSource(notice.dataset.url);
+    source.addEventListener('created', (event) => {
+        created += JSON.parse(event.data).count;
+        showCounts();
+    });
+    source.addEventListener('status_changed', (event) => {
+        changed += JSON.parse(event.data).count;
+        showCounts();
+    });
+    source.addEventListener('overflow', () => show('Many requests changed since this page was loaded.'));
+});
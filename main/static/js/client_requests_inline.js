@@ -0,0 +1,35 @@
+// === Client change page: load older requests for the ClientRequest inline on demand ===
+// The inline only renders the most recent requests as forms. Each click fetches the next
+// page of older requests from the admin endpoint and appends them as read-only rows.
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('.load-older-requests').forEach((button) => {
+        const container = button.closest('.recent-requests-older');
+        const tbody = container.querySelector('tbody');
+
+        button.addEventListener('click', async () => {
+            button.disabled = true;
+            try {
+                const response = await fetch(button.dataset.url, {
+                    headers: { 'Accept': 'application/json' },
+                    credentials: 'same-origin',
+                });
+                if (!response.ok) {
+                    throw new Error(`Request failed with status ${response.status}`);
+                }
+                const page = await response.json();
+                tbody.insertAdjacentHTML('beforeend', page.html);
+
+                // Hide the button once the oldest request has been loaded
+                if (page.next) {
+                    button.dataset.url = page.next;
+                    button.disabled = false;
+                } else {
+                    button.remove();
+                }
+            } catch (error) {
+                console.error(error);
+                button.disabled = false;
+            }
+        });
+    });
+});
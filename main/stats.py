@@ -0,0 +1,207 @@
+"""
+Incremental maintenance of ClientStats, the per-client request counters shown on ClientAdmin.
+
+Counting a client's requests by status on every changelist page would scan ClientRequest,
+so the counts are kept in ClientStats and adjusted as requests change:
+
+    ClientRequest.save()                 +1/-1 for the old and new (client, status)
+    ClientRequest.delete()               -1 for the deleted row
+    ClientRequestQuerySet.set_status()   one grouped aggregate before the bulk UPDATE
+    ClientRequestQuerySet.delete()       one grouped aggregate before the bulk DELETE
+    RequestType deletion (cascade)       affected clients rebuilt (main/signals.py)
+    bulk_create paths (import, API)      record_created() per batch
+    bulk_update paths (API)              record_updated() per batch
+
+Deltas are applied with F() expressions in one CASE-per-column UPDATE, so a bulk action over
+thousands of rows costs a fixed handful of statements. A missing stats row
+is rebuilt from ClientRequest instead of being created from the delta alone.
+
+Anything that writes ClientRequest behind these paths (raw SQL, COPY, queryset.update())
+can make the counters drift; 'manage.py reconcile_client_stats' rebuilds them in batches.
+"""
+from collections import Counter, defaultdict
+
+from django.db import models
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Client, ClientRequest, ClientStats
+
+# ClientRequest.status value -> ClientStats counter field; other statuses (e.g. NULL) are not counted
+STATUS_COUNTERS = {
+    'Pending': 'pending',
+    'In Progress': 'in_progress',
+    'Completed': 'completed',
+}
+COUNTER_FIELDS = tuple(STATUS_COUNTERS.values())
+
+# CASE branches per UPDATE in apply_deltas; keeps statements a sensible size for huge bulk actions
+DELTA_GROUPS_PER_UPDATE = 200
+
+
+def counter_deltas(removed=(), added=()):
+    # removed/added: iterables of (client_id, status, count). Returns {client_id: {counter: delta}}
+    # without zero entries, so a save that changes nothing produces no UPDATE.
+    deltas = defaultdict(Counter)
+    for rows, sign in ((removed, -1), (added, 1)):
+        for client_id, status, count in rows:
+            if status in STATUS_COUNTERS:
+                deltas[client_id][STATUS_COUNTERS[status]] += sign * count
+    return {
+        client_id: {field: delta for field, delta in counter.items() if delta}
+        for client_id, counter in deltas.items()
+    }
+
+
+def apply_deltas(deltas, latest=None, using='default'):
+    # Add counter deltas to each client's stats row, and raise last_request_at to latest[client_id].
+    # Clients with the same changes share one CASE branch, and each chunk of clients is a single
+    # UPDATE, so the statement count does not grow with the number of clients touched.
+    # Missing rows are rebuilt from ClientRequest.
+    latest = latest or {}
+    groups = defaultdict(list)
+    for client_id in set(deltas) | set(latest):
+        key = (tuple(sorted(deltas.get(client_id, {}).items())), latest.get(client_id))
+        if key != ((), None):
+            groups[key].append(client_id)
+
+    groups = list(groups.items())
+    missing = []
+    for start in range(0, len(groups), DELTA_GROUPS_PER_UPDATE):
+        chunk = groups[start:start + DELTA_GROUPS_PER_UPDATE]
+        client_ids = [client_id for _, ids in chunk for client_id in ids]
+        values = {}
+        for field in COUNTER_FIELDS:
+            whens = [
+                models.When(client_id__in=ids, then=models.Value(dict(changes)[field]))
+                for (changes, _), ids in chunk if field in dict(changes)
+            ]
+            if whens:
+                values[field] = models.F(field) + models.Case(
+                    *whens, default=models.Value(0), output_field=models.IntegerField(),
+                )
+        whens = [
+            # Coalesce first: GREATEST with a NULL is NULL on SQLite
+            models.When(client_id__in=ids, then=Greatest(
+                Coalesce('last_request_at', models.Value(newest)), models.Value(newest),
+            ))
+            for (_, newest), ids in chunk if newest is not None
+        ]
+        if whens:
+            values['last_request_at'] = models.Case(
+                *whens, default=models.F('last_request_at'), output_field=models.DateTimeField(),
+            )
+        updated = ClientStats.objects.using(using).filter(client_id__in=client_ids).update(**values)
+        if updated < len(client_ids):
+            existing = set(ClientStats.objects.using(using).filter(client_id__in=client_ids).values_list('client_id', flat=True))
+            missing += [client_id for client_id in client_ids if client_id not in existing]
+    if missing:
+        rebuild_client_stats(missing, using=using)
+
+
+def refresh_last_request(client_ids, using='default'):
+    # Recompute last_request_at after rows were removed or moved; one correlated subquery per
+    # client, answered from the (client, -created_at) index
+    if not client_ids:
+        return
+    newest = ClientRequest.objects.using(using).filter(client_id=models.OuterRef('client_id')).order_by('-created_at')
+    ClientStats.objects.using(using).filter(client_id__in=set(client_ids)).update(
+        last_request_at=models.Subquery(newest.values('created_at')[:1]),
+    )
+
+
+def fresh_stats(client_ids, using='default'):
+    # Stats computed from ClientRequest for the given clients, as unsaved ClientStats objects
+    rows = (
+        ClientRequest.objects.using(using)
+        .filter(client_id__in=client_ids)
+        .values('client_id')
+        .annotate(
+            last_request_at=models.Max('created_at'),
+            **{
+                field: models.Count('pk', filter=models.Q(status=status))
+                for status, field in STATUS_COUNTERS.items()
+            },
+        )
+        .order_by()
+    )
+    by_client = {row.pop('client_id'): row for row in rows}
+    return [ClientStats(client_id=client_id, **by_client.get(client_id, {})) for client_id in client_ids]
+
+
+def save_client_stats(stats, using='default'):
+    # Insert or overwrite stats rows in one upsert (INSERT ... ON CONFLICT DO UPDATE)
+    ClientStats.objects.using(using).bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=['client'],
+        update_fields=[*COUNTER_FIELDS, 'last_request_at'],
+    )
+
+
+def rebuild_client_stats(client_ids, using='default'):
+    # Overwrite the stats rows of the given (existing) clients with freshly computed ones
+    stats = fresh_stats(list(client_ids), using=using)
+    save_client_stats(stats, using=using)
+    return stats
+
+
+def iter_client_id_batches(batch_size, using='default'):
+    # All client ids in ascending batches, paged by primary key rather than OFFSET
+    last_id = 0
+    while True:
+        client_ids = list(
+            Client.objects.using(using).filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not client_ids:
+            return
+        yield client_ids
+        last_id = client_ids[-1]
+
+
+def record_saved(instance, previous, created, using='default'):
+    # Apply one saved ClientRequest. previous is the (client_id, status, created_at) it was loaded
+    # with, or None when it was not loaded from the database.
+    if previous is None and not created:
+        # Saved over an existing row we never read: the old values are unknown
+        rebuild_client_stats([instance.client_id], using=using)
+        return
+    removed = [(previous[0], previous[1], 1)] if previous else []
+    deltas = counter_deltas(removed=removed, added=[(instance.client_id, instance.status, 1)])
+    moved = previous is not None and (previous[0] != instance.client_id or previous[2] != instance.created_at)
+    # An edit that keeps client, status and created_at (e.g. a new description) costs no query
+    latest = {instance.client_id: instance.created_at} if previous is None or moved else {}
+    apply_deltas(deltas, latest=latest, using=using)
+    if moved:
+        refresh_last_request([previous[0], instance.client_id], using=using)
+
+
+def record_created(instances, using='default'):
+    # Apply rows inserted with bulk_create (which bypasses save())
+    added = Counter((instance.client_id, instance.status) for instance in instances)
+    latest = {}
+    for instance in instances:
+        if instance.created_at and (instance.client_id not in latest or instance.created_at > latest[instance.client_id]):
+            latest[instance.client_id] = instance.created_at
+    deltas = counter_deltas(added=[(client_id, status, count) for (client_id, status), count in added.items()])
+    apply_deltas(deltas, latest=latest, using=using)
+
+
+def record_updated(instances, using='default'):
+    # Apply rows written with bulk_update (which bypasses save()); each instance must have been
+    # loaded from the database, so its previous values are known
+    removed, added, moved = [], [], set()
+    for instance in instances:
+        client_id, status, created_at = instance._stats_state
+        removed.append((client_id, status, 1))
+        added.append((instance.client_id, instance.status, 1))
+        if client_id != instance.client_id or created_at != instance.created_at:
+            moved |= {client_id, instance.client_id}
+    apply_deltas(counter_deltas(removed=removed, added=added), using=using)
+    refresh_last_request(moved, using=using)
+
+
+def record_deleted(removed, using='default'):
+    # Apply deleted rows; removed is an iterable of (client_id, status, count)
+    removed = list(removed)
+    apply_deltas(counter_deltas(removed=removed), using=using)
+    refresh_last_request({client_id for client_id, _, _ in removed}, using=using)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from main.dashboard import DASHBOARD_CACHE_KEY, compute_dashboard, get_dashboard
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the operations dashboard on the custom admin index
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def requests(db):
+    acme = Client.objects.create(name='Acme')
+    updates = RequestType.objects.create(name='Plugin Updates')
+    migration = RequestType.objects.create(name='Site Migration')
+    now = timezone.now()
+    for age_days, status, request_type in [
+        (0, 'Pending', updates), (2, 'In Progress', updates), (10, 'Pending', migration),
+        (40, 'Pending', updates), (3, 'Completed', migration),
+    ]:
+        ClientRequest.objects.create(
+            client=acme, request_type=request_type, status=status, created_at=now - timedelta(days=age_days),
+        )
+
+
+@pytest.mark.django_db
+def test_dashboard_figures(requests):
+    dashboard = compute_dashboard()
+    assert dict(dashboard['status_totals']) == {'Pending': 3, 'In Progress': 1, 'Completed': 1}
+    assert dict(dashboard['ageing']) == {'Under 1 day': 1, '1-7 days': 1, '7-30 days': 1, 'Over 30 days': 1}
+    assert dashboard['request_types'][0] == {'name': 'Plugin Updates', 'total': 3, 'open': 3}
+    today = dashboard['throughput'][-1]
+    assert today['day'] == timezone.now().date()
+    # Everything was saved just now, so the completed request counts towards today's throughput
+    assert (today['created'], today['completed']) == (1, 1)
+    assert sum(row['created'] for row in dashboard['throughput']) == 4
+
+
+@pytest.mark.django_db
+def test_completions_are_counted_on_the_day_of_the_status_change(requests):
+    completed = ClientRequest.objects.get(status='Completed')
+    completed.status_history.update(changed_at=timezone.now() - timedelta(days=3))
+    # A later edit does not move the completion
+    completed.description = 'Notes added afterwards'
+    completed.save()
+    throughput = compute_dashboard()['throughput']
+    assert [row['completed'] for row in throughput[-4:]] == [1, 0, 0, 0]
+
+
+@pytest.mark.django_db
+def test_dashboard_is_cached(requests):
+    get_dashboard()
+    with CaptureQueriesContext(connection) as queries:
+        get_dashboard()
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db
+def test_stale_dashboard_is_served_while_another_request_refreshes(requests):
+    first = get_dashboard()
+    # Expire the figures and pretend another request holds the refresh lock
+    cache.set(DASHBOARD_CACHE_KEY, (0, first), 60)
+    cache.add(f'{DASHBOARD_CACHE_KEY}:lock', True, 30)
+    with CaptureQueriesContext(connection) as queries:
+        assert get_dashboard() is not None
+    assert len(queries) == 0
+    cache.delete(f'{DASHBOARD_CACHE_KEY}:lock')
+    assert get_dashboard()['computed_at'] > first['computed_at']
+
+
+@pytest.mark.django_db
+def test_admin_index_shows_dashboard(admin_client, requests):
+    response = admin_client.get(reverse('admin:index'))
+    assert response.status_code == 200
+    assert b'operations-dashboard' in response.content
+    assert b'Site Migration' in response.content
+
+
+@pytest.mark.django_db
+def test_dashboard_needs_request_view_permission(client, django_user_model, requests):
+    user = django_user_model.objects.create_user(username='plainstaff', password='plainstaff123', is_staff=True)
+    client.force_login(user)
+    response = client.get(reverse('admin:index'))
+    assert response.status_code == 200
+    assert b'operations-dashboard' not in response.content
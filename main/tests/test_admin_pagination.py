@@ -0,0 +1,100 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from main import pagination
+from main.admin import custom_admin_site
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for keyset (cursor) pagination and estimated counts on the changelists (main/pagination.py)
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='pager', password='pagerpass123')
+    client.force_login(user)
+    return client
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(custom_admin_site._registry[ClientRequest], 'list_per_page', 3)
+
+
+@pytest.fixture
+def requests_newest_first(db):
+    # Eight requests; pairs share a created_at so the id tie-breaker is exercised
+    client_obj = Client.objects.create(name='Pager Client')
+    request_type = RequestType.objects.create(name='Pager Type')
+    base = timezone.now()
+    created = [
+        ClientRequest.objects.create(
+            client=client_obj, request_type=request_type, status='Pending',
+            created_at=base - timedelta(minutes=i // 2),
+        )
+        for i in range(8)
+    ]
+    return sorted(created, key=lambda obj: (obj.created_at, obj.pk), reverse=True)
+
+
+def page_ids(response):
+    return [obj.pk for obj in response.context['cl'].result_list]
+
+
+def link(response, attribute):
+    url = getattr(response.context['cl'], attribute)
+    return url and dict(re.findall(r'([^?&=]+)=([^&]*)', url))
+
+
+@pytest.mark.django_db
+def test_next_links_walk_every_row_once_in_order(superuser_client, small_pages, requests_newest_first):
+    url = reverse('admin:main_clientrequest_changelist')
+    seen = []
+    params = {}
+    for _ in range(5):
+        response = superuser_client.get(url, params)
+        assert response.context['cl'].keyset_pagination
+        seen += page_ids(response)
+        params = link(response, 'next_page_url')
+        if not params:
+            break
+    assert seen == [obj.pk for obj in requests_newest_first]
+
+
+@pytest.mark.django_db
+def test_previous_link_returns_to_the_earlier_page(superuser_client, small_pages, requests_newest_first):
+    url = reverse('admin:main_clientrequest_changelist')
+    first = superuser_client.get(url)
+    second = superuser_client.get(url, link(first, 'next_page_url'))
+    back = superuser_client.get(url, link(second, 'previous_page_url'))
+    assert page_ids(back) == page_ids(first)
+    assert back.context['cl'].previous_page_url is None
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_rejected(superuser_client, requests_newest_first):
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'), {'cursor': 'not-a-cursor'})
+    assert response.status_code == 302
+    assert '?e=1' in response.url
+
+
+@pytest.mark.django_db
+def test_sorting_by_another_column_uses_numbered_pages(superuser_client, small_pages, requests_newest_first):
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'), {'o': '5'})
+    assert not response.context['cl'].keyset_pagination
+    assert response.context['cl'].paginator.num_pages == 3
+
+
+@pytest.mark.django_db
+def test_unfiltered_changelist_shows_estimated_count(superuser_client, monkeypatch, requests_newest_first):
+    monkeypatch.setattr(pagination, 'estimated_row_count', lambda model, using='default': 250000)
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'))
+    assert response.context['cl'].result_count == 250000
+    assert b'~250000' in response.content
+
+    # Filtered views still count exactly
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'), {'status__exact': 'Pending'})
+    assert response.context['cl'].result_count == 8
+    assert not response.context['cl'].count_is_estimate
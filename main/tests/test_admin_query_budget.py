@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from main.models import Client, RequestType, ClientRequest
+
+# These tests guard the admin pages against N+1 query regressions.
+# Each page is rendered at two data sizes: the number of queries must not grow
+# with the number of rows, and must stay within a fixed budget per page.
+
+# Query budgets per page (auth/session lookups, counts and the joined list query included)
+CHANGELIST_QUERY_BUDGET = 10
+CHANGE_FORM_QUERY_BUDGET = 10
+CLIENT_CHANGE_FORM_QUERY_BUDGET = 10
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='budget', password='budgetpass123')
+    client.force_login(user)
+    return client
+
+
+def create_requests(client_obj, count):
+    # Spread the requests over several request types so each row has distinct related rows
+    request_types = [RequestType.objects.create(name=f'Type {i}') for i in range(3)]
+    ClientRequest.objects.bulk_create([
+        ClientRequest(
+            client=client_obj,
+            request_type=request_types[i % 3],
+            status='Pending',
+            description=f'Request {i}',
+        )
+        for i in range(count)
+    ])
+
+
+def count_queries(client, url):
+    # Warm up first so one-off lookups (e.g. the ContentType cache) are not counted
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_client_request_changelist_query_count_is_constant(superuser_client):
+    url = reverse('admin:main_clientrequest_changelist')
+    client_obj = Client.objects.create(name='Budget Client')
+
+    create_requests(client_obj, 2)
+    small_page = count_queries(superuser_client, url)
+
+    create_requests(client_obj, 30)
+    large_page = count_queries(superuser_client, url)
+
+    assert large_page == small_page
+    assert large_page <= CHANGELIST_QUERY_BUDGET
+
+
+@pytest.mark.django_db
+def test_client_request_change_form_within_budget(superuser_client):
+    client_obj = Client.objects.create(name='Budget Client')
+    create_requests(client_obj, 1)
+    client_request = ClientRequest.objects.get()
+
+    url = reverse('admin:main_clientrequest_change', args=[client_request.pk])
+    assert count_queries(superuser_client, url) <= CHANGE_FORM_QUERY_BUDGET
+
+
+@pytest.mark.django_db
+def test_client_change_form_inline_query_count_is_constant(superuser_client):
+    client_obj = Client.objects.create(name='Budget Client')
+    url = reverse('admin:main_client_change', args=[client_obj.pk])
+
+    create_requests(client_obj, 2)
+    small_inline = count_queries(superuser_client, url)
+
+    create_requests(client_obj, 20)
+    large_inline = count_queries(superuser_client, url)
+
+    assert large_inline == small_inline
+    assert large_inline <= CLIENT_CHANGE_FORM_QUERY_BUDGET
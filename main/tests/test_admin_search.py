@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from main.models import Client, RequestType, ClientRequest
+from main.search import BasicSearch, TrigramSearch, get_search_backend
+
+# Tests for the ranked admin search (main/search.py).
+# They run against the portable 'basic' backend, which is what the PostgreSQL
+# backends fall back to on SQLite.
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='searcher', password='searchpass123')
+    client.force_login(user)
+    return client
+
+
+@pytest.fixture
+def search_data(db):
+    acme = Client.objects.create(name='Acme Vets', email='hello@acme.example')
+    other = Client.objects.create(name='Northern Acme Supplies', email='sales@northern.example')
+    seo = RequestType.objects.create(name='SEO Tech Check')
+    plugins = RequestType.objects.create(name='Plugin Updates')
+    ClientRequest.objects.create(client=other, request_type=plugins, status='Pending', description='Update plugins')
+    ClientRequest.objects.create(client=acme, request_type=seo, status='Pending', description='Broken sitemap')
+    ClientRequest.objects.create(client=other, request_type=seo, status='Completed', description='Sitemap for acme blog')
+    return acme, other
+
+
+def result_ids(response):
+    return [obj.pk for obj in response.context['cl'].result_list]
+
+
+@pytest.mark.django_db
+def test_postgres_backends_fall_back_to_basic_off_postgres(settings):
+    settings.ADMIN_SEARCH_BACKEND = 'trigram'
+    expected = TrigramSearch if connection.vendor == 'postgresql' else BasicSearch
+    assert type(get_search_backend()) is expected
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_search_backend('nonsense')
+
+
+@pytest.mark.django_db
+def test_client_search_ranks_prefix_matches_first(superuser_client, search_data):
+    acme, other = search_data
+    response = superuser_client.get(reverse('admin:main_client_changelist'), {'q': 'acme'})
+    assert response.status_code == 200
+    # Both clients mention acme, but 'Acme Vets' starts with it
+    assert result_ids(response) == [acme.pk, other.pk]
+
+
+@pytest.mark.django_db
+def test_client_request_search_includes_description(superuser_client, search_data):
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'), {'q': 'sitemap'})
+    descriptions = {obj.description for obj in response.context['cl'].result_list}
+    assert descriptions == {'Broken sitemap', 'Sitemap for acme blog'}
+
+
+@pytest.mark.django_db
+def test_every_search_word_must_match(superuser_client, search_data):
+    response = superuser_client.get(reverse('admin:main_clientrequest_changelist'), {'q': 'acme sitemap'})
+    descriptions = [obj.description for obj in response.context['cl'].result_list]
+    # Client name matches count as well as the description text
+    assert sorted(descriptions) == ['Broken sitemap', 'Sitemap for acme blog']
+
+
+@pytest.mark.django_db
+def test_explicit_column_sort_overrides_rank(superuser_client, search_data):
+    acme, other = search_data
+    # Sort by the 'id' column descending: the newer client comes first regardless of rank
+    response = superuser_client.get(reverse('admin:main_client_changelist'), {'q': 'acme', 'o': '-1'})
+    assert result_ids(response) == [other.pk, acme.pk]
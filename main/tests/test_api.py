@@ -0,0 +1,168 @@
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the versioned read-only JSON API (main/api.py)
+
+
+@pytest.fixture
+def requests(db):
+    acme = Client.objects.create(name='Acme')
+    globex = Client.objects.create(name='Globex')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    now = timezone.now()
+    return [
+        ClientRequest.objects.create(
+            client=acme if i % 3 else globex, request_type=request_type, description=f'Request {i}',
+            status='Completed' if i % 2 else 'Pending', created_at=now - timedelta(days=10 - i),
+        )
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def api_client(async_client, django_user_model):
+    user = django_user_model.objects.create_user(username='integrator', password='integratorpass123', is_staff=True)
+    user.user_permissions.add(*Permission.objects.filter(
+        codename__in=['view_client', 'view_requesttype', 'view_clientrequest'],
+    ))
+    async_client.force_login(user)
+    return async_client
+
+
+def get(client, url, params=None, headers=None):
+    return async_to_sync(client.get)(url, params or {}, headers=headers)
+
+
+def results(response):
+    assert response.status_code == 200, response.content
+    return json.loads(response.content)['results']
+
+
+@pytest.mark.django_db
+def test_api_requires_login_and_permission(async_client, django_user_model, requests):
+    url = reverse('api_client_request_list')
+    assert get(async_client, url).status_code == 401
+
+    async_client.force_login(django_user_model.objects.create_user(username='nopermission', is_staff=True))
+    assert get(async_client, url).status_code == 403
+    assert async_to_sync(async_client.post)(url).status_code == 405
+
+
+@pytest.mark.django_db
+def test_request_list_is_newest_first_and_refers_by_id(api_client, requests):
+    rows = results(get(api_client, reverse('api_client_request_list'), {'limit': 3}))
+    assert [row['id'] for row in rows] == [obj.pk for obj in reversed(requests)][:3]
+    assert rows[0]['client'] == requests[-1].client_id
+    assert rows[0]['request_type'] == requests[-1].request_type_id
+    assert set(rows[0]) == {'id', 'client', 'request_type', 'status', 'description', 'created_at', 'updated_at'}
+
+
+@pytest.mark.django_db
+def test_request_list_cursor_walks_every_row_once(api_client, requests):
+    seen, url, params = [], reverse('api_client_request_list'), {'limit': 4, 'status': 'Pending,Completed'}
+    while url:
+        body = json.loads(get(api_client, url, params).content)
+        seen.extend(row['id'] for row in body['results'])
+        url, params = body['next'], None
+    assert seen == [obj.pk for obj in reversed(requests)]
+
+
+@pytest.mark.django_db
+def test_request_list_filters_and_field_selection(api_client, requests):
+    url = reverse('api_client_request_list')
+    assert {row['status'] for row in results(get(api_client, url, {'status': 'Pending'}))} == {'Pending'}
+
+    globex = Client.objects.get(name='Globex')
+    rows = results(get(api_client, url, {'client': str(globex.pk), 'fields': 'id,client'}))
+    assert rows and all(row == {'id': row['id'], 'client': globex.pk} for row in rows)
+
+    since = (requests[7].created_at - timedelta(seconds=1)).isoformat()
+    assert [row['id'] for row in results(get(api_client, url, {'created_after': since}))] == [
+        obj.pk for obj in reversed(requests[7:])
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'limit': 'ten'}, {'limit': 0}, {'limit': 10000}, {'status': 'Lost'}, {'client': 'acme'},
+    {'created_after': 'yesterday'}, {'fields': 'id,secret'}, {'cursor': 'not-a-cursor'},
+])
+def test_request_list_rejects_bad_parameters(api_client, requests, params):
+    response = get(api_client, reverse('api_client_request_list'), params)
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_request_list_etag_is_checked_before_the_list_query(api_client, requests):
+    url = reverse('api_client_request_list')
+    response = get(api_client, url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    with CaptureQueriesContext(connection) as queries:
+        response = get(api_client, url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response['ETag'] == etag and not response.content
+    assert not any('"main_clientrequest"."description"' in query['sql'] for query in queries)
+
+    # A later Last-Modified check works the same way
+    response = get(api_client, url, headers={'If-Modified-Since': response['Last-Modified']})
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_request_list_etag_changes_on_update_and_delete(api_client, requests):
+    url = reverse('api_client_request_list')
+    etag = get(api_client, url)['ETag']
+
+    ClientRequest.objects.filter(pk=requests[0].pk).set_status('In Progress')
+    response = get(api_client, url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    # Deleting leaves no updated_at behind; the counters still move the ETag
+    ClientRequest.objects.filter(pk=requests[5].pk).delete()
+    response = get(api_client, url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert requests[5].pk not in [row['id'] for row in results(response)]
+
+
+@pytest.mark.django_db
+def test_request_detail_validated_by_updated_at(api_client, requests):
+    url = reverse('api_client_request_detail', args=[requests[1].pk])
+    response = get(api_client, url, {'fields': 'description'})
+    assert json.loads(response.content) == {'description': 'Request 1'}
+    assert get(api_client, url, {'fields': 'description'}, headers={'If-None-Match': response['ETag']}).status_code == 304
+
+    requests[1].description = 'Edited'
+    requests[1].save()
+    assert get(api_client, url, {'fields': 'description'}, headers={'If-None-Match': response['ETag']}).status_code == 200
+    assert get(api_client, reverse('api_client_request_detail', args=[0])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_clients_and_request_types(api_client, requests):
+    response = get(api_client, reverse('api_client_list'), {'fields': 'name'})
+    assert results(response) == [{'name': 'Globex'}, {'name': 'Acme'}]
+    assert get(api_client, reverse('api_client_list'), {'fields': 'name'},
+               headers={'If-None-Match': response['ETag']}).status_code == 304
+
+    RequestType.objects.create(name='Domain Renewal')
+    RequestType.objects.create(name='Backups')
+    body = json.loads(get(api_client, reverse('api_request_type_list'), {'limit': 2}).content)
+    assert [row['name'] for row in body['results']] == ['Backups', 'Domain Renewal']
+    body = json.loads(get(api_client, body['next']).content)
+    assert [row['name'] for row in body['results']] == ['Plugin Updates'] and body['next'] is None
+
+    acme = Client.objects.get(name='Acme')
+    assert json.loads(get(api_client, reverse('api_client_detail', args=[acme.pk])).content)['name'] == 'Acme'
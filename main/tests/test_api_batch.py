@@ -0,0 +1,162 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from main.models import Client, RequestType, ClientRequest, ClientStats
+from main.stats import fresh_stats
+
+# Tests for the batch create/update endpoint (main/batch.py)
+
+
+@pytest.fixture
+def data(db):
+    acme = Client.objects.create(name='Acme')
+    globex = Client.objects.create(name='Globex')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    existing = [
+        ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending', description=f'Old {i}')
+        for i in range(3)
+    ]
+    return acme, globex, request_type, existing
+
+
+@pytest.fixture
+def writer(async_client, django_user_model):
+    user = django_user_model.objects.create_user(username='ticketing', password='ticketingpass123', is_staff=True)
+    user.user_permissions.add(*Permission.objects.filter(codename__in=['add_clientrequest', 'change_clientrequest']))
+    async_client.force_login(user)
+    return async_client
+
+
+def post(client, payload):
+    response = async_to_sync(client.post)(
+        reverse('api_client_request_batch'), json.dumps(payload), content_type='application/json',
+    )
+    return response, json.loads(response.content)
+
+
+def assert_stats_consistent():
+    for stats in fresh_stats(list(Client.objects.values_list('pk', flat=True))):
+        # Clients that never had a request may have no stats row yet
+        stored = ClientStats.objects.filter(client_id=stats.client_id).first() or ClientStats(client_id=stats.client_id)
+        assert (stored.pending, stored.in_progress, stored.completed) == (stats.pending, stats.in_progress, stats.completed)
+        assert stored.last_request_at == stats.last_request_at
+
+
+@pytest.mark.django_db
+def test_batch_creates_and_updates_together(writer, data):
+    acme, globex, request_type, existing = data
+    response, body = post(writer, {'operations': [
+        {'op': 'create', 'client': 'Globex', 'request_type': request_type.pk, 'description': 'New'},
+        {'op': 'update', 'id': existing[0].pk, 'status': 'Completed'},
+        {'op': 'update', 'id': existing[1].pk, 'client': globex.pk, 'description': 'Moved'},
+    ]})
+    assert response.status_code == 200
+    assert body['written'] and (body['created'], body['updated'], body['invalid']) == (1, 2, 0)
+    created = ClientRequest.objects.get(pk=body['results'][0]['id'])
+    assert (created.client, created.status) == (globex, 'Pending')
+
+    existing[0].refresh_from_db()
+    existing[1].refresh_from_db()
+    assert existing[0].status == 'Completed' and existing[0].updated_at > existing[2].updated_at
+    assert (existing[1].client, existing[1].description) == (globex, 'Moved')
+    assert_stats_consistent()
+
+
+@pytest.mark.django_db
+def test_batch_query_count_does_not_grow_with_operations(writer, data):
+    acme, globex, request_type, existing = data
+
+    def run(n):
+        updates = list(ClientRequest.objects.values_list('pk', flat=True)[:n])
+        operations = [{'op': 'create', 'client': 'Acme', 'request_type': 'Plugin Updates'} for _ in range(n)]
+        operations += [{'op': 'update', 'id': pk, 'status': 'In Progress'} for pk in updates]
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = post(writer, {'operations': operations})
+        assert response.status_code == 200
+        return len(queries)
+
+    run(2)  # Warm the session and permission caches
+    assert run(3) == run(30)
+    assert_stats_consistent()
+
+
+@pytest.mark.django_db
+def test_batch_is_all_or_nothing_by_default(writer, data):
+    acme, globex, request_type, existing = data
+    operations = [
+        {'op': 'create', 'client': 'Acme', 'request_type': 'Plugin Updates'},
+        {'op': 'create', 'client': 'Nobody', 'request_type': 'Plugin Updates', 'status': 'Lost'},
+        {'op': 'update', 'id': 0, 'status': 'Completed'},
+        {'op': 'update', 'id': existing[0].pk, 'colour': 'red'},
+        {'op': 'delete', 'id': existing[0].pk},
+    ]
+    response, body = post(writer, {'operations': operations})
+    assert response.status_code == 400
+    assert not body['written']
+    statuses = [result['status'] for result in body['results']]
+    assert statuses == ['valid', 'invalid', 'invalid', 'invalid', 'invalid']
+    assert set(body['results'][1]['errors']) == {'client', 'status'}
+    assert ClientRequest.objects.count() == 3
+
+    response, body = post(writer, {'operations': operations, 'partial': True})
+    assert response.status_code == 200
+    assert body['written'] and body['created'] == 1 and body['invalid'] == 4
+    assert ClientRequest.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_batch_updates_write_only_the_fields_each_operation_sent(writer, data):
+    acme, globex, request_type, existing = data
+    # Changed by someone else since the batch's sender last read the rows
+    ClientRequest.objects.filter(pk=existing[0].pk).update(description='Edited elsewhere')
+    with CaptureQueriesContext(connection) as queries:
+        response, body = post(writer, {'operations': [
+            {'op': 'update', 'id': existing[0].pk, 'status': 'Completed'},
+            {'op': 'update', 'id': existing[1].pk, 'description': 'Rewritten'},
+        ]})
+    assert response.status_code == 200 and body['updated'] == 2
+    updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "main_clientrequest"')]
+    assert len(updates) == 2 and not any('"description"' in sql and '"status"' in sql for sql in updates)
+    existing[0].refresh_from_db()
+    existing[1].refresh_from_db()
+    assert (existing[0].status, existing[0].description) == ('Completed', 'Edited elsewhere')
+    assert (existing[1].status, existing[1].description) == ('Pending', 'Rewritten')
+    assert_stats_consistent()
+
+
+@pytest.mark.django_db
+def test_batch_rejects_duplicate_updates(writer, data):
+    existing = data[3]
+    _, body = post(writer, {'operations': [
+        {'op': 'update', 'id': existing[0].pk, 'status': 'Completed'},
+        {'op': 'update', 'id': existing[0].pk, 'status': 'Pending'},
+    ]})
+    assert body['results'][1]['errors'] == {'id': ['Updated more than once in this batch.']}
+
+
+@pytest.mark.django_db
+def test_batch_permissions_and_bad_requests(async_client, django_user_model, data):
+    existing = data[3]
+    update = {'operations': [{'op': 'update', 'id': existing[0].pk, 'status': 'Completed'}]}
+    assert post(async_client, update)[0].status_code == 401
+
+    user = django_user_model.objects.create_user(username='creator', is_staff=True)
+    user.user_permissions.add(Permission.objects.get(codename='add_clientrequest'))
+    async_client.force_login(user)
+    assert post(async_client, update)[0].status_code == 403
+    assert post(async_client, {'operations': []})[0].status_code == 400
+    assert post(async_client, {'operations': [{}] * 1001})[0].status_code == 400
+    # Only a JSON boolean chooses partial writes; "false" must not switch them on
+    for partial in ('false', 0, None):
+        response, body = post(async_client, {**update, 'partial': partial})
+        assert response.status_code == 400 and body['error'] == 'partial must be true or false.'
+    assert async_to_sync(async_client.get)(reverse('api_client_request_batch')).status_code == 405
+    response = async_to_sync(async_client.post)(
+        reverse('api_client_request_batch'), 'not json', content_type='application/json',
+    )
+    assert response.status_code == 400
@@ -0,0 +1,71 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from main.views import CustomLoginView, HomeView, RegisterView
+
+# Tests for the async public views (served under WSGI or ASGI); the JSON API is in test_api.py
+
+
+def test_public_views_are_async():
+    assert HomeView.view_is_async
+    assert RegisterView.view_is_async
+    assert CustomLoginView.view_is_async
+
+
+@pytest.mark.django_db
+def test_async_home_renders_and_redirects_logged_in_users(async_client, django_user_model):
+    response = async_to_sync(async_client.get)(reverse('home'))
+    assert response.status_code == 200
+    assert b"<h1>Welcome to the CRMS!" in response.content
+
+    async_client.force_login(django_user_model.objects.create_user(username='someone', password='x' * 12))
+    response = async_to_sync(async_client.get)(reverse('home'))
+    assert response.status_code == 302
+    assert response.url == reverse('custom_admin:index')
+
+
+@pytest.mark.django_db
+def test_async_login_signs_in_staff(async_client, django_user_model):
+    django_user_model.objects.create_user(username='staffer', password='staffpass12345', is_staff=True)
+    response = async_to_sync(async_client.get)(reverse('login'))
+    assert response.status_code == 200
+    assert 'no-cache' in response['Cache-Control']
+
+    response = async_to_sync(async_client.post)(
+        reverse('login'), {'username': 'staffer', 'password': 'staffpass12345'},
+    )
+    assert response.status_code == 302
+    assert response.url == reverse('custom_admin:index')
+    assert '_auth_user_id' in async_client.session
+
+
+@pytest.mark.django_db
+def test_async_register_creates_user(async_client, django_user_model):
+    response = async_to_sync(async_client.post)(reverse('register'), {
+        'username': 'newuser1', 'email': 'new@example.com',
+        'password': 'a-long-password-1', 'password_confirm': 'a-long-password-1',
+    })
+    assert response.status_code == 200
+    assert django_user_model.objects.filter(username='newuser1', is_staff=True).exists()
+
+
+@pytest.mark.django_db
+def test_asgi_application_serves_the_home_page():
+    from mysite.asgi import application
+
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': '/', 'raw_path': b'/', 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 1234), 'server': ('localhost', 80),
+    }
+    async_to_sync(application)(scope, receive, send)
+    assert messages[0]['status'] == 200
+    assert b'Welcome to the CRMS!' in b''.join(message.get('body', b'') for message in messages[1:])
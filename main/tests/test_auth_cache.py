@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from main.management.commands.create_limited_user_group import create_limited_users_permission_group
+
+# Tests for cached sessions and the cached user/permission backend (main/auth_backends.py):
+# a warm authenticated admin request makes no auth or session queries, and changes to the
+# user, their groups or the group's permissions take effect on the next request.
+
+AUTH_TABLES = ('django_session', 'auth_user', 'auth_group', 'auth_permission', 'auth_user_groups')
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(settings):
+    # What CACHE_BACKEND=redis turns on; locmem stands in for the shared cache here
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.AUTHENTICATION_BACKENDS = ['main.auth_backends.CachedModelBackend']
+    settings.AUTH_CACHE_SECONDS = 300
+    cache.clear()
+    caches['sessions'].clear()
+    yield
+    cache.clear()
+    caches['sessions'].clear()
+
+
+@pytest.fixture
+def limited_user(db, django_user_model):
+    group = create_limited_users_permission_group()
+    user = django_user_model.objects.create_user(username='limited', password='limitedpass123', is_staff=True)
+    user.groups.add(group)
+    return user
+
+
+@pytest.fixture
+def limited_client(client, limited_user):
+    client.force_login(limited_user)
+    return client
+
+
+def auth_queries(client, url):
+    client.get(url)  # warm up the session, user and permission caches
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    # Queries reading the auth tables themselves (the index's "Recent actions" list joins auth_user, which is fine)
+    return [q['sql'] for q in queries.captured_queries if any(f'FROM "{table}"' in q['sql'] for table in AUTH_TABLES)]
+
+
+@pytest.mark.django_db
+def test_warm_admin_requests_make_no_auth_queries(limited_client):
+    assert auth_queries(limited_client, reverse('admin:main_clientrequest_changelist')) == []
+    assert auth_queries(limited_client, reverse('admin:index')) == []
+
+
+@pytest.mark.django_db
+def test_removing_the_user_from_the_group_takes_effect(limited_client, limited_user):
+    url = reverse('admin:main_clientrequest_changelist')
+    assert limited_client.get(url).status_code == 200
+    limited_user.groups.clear()
+    assert limited_client.get(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_group_permission_changes_take_effect(limited_client):
+    url = reverse('admin:main_clientrequest_changelist')
+    assert limited_client.get(url).status_code == 200
+    group = Group.objects.get(name='LimitedUsers')
+    group.permissions.remove(*Permission.objects.filter(codename__endswith='_clientrequest'))
+    assert limited_client.get(url).status_code == 403
+    # Re-running the group command restores them
+    create_limited_users_permission_group()
+    assert limited_client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_password_change_and_deactivation_log_the_user_out(limited_client, limited_user, django_user_model):
+    url = reverse('admin:index')
+    assert limited_client.get(url).status_code == 200
+    user = django_user_model.objects.get(pk=limited_user.pk)
+    user.set_password('a-brand-new-password-123')
+    user.save()
+    # The cached user would still carry the old password hash; the session must not survive
+    assert limited_client.get(url).status_code == 302
+
+    limited_client.force_login(user)
+    assert limited_client.get(url).status_code == 200
+    django_user_model.objects.filter(pk=user.pk).update(is_active=False)
+    user.refresh_from_db()
+    user.save()
+    assert limited_client.get(url).status_code == 302
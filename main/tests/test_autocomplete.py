@@ -0,0 +1,69 @@
+import pytest
+from django.urls import reverse
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the search-as-you-type foreign key widgets on the ClientRequest forms
+# and the admin autocomplete endpoint that backs them.
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='lookup', password='lookuppass123')
+    client.force_login(user)
+    return client
+
+
+def autocomplete(client, term='', page=1, field_name='client'):
+    response = client.get(reverse('admin:autocomplete'), {
+        'app_label': 'main',
+        'model_name': 'clientrequest',
+        'field_name': field_name,
+        'term': term,
+        'page': page,
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_autocomplete_only_offers_active_clients(superuser_client):
+    active = Client.objects.create(name='Active Vets', is_active=True)
+    Client.objects.create(name='Dormant Vets', is_active=False)
+    data = autocomplete(superuser_client, 'vets')
+    assert [result['id'] for result in data['results']] == [str(active.pk)]
+
+
+@pytest.mark.django_db
+def test_autocomplete_pages_without_counting(superuser_client):
+    Client.objects.bulk_create([Client(name=f'Client {i:02d}') for i in range(25)])
+    first = autocomplete(superuser_client)
+    second = autocomplete(superuser_client, page=2)
+    assert len(first['results']) == 20 and first['pagination']['more'] is True
+    assert len(second['results']) == 5 and second['pagination']['more'] is False
+
+
+@pytest.mark.django_db
+def test_request_type_autocomplete(superuser_client):
+    RequestType.objects.create(name='SEO Tech Check')
+    RequestType.objects.create(name='Plugin Updates')
+    data = autocomplete(superuser_client, 'seo', field_name='request_type')
+    assert [result['text'] for result in data['results']] == [str(RequestType.objects.get(name='SEO Tech Check'))]
+
+
+@pytest.mark.django_db
+def test_client_request_form_does_not_list_every_client(superuser_client):
+    Client.objects.bulk_create([Client(name=f'Client {i:02d}') for i in range(30)])
+    response = superuser_client.get(reverse('admin:main_clientrequest_add'))
+    content = response.content.decode()
+    assert 'admin-autocomplete' in content
+    assert 'Client 07' not in content
+
+
+@pytest.mark.django_db
+def test_existing_request_renders_its_selected_client(superuser_client):
+    client_obj = Client.objects.create(name='Dormant Vets', is_active=False)
+    request_type = RequestType.objects.create(name='SEO Tech Check')
+    client_request = ClientRequest.objects.create(client=client_obj, request_type=request_type)
+    response = superuser_client.get(reverse('admin:main_clientrequest_change', args=[client_request.pk]))
+    # Inactive clients stay selectable on existing requests; only new lookups are filtered
+    assert str(client_obj) in response.content.decode()
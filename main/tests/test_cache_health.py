@@ -0,0 +1,84 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from main.cache import CacheStats, probe, redact_location
+
+# Tests for the instrumented cache backends and the admin cache-health page
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    cache.clear()
+    cache.stats.reset()
+    yield
+    cache.clear()
+
+
+def test_default_cache_is_instrumented_and_release_prefixed(settings):
+    from django.core.cache import caches
+
+    assert type(caches['default']).__name__ == 'InstrumentedLocMemCache'
+    assert cache.key_prefix == f'mysite:{settings.CACHE_RELEASE}'
+
+
+def test_hits_and_misses_are_counted():
+    cache.get('absent')
+    cache.set('present', 1)
+    assert cache.get('present') == 1
+    assert cache.get('absent', 'fallback') == 'fallback'
+    cache.get_many(['present', 'absent'])
+    assert cache.get_or_set('computed', lambda: 2) == 2
+    assert (cache.stats.hits, cache.stats.misses) == (2, 4)
+    assert cache.stats.hit_rate == pytest.approx(2 / 6)
+
+
+def test_counters_are_shared_across_backend_instances():
+    # Django creates one backend instance per thread; they must share their counters
+    from django.conf import settings as django_settings
+    from django.core.cache import caches
+    from django.utils.module_loading import import_string
+
+    config = django_settings.CACHES['default']
+    params = {key: value for key, value in config.items() if key not in ('BACKEND', 'LOCATION')}
+    other = import_string(config['BACKEND'])(config['LOCATION'], params)
+    other.get('absent')
+    assert caches['default'].stats.misses == 1
+
+    # An alias sharing the location under another key prefix (like sessions on Redis) has its own
+    sessions = import_string(config['BACKEND'])(config['LOCATION'], {**params, 'KEY_PREFIX': 'mysite:sessions'})
+    sessions.get('absent')
+    assert caches['default'].stats.misses == 1 and sessions.stats.misses == 1
+
+
+def test_redact_location():
+    assert redact_location('redis://:secret@cache:6379/0') == 'redis://:***@cache:6379/0'
+    assert redact_location('redis://localhost:6379/0') == 'redis://localhost:6379/0'
+
+
+def test_cache_stats_hit_rate_without_lookups():
+    assert CacheStats().hit_rate is None
+
+
+def test_probe_is_not_counted():
+    from django.core.cache import caches
+
+    ok, latency_ms, error = probe(caches['default'])
+    assert ok and latency_ms is not None and error is None
+    assert (cache.stats.hits, cache.stats.misses) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_cache_health_page(admin_client):
+    url = reverse('admin:cache_health')
+    response = admin_client.get(url)
+    assert response.status_code == 200
+    assert [entry['alias'] for entry in response.context['caches']] == ['default', 'sessions']
+    assert all(entry['ok'] for entry in response.context['caches'])
+    assert admin_client.post(url).status_code == 302
+
+
+@pytest.mark.django_db
+def test_cache_health_is_superuser_only(client, django_user_model):
+    user = django_user_model.objects.create_user(username='staffonly', password='staffonly123', is_staff=True)
+    client.force_login(user)
+    assert client.get(reverse('admin:cache_health')).status_code == 403
@@ -0,0 +1,141 @@
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from main.batch import ClientRequestBatch
+from main.changes import FeedCursor
+from main.models import Client, RequestType, ClientRequest, ClientRequestTombstone
+
+# Tests for the change feed (main/changes.py)
+
+
+@pytest.fixture
+def data(db, settings):
+    settings.CHANGE_FEED_LAG_SECONDS = 0
+    acme = Client.objects.create(name='Acme')
+    globex = Client.objects.create(name='Globex')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    requests = [
+        ClientRequest.objects.create(client=acme if i % 2 else globex, request_type=request_type, description=f'Request {i}')
+        for i in range(6)
+    ]
+    return acme, globex, request_type, requests
+
+
+@pytest.fixture
+def api_client(async_client, django_user_model):
+    user = django_user_model.objects.create_user(username='syncer', is_staff=True)
+    user.user_permissions.add(Permission.objects.get(codename='view_clientrequest'))
+    async_client.force_login(user)
+    return async_client
+
+
+def feed(client, cursor=None, **params):
+    if cursor:
+        params['cursor'] = cursor
+    response = async_to_sync(client.get)(reverse('api_client_request_changes'), params)
+    assert response.status_code == 200, response.content
+    return json.loads(response.content)
+
+
+def sync(client, cursor=None, **params):
+    # Follow the feed until it is drained; returns (changed ids, deleted ids, cursor)
+    changed, deleted = [], []
+    while True:
+        body = feed(client, cursor, **params)
+        changed += [row['id'] for row in body['changes']]
+        deleted += [row['id'] for row in body['deleted']]
+        cursor = body['next']
+        if not body['has_more']:
+            return changed, deleted, cursor
+
+
+@pytest.mark.django_db
+def test_first_sync_pages_through_every_request(api_client, data):
+    requests = data[3]
+    body = feed(api_client, limit=4)
+    assert body['has_more'] and len(body['changes']) == 4
+    changed, deleted, cursor = sync(api_client, body['next'], limit=4)
+    assert [row['id'] for row in body['changes']] + changed == [obj.pk for obj in requests]
+    assert deleted == []
+    assert feed(api_client, cursor)['changes'] == []
+
+
+@pytest.mark.django_db
+def test_feed_returns_only_what_changed_since_the_cursor(api_client, data):
+    acme, globex, request_type, requests = data
+    _, _, cursor = sync(api_client)
+
+    requests[1].description = 'Edited'
+    requests[1].save()
+    ClientRequest.objects.filter(pk__in=[requests[2].pk, requests[4].pk]).set_status('Completed')
+    ClientRequestBatch().apply([{'op': 'update', 'id': requests[0].pk, 'status': 'In Progress'}])
+    created = ClientRequest.objects.create(client=acme, request_type=request_type)
+
+    body = feed(api_client, cursor)
+    assert [row['id'] for row in body['changes']] == [requests[1].pk, requests[2].pk, requests[4].pk, requests[0].pk, created.pk]
+    assert body['changes'][0]['description'] == 'Edited' and body['changes'][3]['status'] == 'In Progress'
+    assert sync(api_client, body['next'])[:2] == ([], [])
+
+
+@pytest.mark.django_db
+def test_every_delete_path_leaves_a_tombstone(api_client, data):
+    acme, globex, request_type, requests = data
+    _, _, cursor = sync(api_client)
+    expected = sorted(obj.pk for obj in requests[:4] + requests[5:])
+
+    requests[0].delete()
+    ClientRequest.objects.filter(pk=requests[1].pk).delete()
+    other_type = RequestType.objects.create(name='Backups')
+    ClientRequest.objects.filter(pk=requests[2].pk).update(request_type=other_type)
+    other_type.delete()
+    acme.delete()
+
+    changed, deleted, cursor = sync(api_client, cursor, fields='id')
+    assert sorted(deleted) == expected
+    assert ClientRequestTombstone.objects.get(request_id=expected[0]).client_id == globex.pk
+    assert sync(api_client, cursor)[:2] == ([], [])
+
+
+@pytest.mark.django_db
+def test_first_sync_skips_earlier_deletions(api_client, data):
+    data[3][0].delete()
+    assert sync(api_client)[1] == []
+
+
+@pytest.mark.django_db
+def test_recent_changes_wait_for_the_lag(api_client, data, settings):
+    saved, deleted = data[3][3], data[3][4]
+    deleted_pk = deleted.pk
+    _, _, cursor = sync(api_client)
+    settings.CHANGE_FEED_LAG_SECONDS = 60
+    saved.save()
+    deleted.delete()
+    assert sync(api_client, cursor)[:2] == ([], [])
+
+    settings.CHANGE_FEED_LAG_SECONDS = 0
+    assert sync(api_client, cursor)[:2] == ([saved.pk], [deleted_pk])
+
+
+@pytest.mark.django_db
+def test_stale_and_malformed_cursors(api_client, data, settings):
+    stale = FeedCursor(timezone.now() - timedelta(days=settings.CHANGE_FEED_TOMBSTONE_DAYS + 1)).encode()
+    response = async_to_sync(api_client.get)(reverse('api_client_request_changes'), {'cursor': stale})
+    assert response.status_code == 410
+    for cursor in ('not-a-cursor', 'WyJuZXh0IiwgMV0'):
+        response = async_to_sync(api_client.get)(reverse('api_client_request_changes'), {'cursor': cursor})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_prune_tombstones_keeps_recent_ones(data):
+    requests = data[3]
+    ClientRequest.objects.filter(pk__in=[obj.pk for obj in requests[:3]]).delete()
+    ClientRequestTombstone.objects.filter(request_id=requests[0].pk).update(deleted_at=timezone.now() - timedelta(days=40))
+    call_command('prune_tombstones', batch_size=1)
+    assert sorted(ClientRequestTombstone.objects.values_list('request_id', flat=True)) == [obj.pk for obj in requests[1:3]]
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the bounded ClientRequest inline on the Client change page:
+# only the most recent requests are rendered as forms, older ones come from a paged endpoint.
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='inline', password='inlinepass123')
+    client.force_login(user)
+    return client
+
+
+@pytest.fixture
+def busy_client(db):
+    # 25 requests, newest first by id; every fifth one is completed
+    client_obj = Client.objects.create(name='Busy Client')
+    request_type = RequestType.objects.create(name='Inline Type')
+    base = timezone.now()
+    for i in range(25):
+        ClientRequest.objects.create(
+            client=client_obj, request_type=request_type,
+            status='Completed' if i % 5 == 0 else 'Pending',
+            description=f'Request {i}', created_at=base + timedelta(minutes=i),
+        )
+    return client_obj
+
+
+def inline_formset(response):
+    return response.context['inline_admin_formsets'][0].formset
+
+
+@pytest.mark.django_db
+def test_inline_renders_only_the_most_recent_requests(superuser_client, busy_client):
+    response = superuser_client.get(reverse('admin:main_client_change', args=[busy_client.pk]))
+    formset = inline_formset(response)
+    shown = [form.instance.description for form in formset.initial_forms]
+    assert shown == [f'Request {i}' for i in range(24, 4, -1)]
+    assert formset.load_more_url()
+    assert b'Load older requests' in response.content
+
+
+@pytest.mark.django_db
+def test_inline_status_filter(superuser_client, busy_client):
+    url = reverse('admin:main_client_change', args=[busy_client.pk])
+    response = superuser_client.get(url, {'requests_status': 'Completed'})
+    formset = inline_formset(response)
+    assert {form.instance.status for form in formset.initial_forms} == {'Completed'}
+    assert len(formset.initial_forms) == 5
+    assert formset.load_more_url() is None
+
+
+@pytest.mark.django_db
+def test_load_more_endpoint_returns_older_requests(superuser_client, busy_client):
+    response = superuser_client.get(reverse('admin:main_client_change', args=[busy_client.pk]))
+    page = superuser_client.get(inline_formset(response).load_more_url()).json()
+    for i in range(5):
+        assert f'Request {i}<' in page['html']
+    assert 'Request 5<' not in page['html']
+    assert page['next'] is None
+
+
+@pytest.mark.django_db
+def test_saving_the_inline_updates_only_submitted_rows(superuser_client, busy_client):
+    newest = ClientRequest.objects.get(description='Request 24')
+    response = superuser_client.post(reverse('admin:main_client_change', args=[busy_client.pk]), {
+        'name': busy_client.name,
+        'is_active': 'on',
+        'clientrequest_set-TOTAL_FORMS': 1,
+        'clientrequest_set-INITIAL_FORMS': 1,
+        'clientrequest_set-0-id': newest.pk,
+        'clientrequest_set-0-client': busy_client.pk,
+        'clientrequest_set-0-request_type': newest.request_type_id,
+        'clientrequest_set-0-status': 'In Progress',
+        'clientrequest_set-0-description': newest.description,
+        '_save': 'Save',
+    })
+    assert response.status_code == 302
+    newest.refresh_from_db()
+    assert newest.status == 'In Progress'
+    assert ClientRequest.objects.filter(client=busy_client).count() == 25
@@ -0,0 +1,141 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from main.models import Client, RequestType, ClientRequest, ClientStats
+
+# Tests for the precomputed per-client request counters (ClientStats) and their incremental upkeep
+
+
+@pytest.fixture
+def setup(db):
+    acme = Client.objects.create(name='Acme')
+    globex = Client.objects.create(name='Globex')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    return acme, globex, request_type
+
+
+def counts(client):
+    stats = ClientStats.objects.get(client=client)
+    return stats.pending, stats.in_progress, stats.completed
+
+
+def assert_matches_rebuild():
+    # Incremental counters must equal what a full rebuild computes
+    before = sorted(ClientStats.objects.values_list('client_id', 'pending', 'in_progress', 'completed', 'last_request_at'))
+    call_command('reconcile_client_stats', stdout=io.StringIO())
+    after = sorted(ClientStats.objects.values_list('client_id', 'pending', 'in_progress', 'completed', 'last_request_at'))
+    assert before == after
+
+
+@pytest.mark.django_db
+def test_save_and_delete_move_the_counters(setup):
+    acme, globex, request_type = setup
+    base = timezone.now()
+    first = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending', created_at=base)
+    second = ClientRequest.objects.create(
+        client=acme, request_type=request_type, status='Pending', created_at=base + timedelta(hours=1),
+    )
+    assert counts(acme) == (2, 0, 0)
+    assert ClientStats.objects.get(client=acme).last_request_at == second.created_at
+
+    # Reloaded from the database, then edited like the admin change form does
+    loaded = ClientRequest.objects.get(pk=first.pk)
+    loaded.status = 'Completed'
+    loaded.save()
+    assert counts(acme) == (1, 0, 1)
+
+    # Moving the newest request to another client updates both clients' last_request_at
+    second.client = globex
+    second.save()
+    assert counts(acme) == (0, 0, 1) and counts(globex) == (1, 0, 0)
+    assert ClientStats.objects.get(client=acme).last_request_at == first.created_at
+
+    second.delete()
+    assert counts(globex) == (0, 0, 0)
+    assert ClientStats.objects.get(client=globex).last_request_at is None
+    assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_delete_of_a_partially_loaded_request_recounts_its_client(setup):
+    acme, _, request_type = setup
+    kept = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    deleted = ClientRequest.objects.create(client=acme, request_type=request_type, status='Completed')
+    ClientRequest.objects.only('pk').get(pk=deleted.pk).delete()
+    assert counts(acme) == (1, 0, 0)
+    assert ClientStats.objects.get(client=acme).last_request_at == kept.created_at
+
+
+@pytest.mark.django_db
+def test_bulk_status_action_applies_grouped_deltas(admin_client, setup, django_assert_max_num_queries):
+    acme, globex, request_type = setup
+    for client_obj, count in ((acme, 6), (globex, 4)):
+        for _ in range(count):
+            ClientRequest.objects.create(client=client_obj, request_type=request_type, status='Pending')
+    ClientRequest.objects.filter(client=globex).order_by('pk')[:1].get().delete()
+    selected = list(ClientRequest.objects.values_list('pk', flat=True))
+
+    queryset = ClientRequest.objects.filter(pk__in=selected)
+    # One aggregate, one INSERT of the status history, one UPDATE of the requests and one UPDATE of
+    # the stats rows, whatever the mix of clients and statuses (plus savepoint statements)
+    with django_assert_max_num_queries(6):
+        assert queryset.set_status('In Progress') == 9
+    assert counts(acme) == (0, 6, 0) and counts(globex) == (0, 3, 0)
+
+    response = admin_client.post(reverse('admin:main_clientrequest_changelist'), {
+        'action': 'mark_as_completed', '_selected_action': selected[:2],
+    })
+    assert response.status_code == 302
+    assert counts(acme) == (0, 4, 2)
+    assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_bulk_delete_and_request_type_cascade(setup):
+    acme, globex, request_type = setup
+    other_type = RequestType.objects.create(name='Site Migration')
+    for status in ('Pending', 'Completed', 'Completed'):
+        ClientRequest.objects.create(client=acme, request_type=request_type, status=status)
+        ClientRequest.objects.create(client=globex, request_type=other_type, status=status)
+
+    ClientRequest.objects.filter(client=acme, status='Completed').delete()
+    assert counts(acme) == (1, 0, 0)
+
+    other_type.delete()  # Cascades to globex's requests outside ClientRequestQuerySet.delete()
+    assert counts(globex) == (0, 0, 0)
+    assert_matches_rebuild()
+
+
+@pytest.mark.django_db
+def test_reconcile_repairs_drift(setup):
+    acme, _, request_type = setup
+    ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    # update() bypasses the counters
+    ClientRequest.objects.update(status='Completed')
+    out = io.StringIO()
+    call_command('reconcile_client_stats', '--check', stdout=out)
+    # Acme's counters drifted; Globex has no requests and so no stats row yet
+    assert '2 stats rows are out of date' in out.getvalue()
+    assert counts(acme) == (1, 0, 0)
+    call_command('reconcile_client_stats', '--batch-size', '1', stdout=io.StringIO())
+    assert counts(acme) == (0, 0, 1)
+    assert ClientStats.objects.count() == Client.objects.count()
+
+
+@pytest.mark.django_db
+def test_client_changelist_sorts_by_counters(admin_client, setup):
+    acme, globex, request_type = setup
+    for _ in range(3):
+        ClientRequest.objects.create(client=globex, request_type=request_type, status='Pending')
+    ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    changelist = reverse('admin:main_client_changelist')
+    response = admin_client.get(changelist)
+    # 'Pending' is the 8th column of list_display (after the action checkbox)
+    response = admin_client.get(changelist, {'o': '-8'})
+    names = [client_obj.name for client_obj in response.context['cl'].result_list]
+    assert names == ['Globex', 'Acme']
+    assert b'column-pending_requests' in response.content
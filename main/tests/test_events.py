@@ -0,0 +1,180 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.db import transaction
+from django.urls import reverse
+from main import events
+from main.batch import ClientRequestBatch
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the request event stream (main/events.py)
+
+
+class RecordingBroker(events.LocalBroker):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, published):
+        self.published.extend(published)
+        super().publish(published)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = RecordingBroker()
+    monkeypatch.setattr(events, 'get_broker', lambda: broker)
+    return broker
+
+
+@pytest.fixture
+def data(db):
+    acme = Client.objects.create(name='Acme')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    requests = [ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending') for _ in range(3)]
+    return acme, request_type, requests
+
+
+@pytest.fixture
+def api_client(async_client, django_user_model):
+    user = django_user_model.objects.create_user(username='watcher', is_staff=True)
+    user.user_permissions.add(Permission.objects.get(codename='view_clientrequest'))
+    async_client.force_login(user)
+    return async_client
+
+
+@pytest.mark.django_db
+def test_save_publishes_creations_and_status_changes(broker, data, django_capture_on_commit_callbacks):
+    acme, request_type, requests = data
+    with django_capture_on_commit_callbacks(execute=True):
+        created = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+        requests[0].description = 'No status change'
+        requests[0].save()
+        requests[1].status = 'Completed'
+        requests[1].save()
+    assert broker.published == [
+        events.make_event('created', acme.pk, 'Pending', None, 1, [created.pk]),
+        events.make_event('status_changed', acme.pk, 'Completed', 'Pending', 1, [requests[1].pk]),
+    ]
+
+
+@pytest.mark.django_db
+def test_bulk_status_action_publishes_grouped_transitions(broker, data, django_capture_on_commit_callbacks, monkeypatch):
+    acme, request_type, requests = data
+    with django_capture_on_commit_callbacks(execute=True):
+        ClientRequest.objects.filter(pk__in=[obj.pk for obj in requests[:2]]).set_status('In Progress')
+    [event] = broker.published
+    assert (event['type'], event['previous_status'], event['status'], event['count']) == ('status_changed', 'Pending', 'In Progress', 2)
+    assert sorted(event['ids']) == [obj.pk for obj in requests[:2]]
+
+    # Past EVENTS_MAX_IDS rows only the counts are sent, still per (client, previous status)
+    monkeypatch.setattr(events, 'EVENTS_MAX_IDS', 1)
+    broker.published.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert ClientRequest.objects.all().set_status('Completed') == 3
+    assert sorted((event['previous_status'], event['count'], event['ids']) for event in broker.published) == [
+        ('In Progress', 2, None), ('Pending', 1, None),
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_api_publishes_and_rollbacks_do_not(broker, data, django_capture_on_commit_callbacks):
+    acme, request_type, requests = data
+    with django_capture_on_commit_callbacks(execute=True):
+        ClientRequestBatch().apply([
+            {'op': 'create', 'client': acme.pk, 'request_type': request_type.pk},
+            {'op': 'update', 'id': requests[0].pk, 'status': 'Completed'},
+            {'op': 'update', 'id': requests[1].pk, 'description': 'Same status'},
+        ])
+        with pytest.raises(RuntimeError), transaction.atomic():
+            ClientRequest.objects.filter(pk=requests[2].pk).set_status('Completed')
+            raise RuntimeError
+    assert [(event['type'], event['count']) for event in broker.published] == [('created', 1), ('status_changed', 1)]
+    assert broker.published[1]['ids'] == [requests[0].pk]
+
+
+def test_local_broker_fans_out_and_reports_overflow(monkeypatch):
+    monkeypatch.setattr(events, 'EVENTS_QUEUE_SIZE', 2)
+
+    async def scenario():
+        broker = events.LocalBroker()
+        first, second = events.Subscription(), broker.subscribe()
+        broker.subscribers.add(first)
+        # Publish from another thread, as a committing request would
+        thread = threading.Thread(target=broker.publish, args=([{'type': 'created'}],))
+        thread.start()
+        thread.join()
+        assert await first.get(1) == await second.get(1) == {'type': 'created'}
+
+        broker.unsubscribe(second)
+        broker.publish([{'type': 'created', 'count': n} for n in range(4)])
+        await asyncio.sleep(0)
+        assert first.drain() == [events.OVERFLOW, {'type': 'created', 'count': 3}]
+        assert await second.get(0.01) is None
+
+    async_to_sync(scenario)()
+
+
+@pytest.mark.django_db
+def test_long_poll_waits_for_the_next_events(api_client, broker):
+    url = reverse('api_client_request_events')
+
+    async def scenario():
+        async def publish_soon():
+            await asyncio.sleep(0.05)
+            broker.publish([{'type': 'created', 'count': 1}, {'type': 'status_changed', 'count': 2}])
+
+        response, _ = await asyncio.gather(api_client.get(url, {'timeout': 5}), publish_soon())
+        return response
+
+    response = async_to_sync(scenario)()
+    assert json.loads(response.content) == {'events': [{'type': 'created', 'count': 1}, {'type': 'status_changed', 'count': 2}]}
+    assert json.loads(async_to_sync(api_client.get)(url, {'timeout': 0}).content) == {'events': []}
+    assert async_to_sync(api_client.get)(url, {'timeout': 600}).status_code == 400
+    assert not broker.subscribers
+
+
+@pytest.mark.django_db
+def test_event_stream_sends_server_sent_events(api_client, broker, monkeypatch):
+    monkeypatch.setattr(events, 'EVENTS_STREAM_SECONDS', 0.2)
+
+    async def scenario():
+        response = await api_client.get(reverse('api_client_request_events'), headers={'Accept': 'text/event-stream'})
+        broker.publish([events.make_event('created', 1, 'Pending', None, 1, [5])])
+        return response, b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+    response, body = async_to_sync(scenario)()
+    assert response['Content-Type'] == 'text/event-stream'
+    assert body.startswith('retry: ')
+    assert 'event: created\ndata: {"type": "created", "client": 1, "status": "Pending"' in body
+    assert not broker.subscribers
+
+
+@pytest.mark.django_db
+def test_event_stream_is_refused_under_wsgi(admin_client, broker):
+    url = reverse('api_client_request_events')
+    response = admin_client.get(url, headers={'Accept': 'text/event-stream'})
+    assert response.status_code == 501 and not broker.subscribers
+    # The long poll still works
+    assert admin_client.get(url, {'timeout': 0}).json() == {'events': []}
+
+
+@pytest.mark.django_db
+def test_events_need_permission(async_client, django_user_model):
+    url = reverse('api_client_request_events')
+    assert async_to_sync(async_client.get)(url, {'timeout': 0}).status_code == 401
+    async_client.force_login(django_user_model.objects.create_user(username='nopermission', is_staff=True))
+    assert async_to_sync(async_client.get)(url, {'timeout': 0}).status_code == 403
+
+
+@pytest.mark.django_db
+def test_changelist_listens_only_under_asgi(admin_client, settings):
+    url = reverse('admin:main_clientrequest_changelist')
+    assert b'client_request_events.js' not in admin_client.get(url).content
+    settings.SERVER_INTERFACE = 'asgi'
+    content = admin_client.get(url).content.decode()
+    assert 'client_request_events.js' in content and f'data-url="{reverse("api_client_request_events")}"' in content
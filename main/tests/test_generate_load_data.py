@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F
+from main.models import Client, RequestType, ClientRequest
+from main.sla import compute_sla
+
+# Tests for the generate_load_data management command (small volumes, SQLite-friendly)
+
+
+def generate(seed=7):
+    call_command(
+        'generate_load_data', clients=20, request_types=4, requests=300,
+        seed=seed, until='2026-01-01', batch_size=64, verbosity=0,
+    )
+
+
+def snapshot():
+    # Data independent of primary key values, so two runs can be compared
+    first_client = Client.objects.order_by('pk').values_list('pk', flat=True).first()
+    return [
+        (client_id - first_client, status, created_at, updated_at)
+        for client_id, status, created_at, updated_at in ClientRequest.objects.order_by('pk').values_list(
+            'client_id', 'status', 'created_at', 'updated_at'
+        )
+    ]
+
+
+@pytest.mark.django_db
+def test_generates_requested_volumes():
+    generate()
+    assert Client.objects.count() == 20
+    assert RequestType.objects.count() == 4
+    assert ClientRequest.objects.count() == 300
+    # Generated timestamps are kept rather than stamped with "now" by auto_now
+    assert not ClientRequest.objects.filter(updated_at__lt=F('created_at')).exists()
+    assert ClientRequest.objects.filter(created_at__year__lt=2025).exists()
+
+
+@pytest.mark.django_db
+def test_same_seed_gives_same_data():
+    generate(seed=3)
+    first_run = snapshot()
+    ClientRequest.objects.all().delete()
+    Client.objects.all().delete()
+    RequestType.objects.all().delete()
+    generate(seed=3)
+    assert snapshot() == first_run
+
+
+@pytest.mark.django_db
+def test_requests_are_skewed_towards_few_clients():
+    generate()
+    per_client = sorted(
+        Client.objects.annotate(requests=Count('clientrequest')).values_list('requests', flat=True),
+        reverse=True,
+    )
+    # The busiest quarter of clients owns well over half of the requests
+    assert sum(per_client[:5]) > 300 / 2
+
+
+@pytest.mark.django_db
+def test_sla_columns_are_filled_in():
+    generate()
+    assert RequestType.objects.filter(sla_hours__isnull=True).exists()
+    assert ClientRequest.objects.filter(due_at__isnull=False).exists()
+    assert ClientRequest.objects.filter(sla_breached=True).exists()
+    # Exactly what compute_sla would have set as of --until
+    assert compute_sla(now=datetime(2026, 1, 1, tzinfo=timezone.utc)) == (0, 0, 0)
@@ -0,0 +1,144 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from main.importers import import_file
+from main.models import Client, RequestType, ClientRequest
+
+# Tests for the streaming CSV/JSONL import (main.importers, import_data command and admin upload page)
+
+
+def csv_file(text):
+    return io.BytesIO(text.encode())
+
+
+def jsonl_file(rows):
+    return io.BytesIO('\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows).encode())
+
+
+@pytest.fixture
+def request_type(db):
+    return RequestType.objects.create(name='Plugin Updates')
+
+
+@pytest.mark.django_db
+def test_imports_clients_from_csv():
+    result = import_file(csv_file(
+        'name,email,is_active,created_at\n'
+        'Acme,info@acme.example,yes,2025-01-02T10:00:00Z\n'
+        'Globex,,no,\n'
+    ), 'clients', 'csv')
+    assert (result.imported, result.error_count) == (2, 0)
+    acme = Client.objects.get(name='Acme')
+    assert acme.is_active and acme.created_at.year == 2025
+    globex = Client.objects.get(name='Globex')
+    assert globex.email is None and not globex.is_active
+
+
+@pytest.mark.django_db
+def test_bad_rows_are_reported_without_aborting_the_file(request_type):
+    Client.objects.create(name='Acme')
+    result = import_file(jsonl_file([
+        {'client': 'Acme', 'request_type': 'Plugin Updates', 'description': 'ok'},
+        {'client': 'Nobody', 'request_type': 'Plugin Updates'},
+        '{not json',
+        {'client': 'Acme', 'request_type': 'Plugin Updates', 'status': 'Lost'},
+        {'client': 'Acme', 'request_type_id': request_type.pk, 'status': 'Completed'},
+    ]), 'requests', 'jsonl', batch_size=2)
+    assert result.imported == 2
+    assert [line for line, _ in result.errors] == [2, 3, 4]
+    assert "No client named 'Nobody'" in result.errors[0][1]
+    assert 'status' in result.errors[2][1]
+    assert sorted(ClientRequest.objects.values_list('status', flat=True)) == ['Completed', 'Pending']
+
+
+@pytest.mark.django_db
+def test_undecodable_and_malformed_lines_are_rejected_one_by_one():
+    # A cp1252 "é" on line 3 and an oversized field on line 4 spoil only their own rows
+    rows = b'name,email\nAcme,acme@example.com\nCaf\xe9 Ltd,cafe@example.com\n"' + b'x' * 200 + b'"\nGlobex,\n'
+    limit = csv.field_size_limit(100)
+    try:
+        result = import_file(io.BytesIO(rows), 'clients', 'csv')
+    finally:
+        csv.field_size_limit(limit)
+    assert result.imported == 2
+    assert [line for line, _ in result.errors] == [3, 4]
+    assert 'UTF-8' in result.errors[0][1] and 'Invalid CSV' in result.errors[1][1]
+    assert sorted(Client.objects.values_list('name', flat=True)) == ['Acme', 'Globex']
+
+    result = import_file(io.BytesIO(b'{"name": "Caf\xe9"}\n{"name": "Initech"}\n'), 'clients', 'jsonl')
+    assert (result.imported, result.errors[0][0]) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_ambiguous_client_names_must_use_the_id(request_type):
+    first = Client.objects.create(name='Twin')
+    Client.objects.create(name='Twin')
+    result = import_file(jsonl_file([
+        {'client': 'Twin', 'request_type': 'Plugin Updates'},
+        {'client': 'Twin', 'client_id': first.pk, 'request_type': 'Plugin Updates'},
+    ]), 'requests', 'jsonl')
+    assert result.imported == 1
+    assert 'Several clients' in result.errors[0][1]
+    assert ClientRequest.objects.get().client == first
+
+
+@pytest.mark.django_db
+def test_name_lookups_are_batched_and_cached(request_type):
+    for i in range(5):
+        Client.objects.create(name=f'Client {i}')
+    rows = [{'client': f'Client {i % 5}', 'request_type': 'Plugin Updates'} for i in range(200)]
+    with CaptureQueriesContext(connection) as queries:
+        result = import_file(jsonl_file(rows), 'requests', 'jsonl', batch_size=50)
+    assert result.imported == 200
+    # The names are only looked up in the first batch, then served from the cache
+    lookups = [
+        q['sql'] for q in queries.captured_queries
+        if q['sql'].startswith(('SELECT "main_client".', 'SELECT "main_requesttype".'))
+    ]
+    assert len(lookups) == 2
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(tmp_path):
+    path = tmp_path / 'clients.csv'
+    path.write_text('name\nAcme\n\n')
+    call_command('import_data', 'clients', str(path), '--dry-run', stdout=io.StringIO())
+    assert not Client.objects.exists()
+    out = io.StringIO()
+    call_command('import_data', 'clients', str(path), stdout=out)
+    assert '1 of 1 rows imported' in out.getvalue()
+    assert Client.objects.filter(name='Acme').exists()
+
+
+@pytest.mark.django_db
+def test_admin_upload(client, django_user_model):
+    user = django_user_model.objects.create_superuser(username='importer', password='importerpass123')
+    client.force_login(user)
+    url = reverse('admin:main_client_import')
+    assert client.get(url).status_code == 200
+    upload = SimpleUploadedFile('clients.csv', b'name,email\nAcme,acme@example.com\n,missing@example.com\n')
+    response = client.post(url, {'kind': 'clients', 'file': upload})
+    assert response.status_code == 200
+    assert response.context['result'].imported == 1
+    assert b'name: This field cannot be blank.' in response.content
+    assert Client.objects.filter(name='Acme').exists()
+
+
+@pytest.mark.django_db
+def test_admin_upload_needs_add_permission(client, django_user_model):
+    from django.contrib.auth.models import Permission
+
+    user = django_user_model.objects.create_user(username='viewer', password='viewerpass123', is_staff=True)
+    user.user_permissions.add(Permission.objects.get(codename='view_client'))
+    client.force_login(user)
+    upload = SimpleUploadedFile('clients.csv', b'name\nAcme\n')
+    response = client.post(reverse('admin:main_client_import'), {'kind': 'clients', 'file': upload})
+    assert response.status_code == 403
+    assert not Client.objects.exists()
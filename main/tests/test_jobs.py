@@ -0,0 +1,206 @@
+import io
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from main.jobs import TASKS, claim, enqueue, progress, requeue_stale, run
+from main.models import Client, RequestType, ClientRequest, ClientRequestStatusChange, Job
+
+# Tests for the background job queue (main/jobs.py), its admin and the run_jobs worker
+
+
+@pytest.fixture
+def requests(db):
+    acme = Client.objects.create(name='Acme')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    pending = [ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending') for _ in range(5)]
+    completed = ClientRequest.objects.create(client=acme, request_type=request_type, status='Completed')
+    return pending, completed
+
+
+def run_all():
+    # What the worker loop does, without its sleeping and connection handling
+    finished = []
+    while (job := claim('test-worker')) is not None:
+        finished.append(run(job))
+    return finished
+
+
+def mark_all_completed(admin_client, query=''):
+    # "Select all" on the changelist, filtered by the query string, then "Mark as Completed"
+    return admin_client.post(f"{reverse('admin:main_clientrequest_changelist')}{query}", {
+        'action': 'mark_as_completed', 'select_across': '1', '_selected_action': ['0'], 'index': '0',
+    })
+
+
+@pytest.mark.django_db
+def test_large_status_action_runs_as_chunked_job(admin_client, admin_user, requests, settings):
+    settings.JOBS_BACKGROUND_ROWS = 3
+    settings.JOBS_CHUNK_SIZE = 2
+    pending, completed = requests
+
+    response = mark_all_completed(admin_client, '?status__exact=Pending')
+    assert response.status_code == 302
+    # Nothing is changed in the request itself
+    assert ClientRequest.objects.filter(status='Pending').count() == 5
+    job = Job.objects.get()
+    assert (job.task, job.status, job.created_by) == ('admin_action', Job.QUEUED, admin_user)
+    assert job.args['changelist'] == 'status__exact=Pending'
+
+    [job] = run_all()
+    assert job.status == Job.SUCCEEDED
+    assert (job.progress_done, job.progress_total, job.args['after']) == (5, 5, pending[-1].pk)
+    assert job.message == 'Mark selected requests as Completed: 5 client requests processed.'
+    assert not ClientRequest.objects.exclude(status='Completed').exists()
+    # The chunks ran as the user who queued the job
+    assert set(ClientRequestStatusChange.objects.filter(to_status='Completed', from_status='Pending')
+               .values_list('changed_by', flat=True)) == {admin_user.pk}
+
+
+@pytest.mark.django_db
+def test_small_selections_run_in_the_request(admin_client, requests, settings):
+    settings.JOBS_BACKGROUND_ROWS = 10
+    assert mark_all_completed(admin_client).status_code == 302
+    assert not Job.objects.exists()
+    assert not ClientRequest.objects.exclude(status='Completed').exists()
+
+
+@pytest.mark.django_db
+def test_failed_runs_are_retried_from_their_checkpoint(monkeypatch, settings):
+    settings.JOBS_RETRY_SECONDS = 30
+    calls = []
+
+    def flaky(job, after=0):
+        calls.append(after)
+        job.args['after'] = after + 10
+        progress(job, after + 10)
+        if len(calls) < 3:
+            raise RuntimeError('database went away')
+        return 'done'
+
+    monkeypatch.setitem(TASKS, 'flaky', flaky)
+    job = enqueue('flaky', max_attempts=3)
+    run(claim('test-worker'))
+    job.refresh_from_db()
+    assert job.status == Job.QUEUED and 'database went away' in job.error
+    assert job.run_after > timezone.now() + timedelta(seconds=25)
+    # Not due yet, so not claimed
+    assert claim('test-worker') is None
+
+    for _ in range(2):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        run(claim('test-worker'))
+    job.refresh_from_db()
+    assert calls == [0, 10, 20]
+    assert (job.status, job.attempts, job.message) == (Job.SUCCEEDED, 3, 'done')
+
+    with pytest.raises(ValueError):
+        enqueue('no-such-task')
+
+
+@pytest.mark.django_db
+def test_jobs_fail_once_out_of_attempts(monkeypatch):
+    def broken(job):
+        raise RuntimeError('bad data')
+
+    monkeypatch.setitem(TASKS, 'broken', broken)
+    enqueue('broken', max_attempts=1)
+    [job] = run_all()
+    assert job.status == Job.FAILED and job.finished_at is not None and 'bad data' in job.error
+
+
+@pytest.mark.django_db
+def test_stale_running_jobs_are_requeued_or_failed(settings):
+    settings.JOBS_STALE_SECONDS = 60
+    old = timezone.now() - timedelta(seconds=120)
+    retry = Job.objects.create(task='admin_action', status=Job.RUNNING, attempts=1, max_attempts=3, heartbeat_at=old)
+    spent = Job.objects.create(task='admin_action', status=Job.RUNNING, attempts=3, max_attempts=3, heartbeat_at=old)
+    alive = Job.objects.create(task='admin_action', status=Job.RUNNING, attempts=1, heartbeat_at=timezone.now())
+    assert requeue_stale() == 2
+    statuses = dict(Job.objects.values_list('pk', 'status'))
+    assert statuses == {retry.pk: Job.QUEUED, spent.pk: Job.FAILED, alive.pk: Job.RUNNING}
+
+
+@pytest.mark.django_db
+def test_a_requeued_job_is_left_to_its_new_worker(monkeypatch):
+    chunks = []
+
+    def handed_over(job):
+        chunks.append(1)
+        # Meanwhile the job was found stale, requeued and claimed by another worker
+        Job.objects.filter(pk=job.pk).update(worker='other-worker', attempts=2)
+        progress(job, 1)
+        chunks.append(2)
+
+    monkeypatch.setitem(TASKS, 'handed_over', handed_over)
+    enqueue('handed_over')
+    [job] = run_all()
+    # The first worker stopped at its next checkpoint and recorded nothing over the new owner
+    assert chunks == [1]
+    job.refresh_from_db()
+    assert (job.status, job.worker, job.attempts, job.progress_done) == (Job.RUNNING, 'other-worker', 2, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_is_refreshed_during_a_long_chunk(monkeypatch, settings):
+    settings.JOBS_STALE_SECONDS = 3
+    beats = []
+
+    def slow(job):
+        claimed = Job.objects.get(pk=job.pk).heartbeat_at
+        time.sleep(1.5)
+        beats.append(Job.objects.get(pk=job.pk).heartbeat_at > claimed)
+
+    monkeypatch.setitem(TASKS, 'slow', slow)
+    enqueue('slow')
+    [job] = run_all()
+    assert beats == [True] and job.status == Job.SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_large_imports_are_queued(admin_client, settings, tmp_path):
+    settings.JOBS_BACKGROUND_IMPORT_BYTES = 10
+    settings.MEDIA_ROOT = str(tmp_path)
+    upload = SimpleUploadedFile('clients.csv', b'name,email\nAcme,acme@example.com\n,missing@example.com\n')
+    response = admin_client.post(reverse('admin:main_client_import'), {'kind': 'clients', 'file': upload})
+    assert response.status_code == 302
+    assert not Client.objects.exists()
+    path = Job.objects.get().args['path']
+    assert (tmp_path / path).read_bytes().startswith(b'name,email\n')
+
+    [job] = run_all()
+    assert job.status == Job.SUCCEEDED and job.max_attempts == 1
+    assert job.result['summary'] == '1 of 2 rows imported, 1 rejected.'
+    assert 'name: This field cannot be blank.' in job.result['errors'][0][1]
+    assert not (tmp_path / path).exists()
+    assert Client.objects.filter(name='Acme').exists()
+
+
+@pytest.mark.django_db
+def test_job_admin_lists_progress_and_retries_failed_jobs(admin_client):
+    failed = Job.objects.create(task='admin_action', status=Job.FAILED, attempts=3, progress_done=40, progress_total=100)
+    response = admin_client.get(reverse('admin:main_job_changelist'))
+    assert response.status_code == 200
+    assert b'40 / 100 (40%)' in response.content
+    assert admin_client.get(reverse('admin:main_job_change', args=[failed.pk])).status_code == 200
+
+    response = admin_client.post(reverse('admin:main_job_changelist'), {
+        'action': 'retry_jobs', '_selected_action': [failed.pk], 'index': '0',
+    })
+    assert response.status_code == 302
+    failed.refresh_from_db()
+    assert (failed.status, failed.attempts) == (Job.QUEUED, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_jobs_command(requests, admin_user, settings):
+    settings.JOBS_BACKGROUND_ROWS = 1
+    enqueue('admin_action', {'model': 'main.clientrequest', 'action': 'mark_as_in_progress'}, user=admin_user)
+    out = io.StringIO()
+    call_command('run_jobs', once=True, stdout=out)
+    assert 'succeeded' in out.getvalue()
+    assert ClientRequest.objects.filter(status='In Progress').count() == 6
@@ -0,0 +1,90 @@
+import subprocess
+import sys
+
+import pytest
+from django.urls import reverse
+from main.metrics import registry
+from main.models import Client, RequestType, ClientRequest
+from prometheus_client import generate_latest
+
+# Tests for the Prometheus metrics endpoint (main/metrics.py)
+
+
+def scrape(client, **extra):
+    response = client.get(reverse('metrics'), **extra)
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
+    return response.content.decode()
+
+
+def sample(text, name, **labels):
+    # Value of one sample in the text exposition format (labels sorted by name), None when absent
+    label_text = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+    prefix = f'{name}{{{label_text}}} ' if labels else f'{name} '
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+
+@pytest.mark.django_db
+def test_metrics_cover_requests_queries_cache_and_statuses(admin_client, client, settings):
+    # Cached sessions, as with CACHE_BACKEND=redis
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    settings.METRICS_TOKEN = 's3cret'
+    client.defaults['HTTP_AUTHORIZATION'] = 'Bearer s3cret'
+    acme = Client.objects.create(name='Acme')
+    request_type = RequestType.objects.create(name='Plugin Updates')
+    for status in ('Pending', 'Pending', 'Completed'):
+        ClientRequest.objects.create(client=acme, request_type=request_type, status=status)
+
+    view = 'custom_admin:main_client_changelist'
+    before = sample(scrape(client), 'django_http_requests_total', view=view, method='GET', status='200') or 0
+    admin_client.get(reverse('admin:main_client_changelist'))
+    admin_client.get(reverse('admin:main_client_changelist'))
+    text = scrape(client)
+
+    assert sample(text, 'django_http_requests_total', view=view, method='GET', status='200') == before + 2
+    assert sample(text, 'django_http_request_duration_seconds_count', view=view) >= 2
+    assert sample(text, 'django_db_queries_per_request_sum', view=view) > 0
+    assert sample(text, 'django_db_query_duration_seconds_count', alias='default') > 0
+    assert sample(text, 'django_db_requests_total', alias='default', connection='reused') > 0
+    # Sessions are read through the cached_db backend's cache alias
+    assert 'django_cache_requests_total{cache="sessions",result=' in text
+    assert sample(text, 'crms_client_requests', status='Pending') == 2
+    assert sample(text, 'crms_client_requests', status='Completed') == 1
+    assert sample(text, 'crms_client_requests', status='In Progress') == 0
+
+
+@pytest.mark.django_db
+def test_metrics_access(client, settings):
+    # Without a token nothing is served: behind the proxy every request comes from a private address
+    assert client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code == 403
+    assert client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code == 403
+
+    # Except for local development
+    settings.DEBUG = True
+    assert client.get(reverse('metrics'), REMOTE_ADDR='8.8.8.8').status_code == 403
+    assert client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code == 200
+
+    settings.DEBUG = False
+    settings.METRICS_TOKEN = 's3cret'
+    assert client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code == 403
+    assert client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+    scrape(client, HTTP_AUTHORIZATION='Bearer s3cret', REMOTE_ADDR='8.8.8.8')
+
+
+@pytest.mark.django_db
+def test_metrics_are_merged_across_worker_processes(tmp_path, monkeypatch):
+    # Two "workers" each count a request into the shared directory, as under gunicorn
+    worker = (
+        "from prometheus_client import Counter;"
+        "Counter('django_http_requests_total', '', ['view', 'method', 'status']).labels('login', 'POST', '302').inc()"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', worker], check=True, env={'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)})
+
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    text = generate_latest(registry()).decode()
+    assert sample(text, 'django_http_requests_total', method='POST', status='302', view='login') == 2
+    assert sample(text, 'crms_client_requests', status='Pending') == 0
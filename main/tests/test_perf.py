@@ -0,0 +1,92 @@
+import json
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from main.models import Client
+from main.perf import PerfMiddleware, perf_stats, query_signature
+
+# Tests for the request instrumentation middleware and the admin performance page (main/perf.py)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    perf_stats.reset()
+    yield
+    perf_stats.reset()
+
+
+def stats_for(view):
+    return next(row for row in perf_stats.report() if row['view'] == view)
+
+
+def test_query_signature_folds_parameters():
+    assert query_signature('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21') == 'SELECT * FROM t WHERE id IN (...) LIMIT ?'
+    assert query_signature("SELECT * FROM t WHERE name = 'Acme' AND id IN (%s)") == 'SELECT * FROM t WHERE name = ? AND id IN (%s)'
+    assert query_signature('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)') == query_signature('INSERT INTO t (a, b) VALUES (%s, %s)') + ', ...'
+
+
+@pytest.mark.django_db
+def test_repeated_queries_are_flagged_and_logged(settings, caplog):
+    settings.PERF_DUPLICATE_QUERIES = 3
+    clients = [Client.objects.create(name=f'Client {i}') for i in range(4)]
+
+    def n_plus_one(request):
+        # One query per row, the pattern the middleware looks for
+        for client in clients:
+            Client.objects.get(pk=client.pk)
+        return HttpResponse()
+
+    request = RequestFactory().get('/admin/main/client/')
+    request.resolver_match = resolve(reverse('admin:main_client_changelist'))
+    with caplog.at_level(logging.WARNING, logger='main.perf'):
+        PerfMiddleware(n_plus_one)(request)
+
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line['view'] == 'custom_admin:main_client_changelist'
+    assert line['queries'] == 4 and line['db_ms'] >= 0 and not line['slow']
+    assert line['duplicates'][0]['count'] == 4 and 'FROM "main_client"' in line['duplicates'][0]['sql']
+
+    stats = stats_for('custom_admin:main_client_changelist')
+    assert (stats['requests'], stats['queries_max'], stats['duplicated']) == (1, 4, 1)
+
+
+@pytest.mark.django_db
+def test_quiet_requests_are_recorded_but_not_logged(admin_client, caplog):
+    with caplog.at_level(logging.WARNING, logger='main.perf'):
+        for _ in range(3):
+            assert admin_client.get(reverse('admin:main_client_changelist')).status_code == 200
+    assert not caplog.records
+    stats = stats_for('custom_admin:main_client_changelist')
+    assert stats['requests'] == 3 and stats['queries_p95'] > 0
+    assert stats['wall_ms']['p50'] <= stats['wall_ms']['p95'] <= stats['wall_ms']['p99']
+
+
+@pytest.mark.django_db
+def test_async_views_are_measured(async_client, django_user_model):
+    user = django_user_model.objects.create_user(username='integrator', is_staff=True)
+    user.user_permissions.add(Permission.objects.get(codename='view_client'))
+    async_client.force_login(user)
+    Client.objects.create(name='Acme')
+    assert async_to_sync(async_client.get)(reverse('api_client_list')).status_code == 200
+    assert stats_for('api_client_list')['queries_max'] > 0
+
+
+@pytest.mark.django_db
+def test_performance_page(admin_client, client, django_user_model):
+    admin_client.get(reverse('admin:main_client_changelist'))
+    response = admin_client.get(reverse('admin:performance'))
+    assert response.status_code == 200
+    assert 'custom_admin:main_client_changelist' in [row['view'] for row in response.context['views']]
+    assert admin_client.post(reverse('admin:performance')).status_code == 302
+    # Only the resetting request itself is left
+    assert [row['view'] for row in perf_stats.report()] == ['custom_admin:performance']
+
+    # Staff can read the figures; only superusers reset them
+    client.force_login(django_user_model.objects.create_user(username='staffonly', is_staff=True))
+    assert client.get(reverse('admin:performance')).status_code == 200
+    assert client.post(reverse('admin:performance')).status_code == 403
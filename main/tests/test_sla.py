@@ -0,0 +1,119 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from main.importers import import_file
+from main.models import Client, RequestType, ClientRequest
+from main.sla import compute_sla
+
+# Tests for SLA targets, the overdue admin filter and the compute_sla command (main/sla.py)
+
+
+@pytest.fixture
+def setup(db):
+    acme = Client.objects.create(name='Acme')
+    urgent = RequestType.objects.create(name='Outage', sla_hours=4)
+    routine = RequestType.objects.create(name='Plugin Updates')
+    return acme, urgent, routine
+
+
+def make(client, request_type, status='Pending', hours_ago=0):
+    return ClientRequest.objects.create(
+        client=client, request_type=request_type, status=status, created_at=timezone.now() - timedelta(hours=hours_ago),
+    )
+
+
+@pytest.mark.django_db
+def test_due_at_follows_the_request_type_target(setup):
+    acme, urgent, routine = setup
+    obj = make(acme, urgent)
+    assert obj.due_at == obj.created_at + timedelta(hours=4)
+    assert make(acme, routine).due_at is None
+
+    import_file(io.BytesIO(f'client_id,request_type_id\n{acme.pk},{urgent.pk}\n'.encode()), 'requests', 'csv')
+    imported = ClientRequest.objects.latest('pk')
+    assert imported.due_at == imported.created_at + timedelta(hours=4)
+
+
+@pytest.mark.django_db
+def test_due_at_is_recomputed_only_when_its_inputs_change(setup):
+    acme, urgent, routine = setup
+    loaded = ClientRequest.objects.get(pk=make(acme, urgent).pk)
+    loaded.description = 'Notes'
+    with CaptureQueriesContext(connection) as queries:
+        loaded.save()
+    # The request type is not read for an edit that cannot move the due date
+    assert not any('"main_requesttype"' in query['sql'] for query in queries.captured_queries)
+
+    loaded.request_type_id = routine.pk
+    loaded.save()
+    assert ClientRequest.objects.get(pk=loaded.pk).due_at is None
+
+
+@pytest.mark.django_db
+def test_sla_list_filter(admin_client, setup):
+    acme, urgent, routine = setup
+    overdue = make(acme, urgent, hours_ago=5)
+    due_soon = make(acme, urgent, hours_ago=1)
+    make(acme, urgent, status='Completed', hours_ago=5)
+    make(acme, routine, hours_ago=500)
+
+    def listed(value):
+        response = admin_client.get(reverse('admin:main_clientrequest_changelist'), {'sla': value})
+        return [obj.pk for obj in response.context['cl'].result_list]
+
+    assert listed('overdue') == [overdue.pk]
+    assert listed('due_soon') == [due_soon.pk]
+    assert listed('breached') == []
+    compute_sla()
+    assert listed('breached') == [overdue.pk]
+
+
+@pytest.mark.django_db
+def test_compute_sla_flags_breaches_in_batches(setup):
+    acme, urgent, routine = setup
+    open_late = make(acme, urgent, hours_ago=5)
+    on_time = make(acme, urgent, hours_ago=1)
+    completed_late = make(acme, urgent, hours_ago=6)
+    completed_on_time = make(acme, urgent, hours_ago=2)
+    ClientRequest.objects.filter(pk__in=[completed_late.pk, completed_on_time.pk]).set_status('Completed')
+    untargeted = make(acme, routine, hours_ago=100)
+
+    assert compute_sla(batch_size=2) == (0, 2, 0)
+    breached = set(ClientRequest.objects.filter(sla_breached=True).values_list('pk', flat=True))
+    assert breached == {open_late.pk, completed_late.pk}
+    # Nothing changes on a second run
+    assert compute_sla(batch_size=2) == (0, 0, 0)
+
+    # A looser target moves the due dates and clears the flags it no longer supports
+    RequestType.objects.filter(pk=urgent.pk).update(sla_hours=48)
+    RequestType.objects.filter(pk=routine.pk).update(sla_hours=24)
+    assert compute_sla(batch_size=2) == (5, 1, 2)
+    open_late.refresh_from_db()
+    assert open_late.due_at == open_late.created_at + timedelta(hours=48) and not open_late.sla_breached
+    assert set(ClientRequest.objects.filter(sla_breached=True).values_list('pk', flat=True)) == {untargeted.pk}
+    assert not ClientRequest.objects.get(pk=on_time.pk).sla_breached
+
+
+@pytest.mark.django_db
+def test_new_target_in_admin_applies_to_open_requests(admin_client, setup):
+    acme, urgent, routine = setup
+    pending = make(acme, routine, hours_ago=10)
+    completed = make(acme, routine, status='Completed', hours_ago=10)
+    response = admin_client.post(reverse('admin:main_requesttype_change', args=[routine.pk]), {
+        'name': routine.name, 'sla_hours': 8, 'description': '',
+    })
+    assert response.status_code == 302
+    pending.refresh_from_db()
+    completed.refresh_from_db()
+    assert pending.due_at == pending.created_at + timedelta(hours=8)
+    assert completed.due_at is None
+
+    out = io.StringIO()
+    call_command('compute_sla', stdout=out)
+    assert '1 due dates updated, 1 requests flagged as breached' in out.getvalue()
@@ -0,0 +1,124 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from main.history import changes_per_day
+from main.importers import import_file
+from main.models import Client, RequestType, ClientRequest, ClientRequestStatusChange
+
+# Tests for the append-only status history (main/history.py) and its admin inline
+
+
+@pytest.fixture
+def setup(db):
+    return Client.objects.create(name='Acme'), RequestType.objects.create(name='Plugin Updates')
+
+
+def timeline(obj):
+    return list(
+        ClientRequestStatusChange.objects.filter(request=obj).order_by('changed_at', 'id').values_list('from_status', 'to_status')
+    )
+
+
+@pytest.mark.django_db
+def test_save_records_creation_and_status_changes(setup):
+    acme, request_type = setup
+    obj = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    obj.description = 'No status change, no history row'
+    obj.save()
+    obj = ClientRequest.objects.get(pk=obj.pk)
+    obj.status = 'In Progress'
+    obj.save()
+    assert timeline(obj) == [(None, 'Pending'), ('Pending', 'In Progress')]
+
+
+@pytest.mark.django_db
+def test_bulk_action_records_every_change_in_one_insert(admin_client, admin_user, setup):
+    acme, request_type = setup
+    pending = [ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending') for _ in range(5)]
+    started = ClientRequest.objects.create(client=acme, request_type=request_type, status='In Progress')
+    done = ClientRequest.objects.create(client=acme, request_type=request_type, status='Completed')
+    ClientRequestStatusChange.objects.all().delete()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_client.post(reverse('admin:main_clientrequest_changelist'), {
+            'action': 'mark_as_completed', '_selected_action': [obj.pk for obj in (*pending, started, done)],
+        })
+    assert response.status_code == 302
+    history_table = ClientRequestStatusChange._meta.db_table
+    assert sum(f'INSERT INTO "{history_table}"' in query['sql'] for query in queries.captured_queries) == 1
+
+    # Requests already Completed are not recorded; the others keep their previous status
+    changes = ClientRequestStatusChange.objects.order_by('request_id')
+    assert [(change.request_id, change.from_status, change.to_status) for change in changes] == [
+        *((obj.pk, 'Pending', 'Completed') for obj in pending), (started.pk, 'In Progress', 'Completed'),
+    ]
+    assert {change.changed_by_id for change in changes} == {admin_user.pk}
+
+
+@pytest.mark.django_db
+def test_batch_api_and_import_record_history(async_client, django_user_model, setup):
+    acme, request_type = setup
+    existing = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    user = django_user_model.objects.create_user(username='ticketing', is_staff=True)
+    user.user_permissions.add(*Permission.objects.filter(codename__in=['add_clientrequest', 'change_clientrequest']))
+    async_client.force_login(user)
+    response = async_to_sync(async_client.post)(reverse('api_client_request_batch'), json.dumps({'operations': [
+        {'op': 'create', 'client': acme.pk, 'request_type': request_type.pk, 'status': 'Pending'},
+        {'op': 'update', 'id': existing.pk, 'status': 'In Progress'},
+    ]}), content_type='application/json')
+    created_id = json.loads(response.content)['results'][0]['id']
+    assert timeline(created_id) == [(None, 'Pending')]
+    assert timeline(existing) == [(None, 'Pending'), ('Pending', 'In Progress')]
+    assert ClientRequestStatusChange.objects.filter(request=existing, to_status='In Progress').get().changed_by == user
+
+    import_file(io.BytesIO(f'client_id,request_type_id,status\n{acme.pk},{request_type.pk},Completed\n'.encode()), 'requests', 'csv')
+    imported = ClientRequest.objects.latest('pk')
+    assert timeline(imported) == [(None, 'Completed')]
+
+
+@pytest.mark.django_db
+def test_history_outlives_deleted_requests(setup):
+    acme, request_type = setup
+    obj = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    pk = obj.pk
+    ClientRequest.objects.filter(pk=pk).delete()
+    assert timeline(pk) == [(None, 'Pending')]
+
+
+@pytest.mark.django_db
+def test_changes_per_day(setup):
+    acme, request_type = setup
+    objs = [ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending') for _ in range(3)]
+    ClientRequest.objects.filter(pk__in=[obj.pk for obj in objs]).set_status('Completed')
+    ClientRequestStatusChange.objects.filter(request=objs[0], to_status='Completed').update(
+        changed_at=timezone.now() - timedelta(days=2),
+    )
+    today = timezone.now().date()
+    assert changes_per_day('Completed', days=7) == {today: 2, today - timedelta(days=2): 1}
+    assert changes_per_day('Completed', days=1) == {today: 2}
+
+
+@pytest.mark.django_db
+def test_change_page_shows_read_only_history(client, django_user_model, setup):
+    acme, request_type = setup
+    obj = ClientRequest.objects.create(client=acme, request_type=request_type, status='Pending')
+    ClientRequest.objects.filter(pk=obj.pk).set_status('In Progress')
+
+    # A user who may only view requests still sees their history
+    viewer = django_user_model.objects.create_user(username='viewer', is_staff=True)
+    viewer.user_permissions.add(Permission.objects.get(codename='view_clientrequest'))
+    client.force_login(viewer)
+    response = client.get(reverse('admin:main_clientrequest_change', args=[obj.pk]))
+    assert response.status_code == 200
+    inline = response.context['inline_admin_formsets'][0]
+    assert inline.opts.model is ClientRequestStatusChange
+    assert not inline.has_add_permission and not inline.has_change_permission and not inline.has_delete_permission
+    assert [form.original.to_status for form in inline] == ['Pending', 'In Progress']
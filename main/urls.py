@@ -1,4 +1,6 @@
 from .views import *
+from . import api
+from django.conf import settings
 from django.urls import path
 from main.admin import custom_admin_site
 from django.contrib.auth.views import LogoutView
@@ -10,6 +12,8 @@ from django.contrib.auth.views import LogoutView
 # - 'login/' routes to the custom login page with tailored authentication logic
 # - 'logout/' uses Django's built-in LogoutView to log users out
 # - 'account-disabled/' routes to a page informing users their account is disabled (e.g., non-staff users)
+# - 'api/v1/...' is the versioned, read-only JSON API for integrations (main/api.py)
+# - 'metrics' serves Prometheus metrics to the scraper (main/metrics.py), when METRICS_ENABLED
 
 urlpatterns = [
     path('admin/', custom_admin_site.urls, name='custom_admin'),
@@ -19,5 +23,20 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('logout/', LogoutView.as_view(), name='logout'),
     
-    path('account-disabled/', AccountDisabledView.as_view(), name='account_disabled')
+    path('account-disabled/', AccountDisabledView.as_view(), name='account_disabled'),
+
+    path('api/v1/clients/', api.clients.list_view, name='api_client_list'),
+    path('api/v1/clients/<int:pk>/', api.clients.detail_view, name='api_client_detail'),
+    path('api/v1/request-types/', api.request_types.list_view, name='api_request_type_list'),
+    path('api/v1/request-types/<int:pk>/', api.request_types.detail_view, name='api_request_type_detail'),
+    path('api/v1/requests/', api.client_requests.list_view, name='api_client_request_list'),
+    path('api/v1/requests/<int:pk>/', api.client_requests.detail_view, name='api_client_request_detail'),
+    path('api/v1/requests/batch/', api.client_request_batch, name='api_client_request_batch'),
+    path('api/v1/requests/changes/', api.client_request_changes, name='api_client_request_changes'),
+    path('api/v1/requests/events/', api.client_request_events, name='api_client_request_events'),
 ]
+
+if settings.METRICS_ENABLED:
+    from . import metrics
+
+    urlpatterns.append(path('metrics', metrics.metrics_view, name='metrics'))
@@ -1,33 +1,62 @@
+from asgiref.sync import sync_to_async
 from django.urls import reverse_lazy
 from django.views.generic import FormView, TemplateView
 from django.contrib import messages
 from django.contrib.auth.views import LoginView, LogoutView
 from django.shortcuts import redirect
+from django.utils.cache import add_never_cache_headers
 from .forms import UserRegistrationForm
 from django.contrib.auth import logout
 
 
+# The public pages below are async views: under ASGI (see mysite/asgi.py) a slow client does not
+# hold a worker thread, and only the blocking parts (session and user loading, form validation,
+# password hashing, saving) run in a thread via sync_to_async. Under WSGI Django runs them
+# in an event loop per request, so both deployment modes serve the same views.
+
+
+async def auser(request):
+    # request.user is loaded lazily from the session, which blocks; resolve it in a thread first
+    # (Django 5.0 adds request.auser() for this)
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+class AnonymousOnlyMixin:
+    # Logged in users should never see the public pages; send them to the admin dashboard
+    async def dispatch(self, request, *args, **kwargs):
+        if (await auser(request)).is_authenticated:
+            return redirect(reverse_lazy('custom_admin:index'))
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncFormMixin:
+    # Async handlers for FormView subclasses; validation and form_valid touch the database
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data())
+
+    async def post(self, request, *args, **kwargs):
+        form = self.get_form()
+        if await sync_to_async(form.is_valid)():
+            return await sync_to_async(self.form_valid)(form)
+        return self.form_invalid(form)
+
+    async def put(self, *args, **kwargs):
+        return await self.post(*args, **kwargs)
+
+
 # Home view
-class HomeView(TemplateView):
+class HomeView(AnonymousOnlyMixin, TemplateView):
     template_name = 'home.html'
-    
-    # Logged in users should never see the home page
-    def dispatch(self, request, *args, **kwargs):
-        if request.user.is_authenticated:
-            return redirect(reverse_lazy('custom_admin:index'))
-        return super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 # # Registration form view
-class RegisterView(FormView):
+class RegisterView(AnonymousOnlyMixin, AsyncFormMixin, FormView):
     template_name = 'register.html'
     form_class = UserRegistrationForm
     
-    # Logged in users should never see the register page
-    def dispatch(self, request, *args, **kwargs):
-        if request.user.is_authenticated:
-            return redirect(reverse_lazy('custom_admin:index'))
-        return super().dispatch(request, *args, **kwargs)
-    
     def form_valid(self, form):
         form.save()
         messages.success(self.request, "You have successfully Registered.")
@@ -36,7 +65,7 @@ class RegisterView(FormView):
     
     
 # Custom login view
-class CustomLoginView(LoginView):
+class CustomLoginView(AsyncFormMixin, LoginView):
     template_name = 'login.html'
     
     # Check if the user is_staff after a successful login
@@ -52,11 +81,16 @@ class CustomLoginView(LoginView):
         return super().form_valid(form)
     
     # Logged in users should never see the login page
-    def dispatch(self, request, *args, **kwargs):
-        if request.user.is_authenticated:
+    async def dispatch(self, request, *args, **kwargs):
+        # LoginView.dispatch's decorators are sync-only before Django 5.0, so it is skipped and
+        # they are applied here; CSRF is already enforced by CsrfViewMiddleware
+        request.sensitive_post_parameters = '__ALL__'
+        if (await auser(request)).is_authenticated:
             # Redirect all logged-in users to the Django admin dashboard
             return redirect(reverse_lazy('custom_admin:index'))
-        return super().dispatch(request, *args, **kwargs)
+        response = await super(LoginView, self).dispatch(request, *args, **kwargs)
+        add_never_cache_headers(response)
+        return response
 
     def get_success_url(self):
         # After successful login, send all users to Django admin dashboard
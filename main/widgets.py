@@ -0,0 +1,35 @@
+from django.contrib.admin.widgets import AutocompleteSelect
+
+
+# AutocompleteSelect that can be handed its selected object up front.
+# The stock widget looks up the selected option's label with one query per rendered form,
+# which turns an inline formset back into an N+1; when the form already has the related
+# object loaded (e.g. via select_related) that lookup is skipped.
+class PrimedAutocompleteSelect(AutocompleteSelect):
+    selected_object = None  # Related object already loaded for this form, if any
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        obj = self.selected_object
+        if obj is None or selected != [str(obj.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(obj)
+        options.append(self.create_option(name, obj.pk, label, True, len(options)))
+        return [(None, options, 0)]
+
+
+# Point the PrimedAutocompleteSelect widgets of a bound or unbound model form at the
+# related objects already loaded on its instance
+def prime_autocomplete_widgets(form):
+    if form.instance is None or form.instance.pk is None:
+        return
+    for name, field in form.fields.items():
+        # Admin wraps foreign key widgets in RelatedFieldWidgetWrapper
+        widget = getattr(field.widget, 'widget', field.widget)
+        if isinstance(widget, PrimedAutocompleteSelect):
+            descriptor = form.instance._meta.get_field(name)
+            if descriptor.is_cached(form.instance):
+                widget.selected_object = descriptor.get_cached_value(form.instance)
@@ -53,6 +53,7 @@ if os.environ.get('DJANGO_ENV') != 'production':
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # for static files
+    'main.perf.PerfMiddleware',  # per-view latency and query stats; after WhiteNoise so static files are skipped
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware', 
@@ -79,16 +80,109 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
+ASGI_APPLICATION = 'mysite.asgi.application'
+
+# How the app is served: 'wsgi' (gunicorn gthread workers) or 'asgi' (gunicorn with uvicorn
+# workers, see entrypoint.sh and gunicorn.conf.py)
+SERVER_INTERFACE = os.getenv('SERVER_INTERFACE', 'wsgi')
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 print("DATABASE_URL:", os.environ.get("DATABASE_URL"))
+# Under ASGI each request's database work runs in its own thread, so persistent connections
+# would pile up instead of being reused; close them per request there (use a pooler such as
+# PgBouncer if connection setup becomes the bottleneck)
 DATABASES = {
-    'default': dj_database_url.config(conn_max_age=600, engine="django.db.backends.postgresql")
+    'default': dj_database_url.config(
+        conn_max_age=0 if SERVER_INTERFACE == 'asgi' else 600,
+        engine="django.db.backends.postgresql",
+    )
+}
+
+
+# Cache
+# CACHE_BACKEND picks the store (instrumented backends in main/cache.py):
+#   'locmem' (default, per process), 'file' (CACHE_DIR, shared on one host),
+#   'redis' (any Redis-protocol server at CACHE_URL) or 'dummy' (no caching).
+# Keys are prefixed with the deployed release (CACHE_RELEASE, or Render's RENDER_GIT_COMMIT),
+# so a new deploy never reads entries pickled by older code; bump CACHE_VERSION to
+# invalidate everything without a deploy.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_RELEASE = os.getenv('CACHE_RELEASE') or os.getenv('RENDER_GIT_COMMIT', '')[:12] or 'dev'
+CACHE_BACKENDS = {
+    'locmem': {'BACKEND': 'main.cache.InstrumentedLocMemCache', 'LOCATION': 'mysite'},
+    'file': {
+        'BACKEND': 'main.cache.InstrumentedFileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR', '/tmp/mysite-cache'),
+    },
+    'redis': {
+        'BACKEND': 'main.cache.InstrumentedRedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://localhost:6379/0'),
+    },
+    'dummy': {'BACKEND': 'main.cache.InstrumentedDummyCache'},
 }
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}; choose from {sorted(CACHE_BACKENDS)}")
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': f'mysite:{CACHE_RELEASE}',
+        'VERSION': int(os.getenv('CACHE_VERSION', '1')),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+    },
+    # Sessions are JSON and outlive deploys, so they get their own alias without the release prefix
+    'sessions': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        **({'LOCATION': 'mysite-sessions'} if CACHE_BACKEND == 'locmem' else {}),
+        'KEY_PREFIX': 'mysite:sessions',
+        'TIMEOUT': None,  # Session expiry is set per key
+    },
+}
+
+
+# Sessions and authentication
+# Invalidation (a logout, a deactivated user, a permission change) only reaches the process that
+# made it unless the cache is shared, so cached sessions and users need CACHE_BACKEND=redis.
+# SESSION_BACKEND: 'cached_db' (reads from the cache, writes through to the database),
+# 'db' (database only) or 'cache' (cache only; sessions are lost if the cache is flushed);
+# the default is 'cached_db' with redis and 'db' otherwise.
+SHARED_CACHE = CACHE_BACKEND == 'redis'
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cached_db' if SHARED_CACHE else 'db')
+if SESSION_BACKEND in ('cache', 'cached_db') and not SHARED_CACHE:
+    raise ValueError(f"SESSION_BACKEND={SESSION_BACKEND!r} needs CACHE_BACKEND=redis: a per-process cache keeps logged-out sessions valid in other workers")
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Caches each user's row and permission set (main/auth_backends.py) for AUTH_CACHE_SECONDS,
+# so authenticated requests need no auth queries once warm; on by default with redis only,
+# 0 turns it off (the stock ModelBackend)
+AUTH_CACHE_SECONDS = int(os.getenv('AUTH_CACHE_SECONDS', '300' if SHARED_CACHE else '0'))
+if AUTH_CACHE_SECONDS and not SHARED_CACHE:
+    raise ValueError('AUTH_CACHE_SECONDS needs CACHE_BACKEND=redis: a per-process cache serves deactivated users and old permissions in other workers')
+AUTHENTICATION_BACKENDS = [
+    'main.auth_backends.CachedModelBackend' if AUTH_CACHE_SECONDS else 'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# Admin search backend: 'basic' (portable), 'trigram' or 'fulltext' (PostgreSQL only, see main/search.py)
+ADMIN_SEARCH_BACKEND = os.getenv('ADMIN_SEARCH_BACKEND', 'trigram')
+
+
+# Seconds the admin index dashboard figures are cached before being recomputed
+ADMIN_DASHBOARD_CACHE_SECONDS = int(os.getenv('ADMIN_DASHBOARD_CACHE_SECONDS', '60'))
+
 
+# Change feed (main/changes.py): rows are served once they are CHANGE_FEED_LAG_SECONDS old, so
+# slow transactions commit first; deletions are remembered for CHANGE_FEED_TOMBSTONE_DAYS
+CHANGE_FEED_LAG_SECONDS = int(os.getenv('CHANGE_FEED_LAG_SECONDS', '5'))
+CHANGE_FEED_TOMBSTONE_DAYS = int(os.getenv('CHANGE_FEED_TOMBSTONE_DAYS', '30'))
+
+# Broker for the request event stream (main/events.py): 'main.events.LocalBroker' fans out
+# within one process; 'main.events.RedisBroker' relays through Redis for several workers/hosts
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'main.events.LocalBroker')
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL') or os.getenv('CACHE_URL', 'redis://localhost:6379/0')
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,14 +226,51 @@ LOGGING = {
         "handlers": ["console"],
         "level": "ERROR",   # change to DEBUG if you want
     },
+    "loggers": {
+        "main.perf": {  # one JSON line per slow or query-heavy request (main/perf.py)
+            "handlers": ["console"],
+            "level": os.getenv("PERF_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
+# Request instrumentation (main/perf.py): requests slower than PERF_SLOW_MS, running more than
+# PERF_MAX_QUERIES queries, or repeating one query shape PERF_DUPLICATE_QUERIES times are logged
+PERF_SLOW_MS = int(os.getenv('PERF_SLOW_MS', '500'))
+PERF_MAX_QUERIES = int(os.getenv('PERF_MAX_QUERIES', '50'))
+PERF_DUPLICATE_QUERIES = int(os.getenv('PERF_DUPLICATE_QUERIES', '10'))
+
+# Prometheus metrics at /metrics (main/metrics.py). Scrapers must send 'Authorization: Bearer
+# <METRICS_TOKEN>'; without a token nothing is served, unless DEBUG is on (then private and
+# loopback addresses are, for local development).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Background jobs (main/jobs.py), run by 'manage.py run_jobs': admin actions over more than
+# JOBS_BACKGROUND_ROWS rows and imports over JOBS_BACKGROUND_IMPORT_BYTES are queued instead of
+# run in the request, then worked through JOBS_CHUNK_SIZE rows per transaction. Failed runs are
+# retried up to JOBS_MAX_ATTEMPTS times, JOBS_RETRY_SECONDS apart (doubling); a job whose worker
+# has not sent a heartbeat (every JOBS_STALE_SECONDS / 3) for JOBS_STALE_SECONDS is handed to another worker.
+JOBS_BACKGROUND_ROWS = int(os.getenv('JOBS_BACKGROUND_ROWS', '1000'))
+JOBS_BACKGROUND_IMPORT_BYTES = int(os.getenv('JOBS_BACKGROUND_IMPORT_BYTES', str(1024 * 1024)))
+JOBS_CHUNK_SIZE = int(os.getenv('JOBS_CHUNK_SIZE', '500'))
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '3'))
+JOBS_RETRY_SECONDS = int(os.getenv('JOBS_RETRY_SECONDS', '30'))
+JOBS_STALE_SECONDS = int(os.getenv('JOBS_STALE_SECONDS', '600'))
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = 'static/'
+# Uploaded files, e.g. imports waiting for their background job (main/jobs.py): the web and
+# run_jobs processes must share MEDIA_ROOT (a shared volume), or point 'default' at an object store
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
 STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },